@@ -2,6 +2,8 @@ from rest_framework import generics, filters, status
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
+from django.db.models import Q
+from apps.core.stats import collect_stats
 from .models import Category
 from .serializers import CategorySerializer, CategoryListSerializer
 
@@ -26,11 +28,10 @@ class CategoryDetailView(generics.RetrieveUpdateDestroyAPIView):
 
 @api_view(['GET'])
 def category_stats(request):
-    total_categories = Category.objects.count()
-    active_categories = Category.objects.filter(is_active=True).count()
+    stats = collect_stats(Category.objects.all(), counters={'active': Q(is_active=True)})
     
     return Response({
-        'total_categories': total_categories,
-        'active_categories': active_categories,
-        'inactive_categories': total_categories - active_categories
+        'total_categories': stats['total'],
+        'active_categories': stats['active'],
+        'inactive_categories': stats['total'] - stats['active']
     })
\ No newline at end of file
@@ -0,0 +1,8 @@
+from django.contrib import admin
+from .models import Sequence
+
+@admin.register(Sequence)
+class SequenceAdmin(admin.ModelAdmin):
+    list_display = ['name', 'last_value', 'updated_at']
+    search_fields = ['name']
+    readonly_fields = ['updated_at']
\ No newline at end of file
@@ -0,0 +1,12 @@
+from django.apps import AppConfig
+
+
+class CoreConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.core'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+        from .slowqueries import install
+
+        connection_created.connect(install, dispatch_uid='apps.core.slowqueries')
\ No newline at end of file
@@ -0,0 +1,78 @@
+"""
+Response caching for read-heavy API views.
+
+Cached entries live under a per-namespace version number. Invalidating a
+namespace just bumps the version, so stale entries are never read again and
+age out on their own; this works the same on locmem, file and Redis backends.
+"""
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.response import Response
+
+from .metrics import Counter
+
+CACHE_REQUESTS = Counter('response_cache_requests_total', 'Cached API view lookups by result', ['view', 'result'])
+
+
+def _version_key(namespace):
+    return f'response-cache:{namespace}:version'
+
+
+def get_version(namespace):
+    version = cache.get(_version_key(namespace))
+    if version is None:
+        # Seed from the clock so a lost version key can't resurrect old entries
+        cache.add(_version_key(namespace), int(time.time() * 1000), None)
+        version = cache.get(_version_key(namespace))
+    return version
+
+
+def invalidate(namespace):
+    """Make every cached response in ``namespace`` stale"""
+    try:
+        cache.incr(_version_key(namespace))
+    except ValueError:
+        get_version(namespace)
+
+
+def make_cache_key(namespace, name, request):
+    """Cache key for a request: namespace version, endpoint and the sorted query params"""
+    params = sorted((key, value) for key in request.query_params for value in request.query_params.getlist(key))
+    digest = hashlib.sha1(repr(params).encode()).hexdigest()
+    return f'response-cache:{namespace}:{get_version(namespace)}:{name}:{digest}'
+
+
+def cache_response(name, timeout=60, namespace='dashboard'):
+    """
+    Cache successful GET responses of a function-based API view.
+
+    Apply it below @api_view so authentication and permissions still run on
+    every request. ``RESPONSE_CACHE_TTLS[name]`` in settings overrides the timeout.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if request.method != 'GET':
+                return view_func(request, *args, **kwargs)
+
+            key = make_cache_key(namespace, name, request)
+            data = cache.get(key)
+            if data is not None:
+                CACHE_REQUESTS.inc(view=name, result='hit')
+                response = Response(data)
+                response['X-Cache'] = 'HIT'
+                return response
+
+            CACHE_REQUESTS.inc(view=name, result='miss')
+            response = view_func(request, *args, **kwargs)
+            if response.status_code == 200:
+                ttl = getattr(settings, 'RESPONSE_CACHE_TTLS', {}).get(name, timeout)
+                cache.set(key, response.data, ttl)
+            response['X-Cache'] = 'MISS'
+            return response
+        return wrapper
+    return decorator
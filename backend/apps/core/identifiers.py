@@ -0,0 +1,80 @@
+"""
+Human-readable identifiers (PRD0001, SUP0001, EMP0001) allocated from sequences.
+
+Formats can be overridden per entity with ``IDENTIFIER_FORMATS`` in settings,
+e.g. ``{'product': {'prefix': 'SKU', 'width': 6}}``. ``width`` is a minimum:
+numbers simply grow past it instead of running out.
+"""
+import re
+
+from django.apps import apps
+from django.conf import settings
+
+from . import sequences
+
+IDENTIFIER_FORMATS = {
+    'product': {'model': 'products.Product', 'field': 'code', 'prefix': 'PRD', 'width': 4},
+    'supplier': {'model': 'suppliers.Supplier', 'field': 'supplier_id', 'prefix': 'SUP', 'width': 4},
+    'employee': {'model': 'employees.Employee', 'field': 'eid', 'prefix': 'EMP', 'width': 4},
+}
+
+
+def get_format(entity):
+    identifier_format = dict(IDENTIFIER_FORMATS[entity])
+    identifier_format.update(getattr(settings, 'IDENTIFIER_FORMATS', {}).get(entity, {}))
+    return identifier_format
+
+
+def _sequence_name(entity, identifier_format):
+    return f"identifier:{entity}:{identifier_format['prefix']}"
+
+
+def _parse(identifier_format, value):
+    """Numeric part of ``value`` if it looks like one of our identifiers, else None"""
+    match = re.fullmatch(re.escape(identifier_format['prefix']) + r'(\d+)', value or '')
+    return int(match.group(1)) if match else None
+
+
+def _highest_in_use(identifier_format):
+    """Largest number already taken; only consulted when a sequence is first created"""
+    model = apps.get_model(identifier_format['model'])
+    field = identifier_format['field']
+    values = model.objects.filter(
+        **{f'{field}__startswith': identifier_format['prefix']}
+    ).values_list(field, flat=True).iterator()
+    return max((number for number in (_parse(identifier_format, value) for value in values) if number is not None), default=0)
+
+
+def allocate(entity, count=1):
+    """Reserve ``count`` new identifiers for ``entity`` in one round trip; returns a list"""
+    identifier_format = get_format(entity)
+    numbers = sequences.reserve(
+        _sequence_name(entity, identifier_format),
+        count,
+        initial=lambda: _highest_in_use(identifier_format)
+    )
+    return [f"{identifier_format['prefix']}{number:0{identifier_format['width']}d}" for number in numbers]
+
+
+def observe(entity, value):
+    """Record a manually entered identifier so the sequence never hands it out again"""
+    identifier_format = get_format(entity)
+    number = _parse(identifier_format, value)
+    if number is not None:
+        sequences.advance(
+            _sequence_name(entity, identifier_format),
+            number,
+            initial=lambda: _highest_in_use(identifier_format)
+        )
+
+
+def observe_many(entity, values):
+    """Like observe() for a batch of identifiers: advances the sequence once, to the highest one"""
+    identifier_format = get_format(entity)
+    number = max((n for n in (_parse(identifier_format, value) for value in values) if n is not None), default=None)
+    if number is not None:
+        sequences.advance(
+            _sequence_name(entity, identifier_format),
+            number,
+            initial=lambda: _highest_in_use(identifier_format)
+        )
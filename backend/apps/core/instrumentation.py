@@ -0,0 +1,201 @@
+"""
+Per-request SQL and timing instrumentation.
+
+RequestInstrumentationMiddleware measures every request: the number of SQL
+queries and the time spent in them (through a database execute wrapper),
+the time DRF serializers spend producing ``.data`` outside those queries,
+and the time spent rendering the response. It then
+
+* adds a ``Server-Timing`` header, which browser dev tools show per request,
+* logs one JSON line per request to the ``apps.core.instrumentation`` logger,
+* counts the request in the http_requests_total and
+  http_request_duration_seconds metrics (see apps.core.metrics),
+* flags duplicate queries (same SQL and parameters run more than once) and
+  N+1 patterns (the same SQL run at least ``INSTRUMENTATION_N_PLUS_ONE_THRESHOLD``
+  times with different parameters), logging those requests as warnings.
+
+The bookkeeping is a few counters per query, so it is cheap enough to leave
+on in production. Set ``INSTRUMENTATION_SERVER_TIMING = False`` to keep the
+timings out of public responses.
+"""
+import json
+import logging
+import re
+from collections import Counter
+from contextlib import ExitStack
+from contextvars import ContextVar
+from time import perf_counter
+
+from django.conf import settings
+from django.db import connections
+from rest_framework import serializers
+
+from . import metrics as exported
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_N_PLUS_ONE_THRESHOLD = 5
+# Longest SQL text included in the log for each flagged statement
+MAX_LOGGED_SQL = 300
+
+_SELECT_LIST = re.compile(r'^SELECT .+? FROM ', re.DOTALL)
+
+_current = ContextVar('request_metrics', default=None)
+
+REQUESTS = exported.Counter('http_requests_total', 'HTTP requests by route and status', ['method', 'route', 'status'])
+REQUEST_LATENCY = exported.Histogram(
+    'http_request_duration_seconds', 'Time to handle an HTTP request, by route', ['method', 'route']
+)
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.started = perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.serialize_time = 0.0
+        self.serializing = False
+        self.view = None
+        self.view_finished = None
+        self.statements = Counter()  # SQL -> executions
+        self.executions = Counter()  # (SQL, parameters) -> executions
+
+    def duplicate_queries(self):
+        """Executions that repeated an identical earlier query"""
+        return sum(count - 1 for count in self.executions.values() if count > 1)
+
+    def repeated_statements(self, threshold):
+        """(SQL, count) for statements run at least ``threshold`` times"""
+        return [(sql, count) for sql, count in self.statements.most_common() if count >= threshold]
+
+
+def summarize_sql(sql):
+    """Shorten a statement for the log, dropping the column list so the FROM and WHERE clauses fit"""
+    sql = _SELECT_LIST.sub('SELECT ... FROM ', sql)
+    return sql if len(sql) <= MAX_LOGGED_SQL else sql[:MAX_LOGGED_SQL] + '...'
+
+
+def current_metrics():
+    """Metrics of the request being handled, or None outside the middleware"""
+    return _current.get()
+
+
+def record_query(execute, sql, params, many, context):
+    """Database execute wrapper that times and counts queries for the current request"""
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.db_time += perf_counter() - started
+        metrics.queries += 1
+        metrics.statements[sql] += 1
+        if not many:
+            metrics.executions[(sql, repr(params))] += 1
+
+
+def _timed_data(data_property):
+    """Wrap a serializer's ``data`` property to add its non-SQL time to the request's serialize time"""
+    fget = data_property.fget
+
+    def data(self):
+        metrics = _current.get()
+        if metrics is None or metrics.serializing:
+            return fget(self)
+        metrics.serializing = True
+        started, db_time = perf_counter(), metrics.db_time
+        try:
+            return fget(self)
+        finally:
+            # Queries run while serializing already count as database time
+            metrics.serialize_time += perf_counter() - started - (metrics.db_time - db_time)
+            metrics.serializing = False
+
+    data.instrumented = True
+    return property(data)
+
+
+def install_serializer_timing():
+    for serializer_class in (serializers.Serializer, serializers.ListSerializer):
+        data_property = serializer_class.__dict__['data']
+        if not getattr(data_property.fget, 'instrumented', False):
+            serializer_class.data = _timed_data(data_property)
+
+
+class RequestInstrumentationMiddleware:
+    """Put this first in MIDDLEWARE so the total covers the whole request"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.threshold = getattr(settings, 'INSTRUMENTATION_N_PLUS_ONE_THRESHOLD', DEFAULT_N_PLUS_ONE_THRESHOLD)
+        self.server_timing = getattr(settings, 'INSTRUMENTATION_SERVER_TIMING', True)
+        install_serializer_timing()
+
+    def __call__(self, request):
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(record_query))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+
+        finished = perf_counter()
+        # DRF responses are rendered after process_template_response()
+        render_time = finished - metrics.view_finished if metrics.view_finished else 0.0
+        timings = {
+            'db': metrics.db_time,
+            'serialize': metrics.serialize_time,
+            'render': render_time,
+            'total': finished - metrics.started,
+        }
+        if self.server_timing:
+            response['Server-Timing'] = ', '.join(
+                f'{name};dur={seconds * 1000:.1f}' + (f';desc="{metrics.queries} queries"' if name == 'db' else '')
+                for name, seconds in timings.items()
+            )
+        self.log(request, response, metrics, timings)
+
+        # Label by URL pattern rather than path so ids don't create a series each
+        match = getattr(request, 'resolver_match', None)
+        route = match.route if match else 'unmatched'
+        REQUESTS.inc(method=request.method, route=route, status=response.status_code)
+        REQUEST_LATENCY.observe(timings['total'], method=request.method, route=route)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        metrics = _current.get()
+        if metrics is not None:
+            # Class-based and @api_view views keep the class, named after the function for the latter
+            view = getattr(view_func, 'view_class', view_func)
+            metrics.view = f'{view.__module__}.{view.__name__}'
+
+    def process_template_response(self, request, response):
+        metrics = _current.get()
+        if metrics is not None:
+            metrics.view_finished = perf_counter()
+        return response
+
+    def log(self, request, response, metrics, timings):
+        entry = {
+            'method': request.method,
+            'path': request.path,
+            'view': metrics.view,
+            'status': response.status_code,
+            'queries': metrics.queries,
+        }
+        entry.update({f'{name}_ms': round(seconds * 1000, 1) for name, seconds in timings.items()})
+
+        duplicates = metrics.duplicate_queries()
+        repeated = metrics.repeated_statements(self.threshold)
+        if duplicates:
+            entry['duplicate_queries'] = duplicates
+        if repeated:
+            entry['n_plus_one'] = [{'sql': summarize_sql(sql), 'count': count} for sql, count in repeated]
+
+        level = logging.WARNING if duplicates or repeated else logging.INFO
+        logger.log(level, json.dumps(entry))
@@ -0,0 +1,50 @@
+import glob
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from apps.core.slowqueries import read_entries, summarize
+
+
+class Command(BaseCommand):
+    help = 'Summarize the slow-query log by query fingerprint, worst offenders first'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--log',
+            default=None,
+            help='Slow-query log to read, rotated files included (default: SLOW_QUERY_LOG)',
+        )
+        parser.add_argument('--top', type=int, default=10, help='Fingerprints to show')
+        parser.add_argument(
+            '--sort',
+            choices=['total', 'count', 'max', 'mean'],
+            default='total',
+            help='Rank by total time, number of slow executions, or maximum or mean duration',
+        )
+        parser.add_argument('--plans', action='store_true', help='Print the latest plan of each fingerprint')
+
+    def handle(self, *args, **options):
+        log = options['log'] or getattr(settings, 'SLOW_QUERY_LOG', None)
+        if not log:
+            raise CommandError('No slow-query log configured; pass --log')
+        # The live file plus the backups RotatingFileHandler leaves next to it
+        paths = sorted(glob.glob(glob.escape(log) + '.*')) + [log]
+        groups = summarize(read_entries(paths), sort=options['sort'])
+        if not groups:
+            self.stdout.write(f'No slow queries logged in {log}')
+            return
+
+        total = sum(group['count'] for group in groups)
+        self.stdout.write(f'{total} slow queries, {len(groups)} fingerprints; top {min(options["top"], len(groups))} by {options["sort"]}:')
+        for rank, group in enumerate(groups[:options['top']], 1):
+            self.stdout.write('')
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f"{rank}. {group['fingerprint']}  total {group['total_ms']:.0f}ms  count {group['count']}  "
+                f"mean {group['mean_ms']:.0f}ms  max {group['max_ms']:.0f}ms  last {group['last_seen']}"
+            ))
+            if group['views']:
+                self.stdout.write(f"   from: {', '.join(group['views'])}")
+            self.stdout.write(f"   {group['normalized']}")
+            if options['plans'] and group['plan']:
+                for line in group['plan']:
+                    self.stdout.write(f'     {line}')
@@ -0,0 +1,290 @@
+"""
+Counters and histograms exported in the Prometheus text format.
+
+Metrics are kept in memory by each process and written to a JSON file per
+process in ``METRICS_DIR`` at most every ``METRICS_FLUSH_INTERVAL`` seconds
+(and on exit), so every gunicorn worker can answer /api/metrics/ with the
+totals of all of them. Files left behind by workers that have exited are
+folded into ``archived.json``, which keeps counters from going backwards
+when workers are recycled; delete the directory to start from zero. With
+``METRICS_DIR`` empty each process only reports its own values.
+
+Define a metric once at module level and update it where the event happens:
+
+    SALES_CREATED = Counter('sales_created_total', 'Sales created', ['source'])
+    SALES_CREATED.inc(source='api')
+"""
+import atexit
+import json
+import math
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process development only
+    fcntl = None
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+DEFAULT_FLUSH_INTERVAL = 5
+# Request latency buckets in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+ARCHIVE_FILE = 'archived.json'
+LOCK_FILE = '.lock'
+
+
+class Metric:
+    type = None
+
+    def __init__(self, name, documentation, labelnames=(), registry=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.values = {}  # label values -> value
+        self.registry = registry or REGISTRY
+        self.registry.register(self)
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {list(self.labelnames)}, got {sorted(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+
+class Counter(Metric):
+    type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self.registry.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+        self.registry.maybe_flush()
+
+    @staticmethod
+    def merge(total, value):
+        return (total or 0) + value
+
+    def samples(self, key, value):
+        yield self.name, key, value
+
+
+class Histogram(Metric):
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS, registry=None):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def observe(self, amount, **labels):
+        key = self._key(labels)
+        with self.registry.lock:
+            value = self.values.get(key)
+            if value is None:
+                value = self.values[key] = {'buckets': [0] * len(self.buckets), 'sum': 0, 'count': 0}
+            for index, bound in enumerate(self.buckets):
+                if amount <= bound:
+                    value['buckets'][index] += 1
+                    break
+            value['sum'] += amount
+            value['count'] += 1
+        self.registry.maybe_flush()
+
+    @staticmethod
+    def merge(total, value):
+        if total is None:
+            return {'buckets': list(value['buckets']), 'sum': value['sum'], 'count': value['count']}
+        total['buckets'] = [a + b for a, b in zip(total['buckets'], value['buckets'])]
+        total['sum'] += value['sum']
+        total['count'] += value['count']
+        return total
+
+    def samples(self, key, value):
+        # Buckets are stored per interval and exported cumulatively
+        cumulative = 0
+        for bound, count in zip(self.buckets, value['buckets']):
+            cumulative += count
+            yield f'{self.name}_bucket', key + (('le', _format_value(bound)),), cumulative
+        yield f'{self.name}_bucket', key + (('le', '+Inf'),), value['count']
+        yield f'{self.name}_sum', key, value['sum']
+        yield f'{self.name}_count', key, value['count']
+
+
+def _format_value(value):
+    if isinstance(value, float) and math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = {}
+        self.lock = threading.Lock()
+        self.last_flush = time.monotonic()
+        self.flushed = False
+        # A forked worker starts from zero instead of repeating the parent's counts
+        os.register_at_fork(after_in_child=self.reset)
+
+    def register(self, metric):
+        if metric.name in self.metrics:
+            raise ValueError(f'Metric {metric.name} is already registered')
+        self.metrics[metric.name] = metric
+
+    def reset(self):
+        self.lock = threading.Lock()
+        self.last_flush = time.monotonic()
+        self.flushed = False
+        for metric in self.metrics.values():
+            metric.values = {}
+
+    @property
+    def directory(self):
+        directory = getattr(settings, 'METRICS_DIR', '')
+        return Path(directory) if directory else None
+
+    def snapshot(self):
+        """This process's values as {metric name: [[label values, value], ...]}"""
+        with self.lock:
+            return {
+                name: [[list(key), value] for key, value in metric.values.items()]
+                for name, metric in self.metrics.items()
+                if metric.values
+            }
+
+    def maybe_flush(self):
+        interval = getattr(settings, 'METRICS_FLUSH_INTERVAL', DEFAULT_FLUSH_INTERVAL)
+        if time.monotonic() - self.last_flush >= interval:
+            self.flush()
+
+    def flush(self):
+        """Write this process's values to its file in METRICS_DIR"""
+        self.last_flush = time.monotonic()
+        directory = self.directory
+        snapshot = self.snapshot()
+        if directory is None or not (snapshot or self.flushed):
+            return
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f'{os.getpid()}.json'
+        if not self.flushed and path.exists():
+            # Left by an earlier process with the same pid
+            with _locked(directory):
+                self._archive([path])
+        _write_json(path, snapshot)
+        self.flushed = True
+
+    def collect(self):
+        """Values of every process, merged; {metric name: {label values: value}}"""
+        directory = self.directory
+        if directory is None:
+            return self._merge({}, self.snapshot())
+
+        self.flush()
+        with _locked(directory):
+            totals = self._merge({}, _read_json(directory / ARCHIVE_FILE))
+            finished = []
+            for path in directory.glob('*.json'):
+                if path.name == ARCHIVE_FILE:
+                    continue
+                self._merge(totals, _read_json(path))
+                if path.stem.isdigit() and not _process_alive(int(path.stem)):
+                    finished.append(path)
+            if finished:
+                # Fold the files of exited workers into the archive so the directory doesn't grow
+                self._archive(finished)
+        return totals
+
+    def _archive(self, paths):
+        """Add the values in ``paths`` to the archive and delete them; call with the directory locked"""
+        archive_path = self.directory / ARCHIVE_FILE
+        archive = self._merge({}, _read_json(archive_path))
+        for path in paths:
+            self._merge(archive, _read_json(path))
+        _write_json(archive_path, {
+            name: [[list(key), value] for key, value in values.items()]
+            for name, values in archive.items()
+        })
+        for path in paths:
+            path.unlink()
+
+    def _merge(self, totals, snapshot):
+        for name, values in snapshot.items():
+            metric = self.metrics.get(name)
+            if metric is None:
+                continue
+            merged = totals.setdefault(name, {})
+            for key, value in values:
+                key = tuple(key)
+                merged[key] = metric.merge(merged.get(key), value)
+        return totals
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format"""
+        totals = self.collect()
+        lines = []
+        for name, metric in sorted(self.metrics.items()):
+            lines.append(f'# HELP {name} {metric.documentation}')
+            lines.append(f'# TYPE {name} {metric.type}')
+            values = totals.get(name, {})
+            if not values and not metric.labelnames and metric.type == 'counter':
+                values = {(): 0}
+            for key, value in sorted(values.items()):
+                for sample, labels, number in metric.samples(tuple(zip(metric.labelnames, key)), value):
+                    label_text = ','.join(f'{label}="{_escape(text)}"' for label, text in labels)
+                    lines.append(f'{sample}{{{label_text}}} {_format_value(number)}' if label_text else f'{sample} {_format_value(number)}')
+        return '\n'.join(lines) + '\n'
+
+
+def _read_json(path):
+    try:
+        with open(path) as handle:
+            return json.load(handle)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_json(path, data):
+    # Write to a temporary file and rename it so readers never see a partial file
+    handle, temp_path = tempfile.mkstemp(dir=path.parent, prefix='.tmp-')
+    with os.fdopen(handle, 'w') as temp:
+        json.dump(data, temp)
+    os.replace(temp_path, path)
+
+
+class _locked:
+    """Exclusive lock on the metrics directory while it is read and archived"""
+
+    def __init__(self, directory):
+        self.path = directory / LOCK_FILE
+
+    def __enter__(self):
+        self.handle = open(self.path, 'a')
+        if fcntl:
+            fcntl.flock(self.handle, fcntl.LOCK_EX)
+
+    def __exit__(self, *exc_info):
+        if fcntl:
+            fcntl.flock(self.handle, fcntl.LOCK_UN)
+        self.handle.close()
+
+
+REGISTRY = Registry()
+atexit.register(REGISTRY.flush)
@@ -0,0 +1,13 @@
+from django.db import models
+
+class Sequence(models.Model):
+    """Named counter used to hand out identifiers without retry loops"""
+    name = models.CharField(max_length=100, unique=True)
+    last_value = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['name']
+        
+    def __str__(self):
+        return f"{self.name} @ {self.last_value}"
\ No newline at end of file
@@ -0,0 +1,48 @@
+"""
+Migration operations for schema changes on large tables.
+
+Like django.contrib.postgres.operations.AddIndexConcurrently, but usable on
+every backend: the postgres contrib module imports psycopg at load time,
+which breaks SQLite installs. On PostgreSQL the index is built with CREATE
+INDEX CONCURRENTLY so writes to the table carry on during the build; other
+databases fall back to a plain CREATE INDEX.
+"""
+from django.db import NotSupportedError
+from django.db.migrations import AddIndex
+
+
+class AddIndexConcurrently(AddIndex):
+    """Create an index without blocking writes on PostgreSQL; the migration must set atomic = False"""
+    atomic = False
+
+    def describe(self):
+        description = super().describe()
+        return f'Concurrently {description[0].lower()}{description[1:]}'
+
+    def _concurrent(self, schema_editor):
+        if schema_editor.connection.vendor != 'postgresql':
+            return False
+        if schema_editor.connection.in_atomic_block:
+            raise NotSupportedError(
+                'The AddIndexConcurrently operation cannot be executed inside a transaction '
+                '(set atomic = False on the migration).'
+            )
+        return True
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        model = to_state.apps.get_model(app_label, self.model_name)
+        if not self.allow_migrate_model(schema_editor.connection.alias, model):
+            return
+        if self._concurrent(schema_editor):
+            schema_editor.add_index(model, self.index, concurrently=True)
+        else:
+            schema_editor.add_index(model, self.index)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        model = from_state.apps.get_model(app_label, self.model_name)
+        if not self.allow_migrate_model(schema_editor.connection.alias, model):
+            return
+        if self._concurrent(schema_editor):
+            schema_editor.remove_index(model, self.index, concurrently=True)
+        else:
+            schema_editor.remove_index(model, self.index)
@@ -0,0 +1,136 @@
+"""
+Pagination classes for large list endpoints.
+
+Page-number pagination runs a COUNT(*) and an OFFSET that grows with the page
+number. Keyset pagination instead remembers the (sort value, id) of the last
+row and asks for the rows after it, so every page costs the same and the id
+tiebreak keeps the order stable when sort values repeat.
+"""
+import base64
+import json
+from decimal import Decimal
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+def _encode_value(value):
+    # Full-precision isoformat: DjangoJSONEncoder drops microseconds, which would skip rows
+    if isinstance(value, Decimal):
+        return str(value)
+    return value.isoformat()
+
+
+class KeysetPagination(BasePagination):
+    """
+    Forward-only cursor pagination on (ordering field, id).
+
+    The ordering field is the first one from the view's OrderingFilter
+    (?ordering=), falling back to ``default_ordering``. No COUNT(*) runs
+    unless the client asks for it with ?count=true.
+    """
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    default_ordering = '-created_at'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        field = self.get_ordering_field(request, queryset, view)
+        self.field_name = field.lstrip('-')
+        descending = field.startswith('-')
+
+        queryset = queryset.order_by(field, '-pk' if descending else 'pk')
+        self.count = None
+        if request.query_params.get(self.count_query_param, '').lower() in ('1', 'true', 'yes'):
+            self.count = queryset.count()
+
+        cursor = self.decode_cursor(request)
+        if cursor is not None:
+            value, pk = cursor
+            lookup = 'lt' if descending else 'gt'
+            queryset = queryset.filter(
+                Q(**{f'{self.field_name}__{lookup}': value}) |
+                Q(**{self.field_name: value, f'pk__{lookup}': pk})
+            )
+
+        # One extra row tells us whether there is a next page without counting
+        rows = list(queryset[:self.page_size + 1])
+        self.has_next = len(rows) > self.page_size
+        self.page = rows[:self.page_size]
+        return self.page
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(page_size, self.max_page_size))
+
+    def get_ordering_field(self, request, queryset, view):
+        for backend in getattr(view, 'filter_backends', []):
+            if hasattr(backend, 'get_ordering'):
+                ordering = backend().get_ordering(request, queryset, view)
+                if ordering:
+                    field = ordering[0]
+                    # Keyset filters need a plain column; related lookups fall back to the default
+                    if '__' not in field:
+                        return field.replace('id', 'pk') if field.lstrip('-') == 'id' else field
+                break
+        return self.default_ordering
+
+    def encode_cursor(self, row):
+        position = json.dumps([getattr(row, self.field_name), row.pk], default=_encode_value)
+        return base64.urlsafe_b64encode(position.encode()).decode()
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            value, pk = json.loads(base64.urlsafe_b64decode(encoded.encode()).decode())
+            return value, int(pk)
+        except (TypeError, ValueError, UnicodeDecodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.page[-1]))
+
+    def get_paginated_response(self, data):
+        response = {'next': self.get_next_link(), 'results': data}
+        if self.count is not None:
+            response = {'count': self.count, **response}
+        return Response(response)
+
+
+class PageNumberOrCursorPagination(PageNumberPagination):
+    """
+    Page numbers by default; ?paginate=cursor switches the request to
+    KeysetPagination so deep pages don't pay for COUNT(*) and OFFSET.
+    """
+    mode_query_param = 'paginate'
+    cursor_class = KeysetPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_paginator = None
+        if request.query_params.get(self.mode_query_param) == 'cursor':
+            self.cursor_paginator = self.cursor_class()
+            self.cursor_paginator.page_size = self.page_size
+            return self.cursor_paginator.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
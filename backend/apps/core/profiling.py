@@ -0,0 +1,202 @@
+"""
+On-demand profiling of single requests for staff users.
+
+Add ``?profile=1`` or an ``X-Profile: 1`` header to any request made as a
+staff user (admin session or JWT) and ProfilingMiddleware runs the view
+under cProfile while a background thread samples the request thread's
+stack. Both results are kept in ``PROFILE_DIR``:
+
+* ``<id>.prof``: cProfile data, readable with pstats or snakeviz,
+* ``<id>.collapsed``: sampled stacks in the collapsed format that
+  flamegraph.pl and speedscope read,
+* ``<id>.json``: the request, user, status and timing.
+
+Only the newest ``PROFILE_KEEP`` profiles are kept. The response carries an
+``X-Profile-Id`` header, and the profiles can be browsed under
+/admin/profiles/. Requests from anyone else ignore the flag.
+"""
+import cProfile
+import io
+import json
+import pstats
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from pathlib import Path
+
+from django.conf import settings
+from rest_framework.exceptions import APIException
+from rest_framework.settings import api_settings
+
+PROFILE_PARAM = 'profile'
+PROFILE_HEADER = 'X-Profile'
+DEFAULT_KEEP = 50
+# Seconds between stack samples; the interpreter's switch interval (5ms) is the practical floor
+DEFAULT_SAMPLE_INTERVAL = 0.005
+KINDS = {
+    'prof': 'application/octet-stream',
+    'collapsed': 'text/plain; charset=utf-8',
+}
+
+# pstats orderings offered in the admin
+SORT_OPTIONS = ('cumulative', 'tottime', 'ncalls')
+
+_PROFILE_ID = re.compile(r'^\d{8}-\d{9}-[0-9a-f]{8}$')
+
+
+def profile_directory():
+    return Path(getattr(settings, 'PROFILE_DIR', Path(settings.BASE_DIR) / 'logs' / 'profiles'))
+
+
+class StackSampler(threading.Thread):
+    """Counts the collapsed stacks of one thread, sampled every ``interval`` seconds"""
+
+    def __init__(self, thread_id, interval):
+        super().__init__(daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.finished = threading.Event()
+
+    def run(self):
+        while not self.finished.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stacks[collapse_stack(frame)] += 1
+
+    def stop(self):
+        self.finished.set()
+        self.join()
+
+
+def collapse_stack(frame):
+    """``module:function;module:function`` from the outermost frame down to ``frame``"""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f'{frame.f_globals.get("__name__", code.co_filename)}:{code.co_name}')
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+def save_profile(profiler, stacks, meta):
+    """Write a profile to PROFILE_DIR, drop the oldest beyond PROFILE_KEEP and return its id"""
+    directory = profile_directory()
+    directory.mkdir(parents=True, exist_ok=True)
+    # Ids sort by creation time, which is the order the ring drops them in
+    now = time.time()
+    profile_id = f"{time.strftime('%Y%m%d-%H%M%S', time.localtime(now))}{int(now * 1000) % 1000:03d}-{uuid.uuid4().hex[:8]}"
+
+    profiler.dump_stats(directory / f'{profile_id}.prof')
+    (directory / f'{profile_id}.collapsed').write_text(
+        ''.join(f'{stack} {count}\n' for stack, count in stacks.most_common())
+    )
+    # The metadata goes last: a profile is listed once its .json exists
+    (directory / f'{profile_id}.json').write_text(json.dumps(dict(meta, id=profile_id)))
+
+    keep = getattr(settings, 'PROFILE_KEEP', DEFAULT_KEEP)
+    for stale in sorted(directory.glob('*.json'), reverse=True)[keep:]:
+        for kind in ('json', *KINDS):
+            stale.with_suffix(f'.{kind}').unlink(missing_ok=True)
+    return profile_id
+
+
+def list_profiles():
+    """Metadata of the stored profiles, newest first"""
+    profiles = []
+    for path in sorted(profile_directory().glob('*.json'), reverse=True):
+        try:
+            profiles.append(json.loads(path.read_text()))
+        except (OSError, ValueError):
+            continue
+    return profiles
+
+
+def profile_path(profile_id, kind):
+    """Path of one of a profile's files, or None for an unknown id or kind"""
+    if not _PROFILE_ID.match(profile_id) or kind not in ('json', *KINDS):
+        return None
+    path = profile_directory() / f'{profile_id}.{kind}'
+    return path if path.exists() else None
+
+
+def get_profile(profile_id):
+    path = profile_path(profile_id, 'json')
+    return json.loads(path.read_text()) if path else None
+
+
+def format_stats(profile_id, sort='cumulative', limit=60):
+    """The pstats report of a profile as text"""
+    stream = io.StringIO()
+    stats = pstats.Stats(str(profile_path(profile_id, 'prof')), stream=stream)
+    stats.strip_dirs().sort_stats(sort).print_stats(limit)
+    return stream.getvalue()
+
+
+def top_stacks(profile_id, limit=30):
+    """The most sampled stacks as (count, stack) pairs"""
+    path = profile_path(profile_id, 'collapsed')
+    if path is None:
+        return []
+    stacks = []
+    for line in path.read_text().splitlines()[:limit]:
+        stack, _, count = line.rpartition(' ')
+        stacks.append((int(count), stack))
+    return stacks
+
+
+def _staff_user(request):
+    """The staff user making the request, from the session or the API's authentication classes"""
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return user if user.is_staff else None
+    for authentication_class in api_settings.DEFAULT_AUTHENTICATION_CLASSES:
+        try:
+            result = authentication_class().authenticate(request)
+        except (APIException, AttributeError):
+            continue
+        if result is not None:
+            return result[0] if result[0].is_staff else None
+    return None
+
+
+class ProfilingMiddleware:
+    """Put this last in MIDDLEWARE, after AuthenticationMiddleware, so it profiles the view only"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.interval = getattr(settings, 'PROFILE_SAMPLE_INTERVAL', DEFAULT_SAMPLE_INTERVAL)
+
+    def __call__(self, request):
+        requested = request.GET.get(PROFILE_PARAM) or request.headers.get(PROFILE_HEADER)
+        if requested in (None, '', '0', 'false'):
+            return self.get_response(request)
+        user = _staff_user(request)
+        if user is None:
+            return self.get_response(request)
+
+        profiler = cProfile.Profile()
+        sampler = StackSampler(threading.get_ident(), self.interval)
+        sampler.start()
+        started = time.perf_counter()
+        profiler.enable()
+        try:
+            response = self.get_response(request)
+        finally:
+            profiler.disable()
+            sampler.stop()
+        duration = time.perf_counter() - started
+
+        response['X-Profile-Id'] = save_profile(profiler, sampler.stacks, {
+            'method': request.method,
+            'path': request.get_full_path(),
+            'user': user.get_username(),
+            'status': response.status_code,
+            'duration_ms': round(duration * 1000, 1),
+            'samples': sum(sampler.stacks.values()),
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        })
+        return response
@@ -0,0 +1,52 @@
+"""
+Database-backed counters.
+
+Reserving values is a single conditional UPDATE (which holds the row lock on
+PostgreSQL and the write lock on SQLite until the surrounding transaction
+ends) followed by reading the new value back, so concurrent callers always
+get disjoint ranges and a rolled back transaction gives its values back.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+
+from .models import Sequence
+
+
+def reserve(name, count=1, initial=None):
+    """
+    Reserve ``count`` consecutive values from sequence ``name`` and return them as a range.
+
+    ``initial`` is an optional callable giving the starting value when the
+    sequence doesn't exist yet (e.g. the highest identifier already in use).
+    """
+    if count < 1:
+        raise ValueError('count must be at least 1')
+
+    with transaction.atomic():
+        if not Sequence.objects.filter(name=name).update(last_value=F('last_value') + count):
+            start = initial() if initial else 0
+            try:
+                with transaction.atomic():
+                    Sequence.objects.create(name=name, last_value=start + count)
+            except IntegrityError:
+                # Someone else created it first
+                Sequence.objects.filter(name=name).update(last_value=F('last_value') + count)
+        last_value = Sequence.objects.filter(name=name).values_list('last_value', flat=True).get()
+    return range(last_value - count + 1, last_value + 1)
+
+
+def advance(name, value, initial=None):
+    """Make sure sequence ``name`` never hands out ``value`` or anything below it"""
+    if not Sequence.objects.filter(name=name).update(last_value=Greatest(F('last_value'), value)):
+        start = max(initial() if initial else 0, value)
+        try:
+            with transaction.atomic():
+                Sequence.objects.create(name=name, last_value=start)
+        except IntegrityError:
+            Sequence.objects.filter(name=name).update(last_value=Greatest(F('last_value'), value))
+
+
+def last_values(names):
+    """{name: last value handed out} for the sequences in ``names`` that exist"""
+    return dict(Sequence.objects.filter(name__in=set(names)).values_list('name', 'last_value'))
@@ -0,0 +1,29 @@
+"""
+Serializer helpers shared across apps.
+"""
+
+FIELDS_PARAM = 'fields'
+
+
+def requested_fields(request):
+    """Field names asked for with ?fields=a,b,c, or None when the parameter is absent"""
+    if request is None:
+        return None
+    value = request.query_params.get(FIELDS_PARAM)
+    if not value:
+        return None
+    return {name.strip() for name in value.split(',') if name.strip()}
+
+
+class SparseFieldsMixin:
+    """
+    Lets list endpoints return a subset of fields with ?fields=a,b,c.
+    Unknown names are ignored; without the parameter every field is returned.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        fields = requested_fields(self.context.get('request'))
+        if fields is not None:
+            for name in set(self.fields) - fields:
+                self.fields.pop(name)
@@ -0,0 +1,195 @@
+"""
+Slow-query log with the plan captured at the time of the query.
+
+Every database connection gets an execute wrapper (installed from
+CoreConfig.ready through the connection_created signal, so management
+commands are covered too). A query that takes longer than
+``SLOW_QUERY_THRESHOLD_MS`` is logged as one JSON line to the
+``apps.core.slowqueries`` logger, which settings send to a rotating file.
+Each entry has:
+
+* a fingerprint of the SQL with literals and parameters replaced by ``?``,
+  so the same query with different values groups together,
+* the view handling the request (or the first application frame outside a
+  request) and the query's parameters,
+* its plan from ``EXPLAIN QUERY PLAN`` on SQLite or ``EXPLAIN`` elsewhere,
+  run on the same connection right after the query.
+
+``manage.py slow_query_report`` summarizes the log by fingerprint.
+"""
+import hashlib
+import json
+import logging
+import re
+import sys
+import time
+
+from django.conf import settings
+from django.db import DatabaseError, transaction
+from django.utils import timezone
+
+from .instrumentation import current_metrics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_THRESHOLD_MS = 200
+# Parameters beyond this many are summarized in the log, e.g. the ids of a large IN (...)
+MAX_LOGGED_PARAMS = 20
+MAX_LOGGED_PARAM_LENGTH = 200
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'(?<![\w"])-?\d+(?:\.\d+)?\b')
+_PLACEHOLDER = re.compile(r'%s|\?')
+_IN_LIST = re.compile(r'\bIN \(\?(?:, \?)*\)', re.IGNORECASE)
+_VALUES_LIST = re.compile(r'VALUES \([?, ]*\)(?:, \([?, ]*\))+', re.IGNORECASE)
+_SPACE = re.compile(r'\s+')
+
+
+def fingerprint(sql):
+    """``sql`` with literals and parameters replaced by ``?`` and IN lists collapsed"""
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = _PLACEHOLDER.sub('?', sql)
+    sql = _IN_LIST.sub('IN (...)', sql)
+    sql = _VALUES_LIST.sub('VALUES (...)', sql)
+    return _SPACE.sub(' ', sql).strip()
+
+
+def fingerprint_id(normalized):
+    return hashlib.sha1(normalized.encode()).hexdigest()[:12]
+
+
+def _loggable_params(params):
+    if params is None:
+        return None
+    if isinstance(params, dict):
+        params = list(params.items())
+    params = list(params)
+    logged = [
+        value if isinstance(value, (int, float, bool, type(None))) else str(value)[:MAX_LOGGED_PARAM_LENGTH]
+        for value in params[:MAX_LOGGED_PARAMS]
+    ]
+    if len(params) > MAX_LOGGED_PARAMS:
+        logged.append(f'... {len(params) - MAX_LOGGED_PARAMS} more')
+    return logged
+
+
+def _caller():
+    """``module:function`` of the innermost application frame outside apps.core"""
+    frame = sys._getframe(2)
+    while frame is not None:
+        module = frame.f_globals.get('__name__', '')
+        if module.startswith('apps.') and not module.startswith('apps.core.'):
+            return f'{module}:{frame.f_code.co_name}'
+        frame = frame.f_back
+    return None
+
+
+def explain(connection, sql, params):
+    """The query plan of ``sql`` as a list of lines, or None if the database won't explain it"""
+    if sql.split(None, 1)[0].upper() not in ('SELECT', 'WITH'):
+        return None
+    prefix = 'EXPLAIN QUERY PLAN ' if connection.vendor == 'sqlite' else 'EXPLAIN '
+    try:
+        # A savepoint keeps a failed EXPLAIN from breaking the surrounding transaction
+        with transaction.atomic(using=connection.alias, savepoint=connection.in_atomic_block):
+            with connection.cursor() as cursor:
+                # The raw cursor skips the execute wrappers, so the EXPLAIN isn't counted or logged itself
+                cursor.cursor.execute(prefix + sql, params)
+                rows = cursor.cursor.fetchall()
+    except DatabaseError as exc:
+        return [f'EXPLAIN failed: {exc}']
+
+    if connection.vendor != 'sqlite':
+        return [str(row[0]) for row in rows]
+    # SQLite rows are (id, parent, notused, detail); indent each step under its parent
+    depth = {0: -1}
+    lines = []
+    for node_id, parent, _, detail in rows:
+        depth[node_id] = depth.get(parent, -1) + 1
+        lines.append('  ' * depth[node_id] + detail)
+    return lines
+
+
+def log_slow_queries(execute, sql, params, many, context):
+    """Database execute wrapper that logs queries slower than SLOW_QUERY_THRESHOLD_MS"""
+    threshold = getattr(settings, 'SLOW_QUERY_THRESHOLD_MS', DEFAULT_THRESHOLD_MS)
+    if not threshold or threshold < 0:
+        return execute(sql, params, many, context)
+
+    started = time.perf_counter()
+    result = execute(sql, params, many, context)
+    duration_ms = (time.perf_counter() - started) * 1000
+    if duration_ms < threshold:
+        return result
+
+    connection = context['connection']
+    normalized = fingerprint(sql)
+    metrics = current_metrics()
+    entry = {
+        'time': timezone.now().isoformat(),
+        'duration_ms': round(duration_ms, 1),
+        'fingerprint': fingerprint_id(normalized),
+        'normalized': normalized,
+        'sql': sql,
+        'params': None if many else _loggable_params(params),
+        'executemany': many,
+        'database': connection.alias,
+        'view': metrics.view if metrics else None,
+        'caller': _caller(),
+        'plan': None if many else explain(connection, sql, params),
+    }
+    logger.warning(json.dumps(entry, default=str))
+    return result
+
+
+def install(sender=None, connection=None, **kwargs):
+    """connection_created receiver: add the slow-query wrapper to a new connection"""
+    if log_slow_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(log_slow_queries)
+
+
+def read_entries(paths):
+    """Parsed entries from slow-query log files, skipping lines that aren't JSON"""
+    for path in paths:
+        try:
+            with open(path) as handle:
+                for line in handle:
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        continue
+        except FileNotFoundError:
+            continue
+
+
+def summarize(entries, sort='total'):
+    """Group entries by fingerprint; returns dicts sorted by ``sort`` (total, count, max or mean) descending"""
+    groups = {}
+    for entry in entries:
+        group = groups.get(entry['fingerprint'])
+        if group is None:
+            group = groups[entry['fingerprint']] = {
+                'fingerprint': entry['fingerprint'],
+                'normalized': entry['normalized'],
+                'count': 0,
+                'total_ms': 0.0,
+                'max_ms': 0.0,
+                'views': set(),
+                'last_seen': None,
+                'plan': None,
+            }
+        group['count'] += 1
+        group['total_ms'] += entry['duration_ms']
+        group['max_ms'] = max(group['max_ms'], entry['duration_ms'])
+        if entry.get('view') or entry.get('caller'):
+            group['views'].add(entry.get('view') or entry.get('caller'))
+        if group['last_seen'] is None or entry['time'] >= group['last_seen']:
+            # Keep the newest plan, which reflects the current indexes
+            group['last_seen'] = entry['time']
+            group['plan'] = entry.get('plan') or group['plan']
+
+    for group in groups.values():
+        group['mean_ms'] = group['total_ms'] / group['count']
+        group['views'] = sorted(group['views'])
+    return sorted(groups.values(), key=lambda group: group[f'{sort}_ms' if sort != 'count' else 'count'], reverse=True)
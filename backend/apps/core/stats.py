@@ -0,0 +1,24 @@
+"""
+Single-query counters for the *_stats endpoints.
+
+Each endpoint describes its counters as Q conditions and its other figures as
+aggregate expressions; everything is evaluated together in one aggregate()
+call using COUNT(...) FILTER (WHERE ...), which Django emulates with CASE on
+databases without FILTER support.
+"""
+from django.db.models import Count
+
+
+def collect_stats(queryset, counters=None, **aggregates):
+    """
+    Evaluate ``counters`` (name -> Q condition) and ``aggregates`` over ``queryset``
+    in one query. A ``total`` row count is always included and NULL results are
+    returned as 0.
+    """
+    expressions = {'total': Count('pk')}
+    for name, condition in (counters or {}).items():
+        expressions[name] = Count('pk', filter=condition)
+    expressions.update(aggregates)
+
+    results = queryset.aggregate(**expressions)
+    return {name: 0 if value is None else value for name, value in results.items()}
@@ -0,0 +1,85 @@
+"""Identifiers allocated from sequences, and manually entered ones they must skip."""
+import threading
+
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from apps.core import identifiers
+from apps.suppliers.models import Supplier
+
+
+def add_supplier(supplier_id):
+    return Supplier.objects.create(supplier_id=supplier_id, name=f'Supplier {supplier_id}', contact='555')
+
+
+class IdentifierTests(TestCase):
+
+    def test_allocate_continues_from_highest_in_use(self):
+        add_supplier('SUP0007')
+        add_supplier('ACME-1')
+
+        self.assertEqual(identifiers.allocate('supplier', 3), ['SUP0008', 'SUP0009', 'SUP0010'])
+        self.assertEqual(identifiers.allocate('supplier'), ['SUP0011'])
+
+    def test_observe_advances_past_manual_id(self):
+        self.assertEqual(identifiers.allocate('supplier'), ['SUP0001'])
+
+        identifiers.observe('supplier', 'SUP0042')
+        self.assertEqual(identifiers.allocate('supplier'), ['SUP0043'])
+
+        # Lower numbers and other formats never move the sequence back
+        identifiers.observe('supplier', 'SUP0005')
+        identifiers.observe('supplier', 'ACME-99')
+        self.assertEqual(identifiers.allocate('supplier'), ['SUP0044'])
+
+    def test_observe_before_first_allocation_keeps_ids_in_use(self):
+        add_supplier('SUP0010')
+
+        identifiers.observe('supplier', 'SUP0003')
+
+        self.assertEqual(identifiers.allocate('supplier'), ['SUP0011'])
+
+    def test_observe_many_advances_to_highest(self):
+        identifiers.observe_many('supplier', ['SUP0009', 'SUP0120', 'ACME-500', '', None])
+
+        self.assertEqual(identifiers.allocate('supplier'), ['SUP0121'])
+
+    @override_settings(IDENTIFIER_FORMATS={'supplier': {'prefix': 'VEN', 'width': 6}})
+    def test_format_override(self):
+        add_supplier('SUP0050')
+
+        self.assertEqual(identifiers.get_format('supplier')['field'], 'supplier_id')
+        self.assertEqual(identifiers.allocate('supplier', 2), ['VEN000001', 'VEN000002'])
+
+        # Width is a minimum
+        identifiers.observe('supplier', 'VEN1234567')
+        self.assertEqual(identifiers.allocate('supplier'), ['VEN1234568'])
+
+
+class ConcurrentAllocationTests(TransactionTestCase):
+    workers = 8
+    batch = 25
+
+    def setUp(self):
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            self.skipTest('Needs a database file (or server) that separate connections can lock')
+        add_supplier('SUP0100')
+
+    def allocate(self, start, allocated):
+        try:
+            start.wait()
+            allocated.extend(identifiers.allocate('supplier', self.batch))
+        finally:
+            connection.close()
+
+    def test_parallel_allocations_are_unique(self):
+        start = threading.Barrier(self.workers)
+        allocated = []
+        threads = [threading.Thread(target=self.allocate, args=(start, allocated)) for _ in range(self.workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        total = self.workers * self.batch
+        self.assertEqual(sorted(allocated), [f'SUP{number:04d}' for number in range(101, 101 + total)])
@@ -0,0 +1,74 @@
+"""Registries of separate workers sharing METRICS_DIR report combined totals."""
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+
+from apps.core.metrics import ARCHIVE_FILE, Counter, Histogram, Registry
+
+
+class Worker:
+    """A registry with its own metrics, as one gunicorn worker process would have"""
+
+    def __init__(self, pid):
+        self.pid = pid
+        self.registry = Registry()
+        self.requests = Counter('requests_total', 'Requests', ['method'], registry=self.registry)
+        self.latency = Histogram('latency_seconds', 'Latency', buckets=(0.1, 1), registry=self.registry)
+
+    def __getattr__(self, name):
+        # Run registry methods as if in this worker's process
+        method = getattr(self.registry, name)
+
+        def call(*args, **kwargs):
+            with mock.patch('apps.core.metrics.os.getpid', return_value=self.pid):
+                return method(*args, **kwargs)
+        return call
+
+
+class SharedMetricsDirTests(SimpleTestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+        settings = override_settings(METRICS_DIR=directory.name, METRICS_FLUSH_INTERVAL=3600)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def alive(self, *pids):
+        return mock.patch('apps.core.metrics._process_alive', side_effect=lambda pid: pid in pids)
+
+    def test_two_workers_aggregate(self):
+        first, second = Worker(1001), Worker(1002)
+        first.requests.inc(method='GET')
+        first.requests.inc(2, method='POST')
+        first.latency.observe(0.05)
+        second.requests.inc(3, method='GET')
+        second.latency.observe(0.5)
+        first.flush()
+
+        with self.alive(1001, 1002):
+            totals = second.collect()
+        self.assertEqual(totals['requests_total'], {('GET',): 4, ('POST',): 2})
+        self.assertEqual(totals['latency_seconds'][()], {'buckets': [1, 1], 'sum': 0.55, 'count': 2})
+        # Either worker answers the scrape with the same totals
+        with self.alive(1001, 1002):
+            self.assertEqual(first.render(), second.render())
+
+    def test_exited_worker_is_archived_and_still_counted(self):
+        first, second = Worker(1001), Worker(1002)
+        first.requests.inc(5, method='GET')
+        first.flush()
+        second.requests.inc(method='GET')
+
+        with self.alive(1002):
+            totals = second.collect()
+        self.assertEqual(totals['requests_total'], {('GET',): 6})
+        self.assertFalse((self.directory / '1001.json').exists())
+        self.assertTrue((self.directory / ARCHIVE_FILE).exists())
+
+        second.requests.inc(method='GET')
+        with self.alive(1002):
+            self.assertEqual(second.collect()['requests_total'], {('GET',): 7})
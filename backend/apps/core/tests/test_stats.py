@@ -0,0 +1,76 @@
+"""Each *_stats endpoint answers with a single query (see apps.core.stats)."""
+from datetime import date
+from decimal import Decimal
+
+from rest_framework.test import APIClient, APITestCase
+
+from apps.authentication.models import User
+from apps.categories.models import Category
+from apps.employees.models import Employee
+from apps.products.models import Product
+from apps.suppliers.models import Supplier
+
+
+class StatsQueryCountTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('manager', 'manager@example.com', 'password', user_type='admin')
+        tools = Category.objects.create(name='Tools')
+        Category.objects.create(name='Retired', is_active=False)
+        acme = Supplier.objects.create(supplier_id='SUP0001', name='Acme', contact='555')
+        Supplier.objects.create(supplier_id='SUP0002', name='Gone', contact='556', is_active=False)
+        for number, quantity in enumerate([10, 0, 3], start=1):
+            Product.objects.create(
+                code=f'PRD{number:04d}', category=tools, supplier=acme, name=f'Product {number}',
+                buy_price=Decimal('5.00'), sell_price=Decimal('8.00'), price=Decimal('8.00'), quantity=quantity
+            )
+        for number, (user_type, salary) in enumerate([('admin', 5000), ('employee', 3000), ('employee', 2000)], start=1):
+            Employee.objects.create(
+                eid=f'EMP{number:04d}', name=f'Employee {number}', email=f'employee{number}@example.com',
+                gender='other', contact='555', date_of_birth=date(1990, 1, 1), date_of_joining=date(2020, 1, 1),
+                password='x', user_type=user_type, address='Main St', salary=Decimal(salary)
+            )
+
+        client = APIClient()
+        client.force_authenticate(cls.user)
+        product = Product.objects.get(code='PRD0001')
+        response = client.post('/api/sales/', {
+            'customer_name': 'Walk-in',
+            'customer_contact': '555',
+            'discount_percentage': '0',
+            'items': [{'product': product.pk, 'quantity': 2, 'unit_price': '8.00'}],
+        }, format='json')
+        assert response.status_code == 201, response.data
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+
+    def get_stats(self, url):
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_product_stats(self):
+        data = self.get_stats('/api/products/stats/')
+        self.assertEqual(data['total_products'], 3)
+        self.assertEqual(data['out_of_stock'], 1)
+
+    def test_sales_stats(self):
+        data = self.get_stats('/api/sales/stats/')
+        self.assertEqual(data['total_sales'], 1)
+        self.assertEqual(data['today_revenue'], Decimal('16.00'))
+
+    def test_category_stats(self):
+        data = self.get_stats('/api/categories/stats/')
+        self.assertEqual((data['total_categories'], data['active_categories']), (2, 1))
+
+    def test_supplier_stats(self):
+        data = self.get_stats('/api/suppliers/stats/')
+        self.assertEqual((data['total_suppliers'], data['active_suppliers']), (2, 1))
+
+    def test_employee_stats(self):
+        data = self.get_stats('/api/employees/stats/')
+        self.assertEqual((data['total_employees'], data['admin_count']), (3, 1))
+        self.assertEqual(data['salary_statistics']['max_salary'], Decimal('5000'))
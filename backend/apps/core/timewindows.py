@@ -0,0 +1,60 @@
+"""
+Calendar periods as timezone-aware [start, end) datetime ranges.
+
+Filtering with ``created_at__date=...`` wraps the column in a DATE() cast, so
+the database can't use an index on it. Comparing the raw column against the
+local midnights that bound the period gives the same rows and stays
+index-friendly:
+
+    start, end = period_range('week')
+    Sale.objects.filter(created_at__gte=start, created_at__lt=end)
+"""
+from datetime import datetime, time, timedelta
+
+from django.utils import timezone
+
+PERIODS = ('today', 'week', 'month', 'year')
+
+
+def day_start(day, tz=None):
+    """Aware datetime for local midnight at the start of ``day``"""
+    return timezone.make_aware(datetime.combine(day, time.min), tz or timezone.get_current_timezone())
+
+
+def date_range(start_date=None, end_date=None, tz=None):
+    """
+    [start, end) covering the local calendar days from ``start_date`` through
+    ``end_date`` inclusive; either bound may be None to leave that side open.
+    """
+    start = day_start(start_date, tz) if start_date else None
+    end = day_start(end_date + timedelta(days=1), tz) if end_date else None
+    return start, end
+
+
+def period_start_date(period, today=None):
+    """First calendar day of ``period`` (weeks start on Monday)"""
+    today = today or timezone.localdate()
+    if period == 'today':
+        return today
+    if period == 'week':
+        return today - timedelta(days=today.weekday())
+    if period == 'month':
+        return today.replace(day=1)
+    if period == 'year':
+        return today.replace(month=1, day=1)
+    raise ValueError(f"Unknown period '{period}', expected one of: {', '.join(PERIODS)}")
+
+
+def period_range(period, today=None, tz=None):
+    """[start, end) from the start of ``period`` up to the end of today"""
+    today = today or timezone.localdate()
+    return date_range(period_start_date(period, today), today, tz)
+
+
+def filter_range(queryset, field, start=None, end=None):
+    """Apply a [start, end) range to ``field``; None leaves that side open"""
+    if start is not None:
+        queryset = queryset.filter(**{f'{field}__gte': start})
+    if end is not None:
+        queryset = queryset.filter(**{f'{field}__lt': end})
+    return queryset
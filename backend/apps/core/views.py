@@ -0,0 +1,22 @@
+import hmac
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from django.views.decorators.http import require_GET
+
+from .metrics import CONTENT_TYPE, REGISTRY
+
+
+@require_GET
+def metrics_view(request):
+    """
+    Prometheus scrape endpoint. With METRICS_TOKEN set, requests need
+    "Authorization: Bearer <token>"; without it the endpoint is only open when DEBUG is on.
+    """
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    if token:
+        if not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+            return HttpResponseForbidden('Invalid metrics token.')
+    elif not settings.DEBUG:
+        return HttpResponseForbidden('Set METRICS_TOKEN to enable metrics.')
+    return HttpResponse(REGISTRY.render(), content_type=CONTENT_TYPE)
\ No newline at end of file
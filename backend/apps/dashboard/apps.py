@@ -3,4 +3,7 @@ from django.apps import AppConfig
 
 class DashboardConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'apps.dashboard'
\ No newline at end of file
+    name = 'apps.dashboard'
+
+    def ready(self):
+        from . import signals  # noqa: F401
\ No newline at end of file
@@ -0,0 +1,210 @@
+"""
+In-process benchmarks for the API endpoints.
+
+Each endpoint is requested through the DRF test client (no server or network
+involved) against a seeded dataset. After a few warm-up requests we time a
+series of runs for p50/p95 latency and throughput, then make one more request to count SQL
+queries and measure peak Python memory with tracemalloc, which would skew
+the timings. Response caching is switched off so every request does the
+real work, and writes happen in a transaction that is rolled back so the
+dataset stays the same between runs.
+
+Results are plain dicts that can be saved as a JSON baseline and compared
+against later runs with ``find_regressions``.
+"""
+import math
+import time
+import tracemalloc
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.employees.models import Employee
+from apps.products.models import Product
+from apps.sales.models import Sale
+
+DEFAULT_REPEAT = 20
+DEFAULT_WARMUP = 2
+DEFAULT_TOLERANCE = 0.25
+# Timings this close to the baseline are noise, whatever the tolerance
+LATENCY_SLACK_MS = 1.0
+
+NO_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+
+# Sales per bulk upload and invoice numbers per reservation in the batch benchmarks
+BULK_SALES = 100
+RESERVED_INVOICES = 100
+
+
+def _report_range(context):
+    today = timezone.localdate()
+    return {
+        'start_date': str(today - timedelta(days=29)),
+        'end_date': str(today),
+        'page_size': 100,
+    }
+
+
+def _sale_payload(context):
+    product = context['product']
+    return {
+        'customer_name': 'Benchmark Customer',
+        'customer_contact': '9000000000',
+        'discount_percentage': '5',
+        'items': [{'product': product.pk, 'quantity': 1, 'unit_price': str(product.sell_price)}],
+    }
+
+
+def _bulk_payload(context):
+    sale = _sale_payload(context)
+    return [dict(sale, idempotency_key=f'benchmark-{number}') for number in range(BULK_SALES)]
+
+
+# name -> (method, path, query params or JSON body); callables get the benchmark context
+ENDPOINTS = {
+    'dashboard-stats': ('get', '/api/dashboard/stats/', None),
+    'recent-activities': ('get', '/api/dashboard/activities/', None),
+    'inventory-summary': ('get', '/api/dashboard/inventory-summary/', None),
+    'profit-analytics': ('get', '/api/dashboard/profit-analytics/', None),
+    'sales-timeseries': ('get', '/api/dashboard/timeseries/', {'granularity': 'day', 'breakdown': 'category'}),
+    'sales-report': ('get', '/api/sales/report/', _report_range),
+    'sales-stats': ('get', '/api/sales/stats/', None),
+    'sale-list': ('get', '/api/sales/', None),
+    'sale-list-cursor': ('get', '/api/sales/', {'paginate': 'cursor'}),
+    'sale-search': ('get', '/api/sales/', lambda context: {'search': context['customer']}),
+    # Every sale of the year matches: all are ranked before the last page is cut
+    'sale-search-deep': ('get', '/api/sales/', lambda context: {'search': context['sale'].invoice_number[:7], 'page': 'last'}),
+    'sale-detail': ('get', lambda context: f"/api/sales/{context['sale'].pk}/", None),
+    'sale-create': ('post', '/api/sales/', _sale_payload),
+    'sale-bulk': ('post', '/api/sales/bulk/', _bulk_payload),
+    'invoice-reserve': ('post', '/api/sales/invoice-numbers/', {'count': RESERVED_INVOICES, 'store': 'BENCH'}),
+    'product-list': ('get', '/api/products/', None),
+    'product-search': ('get', '/api/products/', lambda context: {'search': context['product'].name.split()[-2]}),
+    'product-stats': ('get', '/api/products/stats/', None),
+    'low-stock-products': ('get', '/api/products/low-stock/', None),
+    'employee-list': ('get', '/api/employees/', None),
+    'employee-stats': ('get', '/api/employees/stats/', None),
+    'employee-search': ('get', '/api/employees/search/', lambda context: {'q': context['employee'].name.split()[0]}),
+    'supplier-list': ('get', '/api/suppliers/', None),
+    'supplier-stats': ('get', '/api/suppliers/stats/', None),
+    'category-list': ('get', '/api/categories/', None),
+    'category-stats': ('get', '/api/categories/stats/', None),
+    'profile': ('get', '/api/auth/profile/', None),
+}
+
+# Rows each request of a batch endpoint handles, for throughput in rows per second
+BATCH_ROWS = {'sale-bulk': BULK_SALES, 'invoice-reserve': RESERVED_INVOICES}
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a non-empty list"""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+def build_context():
+    """Rows the parameterised endpoints refer to; None if the dataset has no sales yet"""
+    sale = Sale.objects.order_by('-pk').first()
+    product = Product.objects.filter(status='active', quantity__gt=0).order_by('-quantity', 'pk').first()
+    employee = Employee.objects.order_by('pk').first()
+    if not (sale and product and employee):
+        return None
+    return {'sale': sale, 'customer': sale.customer_name.split()[-1], 'product': product, 'employee': employee}
+
+
+def _request(client, method, path, data):
+    if method == 'get':
+        return client.get(path, data)
+    # Keep the dataset unchanged between runs
+    with transaction.atomic():
+        response = getattr(client, method)(path, data, format='json')
+        transaction.set_rollback(True)
+    return response
+
+
+def benchmark_endpoint(client, method, path, data, repeat=DEFAULT_REPEAT, warmup=DEFAULT_WARMUP, rows=1):
+    """
+    Latency percentiles, throughput (requests, or ``rows`` per request, per second),
+    query count and peak memory for one endpoint
+    """
+    for _ in range(warmup):
+        response = _request(client, method, path, data)
+        if response.status_code >= 400:
+            raise RuntimeError(f'{method.upper()} {path} returned {response.status_code}')
+
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        _request(client, method, path, data)
+        timings.append((time.perf_counter() - started) * 1000)
+
+    tracemalloc.start()
+    try:
+        with CaptureQueriesContext(connection) as queries:
+            _request(client, method, path, data)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'p50_ms': round(percentile(timings, 0.5), 3),
+        'p95_ms': round(percentile(timings, 0.95), 3),
+        'per_second': round(rows * repeat * 1000 / sum(timings), 1),
+        'queries': len(queries),
+        'peak_memory_kb': round(peak / 1024, 1),
+    }
+
+
+def run_benchmarks(user, names=None, repeat=DEFAULT_REPEAT, warmup=DEFAULT_WARMUP, progress=None):
+    """Benchmark the named endpoints (all by default) as ``user``; returns {name: metrics}"""
+    context = build_context()
+    if context is None:
+        raise RuntimeError('The database needs at least one sale, stocked product and employee to benchmark')
+
+    client = APIClient()
+    client.force_authenticate(user)
+    results = {}
+    with override_settings(CACHES=NO_CACHE):
+        for name in names or ENDPOINTS:
+            method, path, data = ENDPOINTS[name]
+            path = path(context) if callable(path) else path
+            data = data(context) if callable(data) else data
+            results[name] = benchmark_endpoint(
+                client, method, path, data, repeat=repeat, warmup=warmup, rows=BATCH_ROWS.get(name, 1)
+            )
+            if progress:
+                progress(name, results[name])
+    return results
+
+
+def find_regressions(baseline, current, tolerance=DEFAULT_TOLERANCE, query_tolerance=0):
+    """
+    Compare ``{scale: {endpoint: metrics}}`` results against a baseline of the same shape.
+    Latency and memory may grow and throughput drop by ``tolerance`` (a fraction) and
+    query counts grow by ``query_tolerance`` queries; returns a list of human-readable regressions.
+    """
+    regressions = []
+    for scale, endpoints in current.items():
+        for name, metrics in endpoints.items():
+            previous = baseline.get(scale, {}).get(name)
+            if not previous:
+                continue
+            for metric in ('p50_ms', 'p95_ms', 'peak_memory_kb'):
+                limit = previous[metric] * (1 + tolerance)
+                if metric.endswith('_ms'):
+                    limit = max(limit, previous[metric] + LATENCY_SLACK_MS)
+                if metrics[metric] > limit:
+                    regressions.append(
+                        f'scale {scale} {name}: {metric} {metrics[metric]} > {previous[metric]} (+{tolerance:.0%})'
+                    )
+            # Baselines from before throughput was recorded don't have it
+            if 'per_second' in previous and metrics['per_second'] < previous['per_second'] * (1 - tolerance):
+                regressions.append(
+                    f"scale {scale} {name}: per_second {metrics['per_second']} < {previous['per_second']} (-{tolerance:.0%})"
+                )
+            if metrics['queries'] > previous['queries'] + query_tolerance:
+                regressions.append(f"scale {scale} {name}: queries {metrics['queries']} > {previous['queries']}")
+    return regressions
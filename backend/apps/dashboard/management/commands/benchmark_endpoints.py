@@ -0,0 +1,147 @@
+import json
+import os
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.utils import timezone
+from apps.dashboard.benchmarks import (
+    DEFAULT_REPEAT, DEFAULT_TOLERANCE, DEFAULT_WARMUP, ENDPOINTS, find_regressions, run_benchmarks,
+)
+from apps.sales.seed import seed_dataset
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark the API endpoints in-process against seeded datasets, recording p50/p95 latency, '
+        'throughput, query counts and peak memory, and fail on regressions against a JSON baseline'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scales',
+            nargs='+',
+            type=float,
+            default=[1],
+            help='Dataset scales to seed and benchmark, each in a fresh test database (see seed_dataset)',
+        )
+        parser.add_argument('--seed', type=int, default=0, help='Random seed for the datasets')
+        parser.add_argument(
+            '--existing',
+            action='store_true',
+            help='Benchmark the configured database as it is instead of seeding test databases',
+        )
+        parser.add_argument('--endpoints', nargs='+', help=f"Endpoints to run (default: all): {', '.join(ENDPOINTS)}")
+        parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT, help='Timed requests per endpoint')
+        parser.add_argument('--warmup', type=int, default=DEFAULT_WARMUP, help='Untimed requests per endpoint first')
+        parser.add_argument(
+            '--baseline',
+            default='benchmark-baseline.json',
+            help='Baseline file to compare against (or write with --update-baseline)',
+        )
+        parser.add_argument(
+            '--update-baseline',
+            action='store_true',
+            help='Save these results as the new baseline instead of comparing',
+        )
+        parser.add_argument(
+            '--tolerance',
+            type=float,
+            default=DEFAULT_TOLERANCE,
+            help='Allowed relative growth of latency and memory before failing (0.25 = 25%%)',
+        )
+        parser.add_argument(
+            '--query-tolerance',
+            type=int,
+            default=0,
+            help='Allowed growth in SQL queries per request before failing',
+        )
+        parser.add_argument('--output', help='Also write the results to this JSON file')
+
+    def handle(self, *args, **options):
+        unknown = set(options['endpoints'] or []) - set(ENDPOINTS)
+        if unknown:
+            raise CommandError(f"Unknown endpoints: {', '.join(sorted(unknown))}")
+        if options['repeat'] < 1:
+            raise CommandError('--repeat must be at least 1')
+        
+        setup_test_environment()
+        try:
+            if options['existing']:
+                results = {'existing': self.benchmark(options)}
+            else:
+                results = {}
+                for scale in options['scales']:
+                    results[f'{scale:g}'] = self.benchmark_seeded(scale, options)
+        finally:
+            teardown_test_environment()
+        
+        document = {
+            'meta': {
+                'created_at': timezone.now().isoformat(),
+                'database': connection.vendor,
+                'seed': options['seed'],
+                'repeat': options['repeat'],
+            },
+            'results': results,
+        }
+        if options['output']:
+            self.write(options['output'], document)
+        
+        if options['update_baseline']:
+            self.write(options['baseline'], document)
+            self.stdout.write(self.style.SUCCESS(f"Baseline written to {options['baseline']}"))
+            return
+        
+        if not os.path.exists(options['baseline']):
+            self.stdout.write(self.style.WARNING(
+                f"No baseline at {options['baseline']}; run with --update-baseline to create one"
+            ))
+            return
+        
+        with open(options['baseline']) as stream:
+            baseline = json.load(stream)['results']
+        regressions = find_regressions(baseline, results, options['tolerance'], options['query_tolerance'])
+        if regressions:
+            for regression in regressions:
+                self.stdout.write(self.style.ERROR(regression))
+            raise CommandError(f'{len(regressions)} regression(s) against {options["baseline"]}')
+        self.stdout.write(self.style.SUCCESS(f"No regressions against {options['baseline']}"))
+
+    def benchmark_seeded(self, scale, options):
+        self.stdout.write(f'Seeding scale {scale:g} into a test database')
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            seed_dataset(scale=scale, seed=options['seed'])
+            get_user_model().objects.create_superuser('benchmark', 'benchmark@example.com', None, user_type='admin')
+            return self.benchmark(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    def benchmark(self, options):
+        user = get_user_model().objects.filter(is_superuser=True).order_by('pk').first()
+        if user is None:
+            raise CommandError('Benchmarks run as a superuser; create one first')
+        
+        def progress(name, metrics):
+            self.stdout.write(
+                f"  {name:<22} p50 {metrics['p50_ms']:>9.2f} ms  p95 {metrics['p95_ms']:>9.2f} ms  "
+                f"{metrics['per_second']:>9.1f}/s  {metrics['queries']:>3} queries  {metrics['peak_memory_kb']:>9.1f} KiB"
+            )
+        
+        try:
+            return run_benchmarks(
+                user,
+                names=options['endpoints'],
+                repeat=options['repeat'],
+                warmup=options['warmup'],
+                progress=progress,
+            )
+        except RuntimeError as exc:
+            raise CommandError(exc)
+
+    def write(self, path, document):
+        with open(path, 'w') as stream:
+            json.dump(document, stream, indent=2)
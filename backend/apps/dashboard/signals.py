@@ -0,0 +1,20 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from apps.core.cache import invalidate
+from apps.employees.models import Employee
+from apps.suppliers.models import Supplier
+from apps.categories.models import Category
+from apps.products.models import Product
+from apps.sales.models import Sale, SaleItem
+
+# Every model the dashboard endpoints read from
+DASHBOARD_SOURCES = [Sale, SaleItem, Product, Category, Supplier, Employee]
+
+@receiver(post_save)
+@receiver(post_delete)
+def invalidate_dashboard_cache(sender, **kwargs):
+    """Drop cached dashboard responses whenever their source data changes"""
+    if sender in DASHBOARD_SOURCES:
+        # Wait for the commit so a concurrent request can't re-cache the old data
+        transaction.on_commit(lambda: invalidate('dashboard'))
\ No newline at end of file
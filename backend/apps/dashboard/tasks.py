@@ -0,0 +1,4 @@
+from apps.jobs.queue import register
+from .views import build_profit_analytics
+
+register('dashboard.profit_analytics', build_profit_analytics)
\ No newline at end of file
@@ -6,4 +6,5 @@ urlpatterns = [
     path('activities/', views.recent_activities, name='recent-activities'),
     path('inventory-summary/', views.inventory_summary, name='inventory-summary'),
     path('profit-analytics/', views.profit_analytics, name='profit-analytics'),
+    path('timeseries/', views.sales_timeseries_view, name='sales-timeseries'),
 ]
\ No newline at end of file
@@ -1,70 +1,41 @@
 from rest_framework.decorators import api_view
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
-from django.db.models import Sum, Count, Avg, F, Q
+from django.db.models import Sum, Count, Avg, F
 from django.utils import timezone
 from datetime import datetime, timedelta
+from apps.core.cache import cache_response
+from apps.core.timewindows import date_range, day_start
 from apps.employees.models import Employee
+from apps.jobs.views import enqueue_request, wants_async
 from apps.suppliers.models import Supplier
 from apps.categories.models import Category
 from apps.products.models import Product
-from apps.sales.models import Sale, SaleItem
+from apps.products.lowstock import low_stock
+from apps.products.valuation import category_totals, inventory_totals
+from apps.sales.models import Sale, SaleItem, DailySalesRollup
+from apps.sales.rollup import period_totals
+from apps.sales.timeseries import BREAKDOWNS, GRANULARITIES, sales_timeseries
 
 @api_view(['GET'])
+@cache_response('dashboard-stats', timeout=30)
 def dashboard_stats(request):
     # Basic counts
     total_employees = Employee.objects.count()
     total_suppliers = Supplier.objects.count()
     total_categories = Category.objects.count()
-    total_products = Product.objects.count()
-    total_sales = Sale.objects.count()
     
-    # Revenue and profit calculations
-    revenue_stats = Sale.objects.aggregate(
-        total_revenue=Sum('net_amount'),
-        total_profit=Sum('total_profit'),
-        total_cost=Sum('total_cost')
-    )
-    
-    # Today's stats
-    today = timezone.now().date()
-    today_stats = Sale.objects.filter(created_at__date=today).aggregate(
-        today_sales=Count('id'),
-        today_revenue=Sum('net_amount'),
-        today_profit=Sum('total_profit'),
-        today_cost=Sum('total_cost')
-    )
+    # Inventory totals are kept per category as products change
+    inventory = inventory_totals()
+    total_products = inventory['product_count']
     
-    # This week's stats
-    week_start = today - timedelta(days=today.weekday())
-    week_stats = Sale.objects.filter(created_at__date__gte=week_start).aggregate(
-        week_sales=Count('id'),
-        week_revenue=Sum('net_amount'),
-        week_profit=Sum('total_profit'),
-        week_cost=Sum('total_cost')
-    )
-    
-    # This month's stats
+    # Revenue, profit and cost for every period come from the daily rollup
+    today = timezone.localdate()
     month_start = today.replace(day=1)
-    month_stats = Sale.objects.filter(created_at__date__gte=month_start).aggregate(
-        month_sales=Count('id'),
-        month_revenue=Sum('net_amount'),
-        month_profit=Sum('total_profit'),
-        month_cost=Sum('total_cost')
-    )
-    
-    # Inventory analytics - calculate using database fields
-    inventory_stats = Product.objects.aggregate(
-        inventory_value_cost=Sum(F('buy_price') * F('quantity')),
-        inventory_value_sell=Sum(F('sell_price') * F('quantity')),
-        potential_profit=Sum((F('sell_price') - F('buy_price')) * F('quantity')),
-        avg_profit_margin=Avg((F('sell_price') - F('buy_price')) / F('buy_price') * 100)
-    )
+    totals = period_totals(today)
     
     # Inventory alerts
-    low_stock_count = Product.objects.filter(
-        quantity__lte=10,
-        status='active'
-    ).count()
+    low_stock_count = low_stock().count()
     
     out_of_stock_count = Product.objects.filter(
         quantity=0,
@@ -73,8 +44,10 @@ def dashboard_stats(request):
     
     # Top selling products by profit (last 30 days)
     thirty_days_ago = timezone.now() - timedelta(days=30)
+    # Filtering items through a Sale subquery lets the planner start from the created_at index
+    recent_sales_window = Sale.objects.filter(created_at__gte=thirty_days_ago).values('id')
     top_profit_products = SaleItem.objects.filter(
-        sale__created_at__gte=thirty_days_ago
+        sale__in=recent_sales_window
     ).values(
         'product__name', 'product__code'
     ).annotate(
@@ -84,26 +57,20 @@ def dashboard_stats(request):
     ).order_by('-total_profit')[:5]
     
     # Sales trend with profit (last 7 days)
-    recent_sales = []
-    for i in range(7):
-        date = today - timedelta(days=i)
-        daily_stats = Sale.objects.filter(created_at__date=date).aggregate(
-            daily_sales=Count('id'),
-            daily_revenue=Sum('net_amount'),
-            daily_profit=Sum('total_profit'),
-            daily_cost=Sum('total_cost')
-        )
-        recent_sales.append({
-            'date': date.strftime('%Y-%m-%d'),
-            'sales': daily_stats['daily_sales'] or 0,
-            'revenue': float(daily_stats['daily_revenue'] or 0),
-            'profit': float(daily_stats['daily_profit'] or 0),
-            'cost': float(daily_stats['daily_cost'] or 0)
-        })
+    recent_sales = [
+        {
+            'date': point['bucket'][:10],
+            'sales': point['count'],
+            'revenue': point['revenue'],
+            'profit': point['profit'],
+            'cost': point['cost']
+        }
+        for point in sales_timeseries(*date_range(today - timedelta(days=6), today))['series']
+    ]
     
     # Category profit distribution
     category_profits = SaleItem.objects.filter(
-        sale__created_at__gte=thirty_days_ago
+        sale__in=recent_sales_window
     ).values(
         'product__category__name'
     ).annotate(
@@ -115,7 +82,7 @@ def dashboard_stats(request):
     # Employee performance by profit
     employee_performance = Sale.objects.filter(
         created_by__isnull=False,
-        created_at__date__gte=month_start
+        created_at__gte=day_start(month_start)
     ).values(
         'created_by__username', 'created_by__first_name', 'created_by__last_name'
     ).annotate(
@@ -127,8 +94,8 @@ def dashboard_stats(request):
     
     # Calculate profit margins
     total_profit_margin = 0
-    if revenue_stats['total_cost'] and revenue_stats['total_cost'] > 0:
-        total_profit_margin = (revenue_stats['total_profit'] / revenue_stats['total_cost']) * 100
+    if totals['total']['total_cost'] > 0:
+        total_profit_margin = (totals['total']['total_profit'] / totals['total']['total_cost']) * 100
     
     return Response({
         'overview': {
@@ -136,42 +103,42 @@ def dashboard_stats(request):
             'total_suppliers': total_suppliers,
             'total_categories': total_categories,
             'total_products': total_products,
-            'total_sales': total_sales,
+            'total_sales': totals['total']['sales_count'],
         },
         'revenue': {
-            'total_revenue': float(revenue_stats['total_revenue'] or 0),
-            'today_revenue': float(today_stats['today_revenue'] or 0),
-            'week_revenue': float(week_stats['week_revenue'] or 0),
-            'month_revenue': float(month_stats['month_revenue'] or 0),
+            'total_revenue': float(totals['total']['net_amount']),
+            'today_revenue': float(totals['today']['net_amount']),
+            'week_revenue': float(totals['week']['net_amount']),
+            'month_revenue': float(totals['month']['net_amount']),
         },
         'profit': {
-            'total_profit': float(revenue_stats['total_profit'] or 0),
-            'today_profit': float(today_stats['today_profit'] or 0),
-            'week_profit': float(week_stats['week_profit'] or 0),
-            'month_profit': float(month_stats['month_profit'] or 0),
+            'total_profit': float(totals['total']['total_profit']),
+            'today_profit': float(totals['today']['total_profit']),
+            'week_profit': float(totals['week']['total_profit']),
+            'month_profit': float(totals['month']['total_profit']),
             'profit_margin': float(total_profit_margin),
         },
         'cost': {
-            'total_cost': float(revenue_stats['total_cost'] or 0),
-            'today_cost': float(today_stats['today_cost'] or 0),
-            'week_cost': float(week_stats['week_cost'] or 0),
-            'month_cost': float(month_stats['month_cost'] or 0),
+            'total_cost': float(totals['total']['total_cost']),
+            'today_cost': float(totals['today']['total_cost']),
+            'week_cost': float(totals['week']['total_cost']),
+            'month_cost': float(totals['month']['total_cost']),
         },
         'sales_stats': {
-            'today_sales': today_stats['today_sales'] or 0,
-            'week_sales': week_stats['week_sales'] or 0,
-            'month_sales': month_stats['month_sales'] or 0,
+            'today_sales': totals['today']['sales_count'],
+            'week_sales': totals['week']['sales_count'],
+            'month_sales': totals['month']['sales_count'],
         },
         'inventory': {
-            'value_cost': float(inventory_stats['inventory_value_cost'] or 0),
-            'value_sell': float(inventory_stats['inventory_value_sell'] or 0),
-            'potential_profit': float(inventory_stats['potential_profit'] or 0),
-            'avg_profit_margin': float(inventory_stats['avg_profit_margin'] or 0),
+            'value_cost': float(inventory['value_cost']),
+            'value_sell': float(inventory['value_sell']),
+            'potential_profit': float(inventory['potential_profit']),
+            'avg_profit_margin': float(inventory['avg_profit_margin']),
             'low_stock_count': low_stock_count,
             'out_of_stock_count': out_of_stock_count,
         },
         'charts': {
-            'recent_sales': list(reversed(recent_sales)),
+            'recent_sales': recent_sales,
             'top_profit_products': list(top_profit_products),
             'category_profits': list(category_profits),
             'employee_performance': list(employee_performance)
@@ -179,6 +146,7 @@ def dashboard_stats(request):
     })
 
 @api_view(['GET'])
+@cache_response('recent-activities', timeout=15)
 def recent_activities(request):
     # Get recent sales
     recent_sales = Sale.objects.select_related('created_by').order_by('-created_at')[:15]
@@ -222,87 +190,92 @@ def recent_activities(request):
     return Response(activities[:20])
 
 @api_view(['GET'])
+@cache_response('inventory-summary', timeout=60)
 def inventory_summary(request):
-    # Product statistics with profit analysis - calculate using database fields
-    product_stats = Product.objects.aggregate(
-        total_products=Count('id'),
-        active_products=Count('id', filter=Q(status='active')),
-        total_inventory_value_cost=Sum(F('buy_price') * F('quantity')),
-        total_inventory_value_sell=Sum(F('sell_price') * F('quantity')),
-        total_potential_profit=Sum((F('sell_price') - F('buy_price')) * F('quantity')),
-        avg_profit_margin=Avg((F('sell_price') - F('buy_price')) / F('buy_price') * 100)
-    )
+    # Product statistics with profit analysis, from the per-category valuation rows
+    product_stats = inventory_totals()
     
     # Low stock products with profit info - use database fields
-    low_stock_products = Product.objects.filter(
-        quantity__lte=10,
-        status='active'
-    ).annotate(
+    low_stock_products = low_stock().annotate(
         profit_per_unit=F('sell_price') - F('buy_price')
     ).values(
-        'name', 'code', 'quantity', 'buy_price', 'sell_price', 'profit_per_unit'
+        'name', 'code', 'quantity', 'reorder_point', 'buy_price', 'sell_price', 'profit_per_unit'
     ).order_by('quantity')[:10]
     
-    # Category-wise inventory with profit analysis - use database fields
-    category_inventory = Product.objects.values(
-        'category__name'
-    ).annotate(
-        total_products=Count('id'),
-        total_quantity=Sum('quantity'),
-        total_value_cost=Sum(F('buy_price') * F('quantity')),
-        total_value_sell=Sum(F('sell_price') * F('quantity')),
-        potential_profit=Sum((F('sell_price') - F('buy_price')) * F('quantity'))
-    ).order_by('-potential_profit')
+    # Category-wise inventory with profit analysis
+    category_inventory = [
+        {
+            'category__name': row['category__name'],
+            'total_products': row['product_count'],
+            'total_quantity': row['total_quantity'],
+            'total_value_cost': row['value_cost'],
+            'total_value_sell': row['value_sell'],
+            'potential_profit': row['potential_profit'],
+        }
+        for row in category_totals()
+    ]
     
     return Response({
         'product_statistics': {
-            'total_products': product_stats['total_products'],
-            'active_products': product_stats['active_products'],
-            'inventory_value_cost': float(product_stats['total_inventory_value_cost'] or 0),
-            'inventory_value_sell': float(product_stats['total_inventory_value_sell'] or 0),
-            'potential_profit': float(product_stats['total_potential_profit'] or 0),
-            'avg_profit_margin': float(product_stats['avg_profit_margin'] or 0)
+            'total_products': product_stats['product_count'],
+            'active_products': product_stats['active_count'],
+            'inventory_value_cost': float(product_stats['value_cost']),
+            'inventory_value_sell': float(product_stats['value_sell']),
+            'potential_profit': float(product_stats['potential_profit']),
+            'avg_profit_margin': float(product_stats['avg_profit_margin'])
         },
         'low_stock_products': list(low_stock_products),
-        'category_inventory': list(category_inventory)
+        'category_inventory': category_inventory
     })
 
 @api_view(['GET'])
+@cache_response('profit-analytics', timeout=120)
 def profit_analytics(request):
-    """Detailed profit analytics endpoint"""
+    """Detailed profit analytics endpoint; ?async=true runs it as a background job to poll"""
+    days = request.GET.get('days', '30')
+    if not days.isdigit():
+        raise ValidationError({'days': 'Must be a non-negative integer.'})
     
+    if wants_async(request):
+        return enqueue_request(request, 'dashboard.profit_analytics')
+    return Response(build_profit_analytics(request.GET))
+
+def build_profit_analytics(params):
+    """Profit analytics for the given query parameters; also run as the 'dashboard.profit_analytics' job"""
     # Date range filter
-    days = int(request.GET.get('days', 30))
+    days = int(params.get('days', 30))
     start_date = timezone.now() - timedelta(days=days)
+    sales_window = Sale.objects.filter(created_at__gte=start_date).values('id')
     
-    # Daily profit data
-    daily_profits = Sale.objects.filter(
-        created_at__gte=start_date
-    ).extra(
-        select={'day': 'date(created_at)'}
-    ).values('day').annotate(
-        daily_profit=Sum('total_profit'),
-        daily_revenue=Sum('net_amount'),
-        daily_cost=Sum('total_cost'),
-        sales_count=Count('id')
+    # Daily profit data from the rollup table
+    daily_profits = DailySalesRollup.objects.filter(
+        date__gte=timezone.localdate(start_date)
+    ).annotate(
+        day=F('date'),
+        daily_profit=F('total_profit'),
+        daily_revenue=F('net_amount'),
+        daily_cost=F('total_cost')
+    ).values(
+        'day', 'daily_profit', 'daily_revenue', 'daily_cost', 'sales_count'
     ).order_by('day')
     
     # Product profit analysis
     product_profits = SaleItem.objects.filter(
-        sale__created_at__gte=start_date
+        sale__in=sales_window
     ).values(
         'product__name', 'product__code', 'product__category__name'
     ).annotate(
+        # Declared before total_cost so F('total_cost') still refers to the item field
+        avg_profit_margin=Avg(F('profit') / F('total_cost') * 100),
         total_profit=Sum('profit'),
         total_revenue=Sum('total_price'),
         total_cost=Sum('total_cost'),
-        quantity_sold=Sum('quantity'),
-        avg_profit_margin=Avg(F('profit') / F('total_cost') * 100)
+        quantity_sold=Sum('quantity')
     ).order_by('-total_profit')[:20]
     
     # Category profit analysis
     category_profits = SaleItem.objects.filter(
-        sale__created_at__gte=start_date
+        sale__in=sales_window
     ).values(
         'product__category__name'
     ).annotate(
@@ -325,10 +298,56 @@ def profit_analytics(request):
         avg_profit_per_sale=Avg('total_profit')
     ).order_by('-employee_total_profit')
     
-    return Response({
+    return {
         'daily_profits': list(daily_profits),
         'product_profits': list(product_profits),
         'category_profits': list(category_profits),
         'employee_profits': list(employee_profits),
         'period_days': days
-    })
\ No newline at end of file
+    }
+
+@api_view(['GET'])
+@cache_response('dashboard-timeseries', timeout=60)
+def sales_timeseries_view(request):
+    """
+    Revenue, cost, profit and sale-count series for charts.
+
+    ?granularity=hour|day|week|month (default day); ?start_date= and ?end_date=
+    (YYYY-MM-DD, inclusive) or ?days=N ending today (default 30);
+    ?breakdown=category|supplier|employee adds a series for each of the top
+    ?limit= groups (default 10) by revenue.
+    """
+    granularity = request.GET.get('granularity', 'day')
+    if granularity not in GRANULARITIES:
+        raise ValidationError({'granularity': f"Use one of: {', '.join(GRANULARITIES)}."})
+    
+    breakdown = request.GET.get('breakdown') or None
+    if breakdown is not None and breakdown not in BREAKDOWNS:
+        raise ValidationError({'breakdown': f"Use one of: {', '.join(BREAKDOWNS)}."})
+    
+    limit = request.GET.get('limit', '10')
+    if not limit.isdigit() or int(limit) < 1:
+        raise ValidationError({'limit': 'Must be a positive integer.'})
+    
+    dates = {}
+    for param in ('start_date', 'end_date'):
+        value = request.GET.get(param)
+        if value:
+            try:
+                dates[param] = datetime.strptime(value, '%Y-%m-%d').date()
+            except ValueError:
+                raise ValidationError({param: 'Use the YYYY-MM-DD format.'})
+    
+    days = request.GET.get('days', '30')
+    if not days.isdigit() or int(days) < 1:
+        raise ValidationError({'days': 'Must be a positive integer.'})
+    end_date = dates.get('end_date') or timezone.localdate()
+    start_date = dates.get('start_date') or end_date - timedelta(days=int(days) - 1)
+    if start_date > end_date:
+        raise ValidationError({'start_date': 'Must not be after end_date.'})
+    
+    try:
+        data = sales_timeseries(*date_range(start_date, end_date), granularity, breakdown, int(limit))
+    except ValueError as exc:
+        raise ValidationError({'granularity': str(exc)})
+    return Response(data)
\ No newline at end of file
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-18 18:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='employee',
+            index=models.Index(fields=['created_at', 'id'], name='employee_created_at_id_idx'),
+        ),
+    ]
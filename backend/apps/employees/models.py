@@ -32,6 +32,10 @@ class Employee(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Keyset pagination walks (created_at, id)
+            models.Index(fields=['created_at', 'id'], name='employee_created_at_id_idx'),
+        ]
         
     def __str__(self):
         return f"{self.eid} - {self.name}"
\ No newline at end of file
@@ -1,8 +1,7 @@
 from rest_framework import serializers
 from django.contrib.auth.hashers import make_password
 from .models import Employee
-import random
-import string
+from apps.core import identifiers
 
 class EmployeeSerializer(serializers.ModelSerializer):
     eid = serializers.CharField(required=False, allow_blank=True)  # Make EID optional for auto-generation
@@ -48,17 +47,15 @@ class EmployeeSerializer(serializers.ModelSerializer):
         return value
     
     def generate_employee_id(self):
-        """Generate a unique employee ID"""
-        while True:
-            # Generate EID in format: EMP + 4 random digits
-            eid = 'EMP' + ''.join(random.choices(string.digits, k=4))
-            if not Employee.objects.filter(eid=eid).exists():
-                return eid
+        """Generate a unique employee ID (EMP0001, EMP0002, ...)"""
+        return identifiers.allocate('employee')[0]
     
     def create(self, validated_data):
         # Generate EID if not provided or empty
         if not validated_data.get('eid'):
             validated_data['eid'] = self.generate_employee_id()
+        else:
+            identifiers.observe('employee', validated_data['eid'])
         
         # Hash password before saving
         if 'password' in validated_data:
@@ -1,13 +1,16 @@
 from rest_framework import generics, filters, status
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
-from rest_framework.pagination import PageNumberPagination
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db.models import Sum, Count, Q
+from django.db.models import Sum, Avg, Min, Max, Q
+from apps.core.pagination import PageNumberOrCursorPagination
+from apps.core.stats import collect_stats
+from apps.search.backends import search
+from apps.search.filters import FullTextSearchFilter
 from .models import Employee
 from .serializers import EmployeeSerializer, EmployeeListSerializer
 
-class CustomPagination(PageNumberPagination):
+class CustomPagination(PageNumberOrCursorPagination):
     page_size = 10
     page_size_query_param = 'page_size'
     max_page_size = 100
@@ -16,11 +19,12 @@ class EmployeeListCreateView(generics.ListCreateAPIView):
     queryset = Employee.objects.all()
     serializer_class = EmployeeSerializer
     pagination_class = CustomPagination
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, FullTextSearchFilter]
+    search_entity = 'employee'
     search_fields = ['name', 'email', 'contact', 'eid']
     filterset_fields = ['user_type', 'gender', 'is_active']
     ordering_fields = ['name', 'created_at', 'salary', 'date_of_joining']
-    ordering = ['-created_at']
+    ordering = ['-created_at', '-id']
 
     def get_serializer_class(self):
         if self.request.method == 'GET':
@@ -48,31 +52,38 @@ class EmployeeDetailView(generics.RetrieveUpdateDestroyAPIView):
 
 @api_view(['GET'])
 def employee_stats(request):
-    total_employees = Employee.objects.count()
-    active_employees = Employee.objects.filter(is_active=True).count()
-    admin_count = Employee.objects.filter(user_type='admin').count()
+    # Counts per user type double as the department distribution
+    counters = {user_type: Q(user_type=user_type) for user_type, _ in Employee.USER_TYPE_CHOICES}
+    counters['active'] = Q(is_active=True)
     
-    # Salary statistics
-    salary_stats = Employee.objects.aggregate(
-        avg_salary=Sum('salary') / Count('salary') if Count('salary') > 0 else 0,
+    stats = collect_stats(
+        Employee.objects.all(),
+        counters=counters,
+        avg_salary=Avg('salary'),
         total_salary_cost=Sum('salary'),
-        min_salary=Employee.objects.order_by('salary').first().salary if Employee.objects.exists() else 0,
-        max_salary=Employee.objects.order_by('-salary').first().salary if Employee.objects.exists() else 0
+        min_salary=Min('salary'),
+        max_salary=Max('salary')
     )
     
-    # Department distribution
-    department_stats = Employee.objects.values('user_type').annotate(
-        count=Count('id')
-    ).order_by('user_type')
+    department_stats = [
+        {'user_type': user_type, 'count': stats[user_type]}
+        for user_type in sorted(user_type for user_type, _ in Employee.USER_TYPE_CHOICES)
+        if stats[user_type]
+    ]
     
     return Response({
-        'total_employees': total_employees,
-        'active_employees': active_employees,
-        'inactive_employees': total_employees - active_employees,
-        'admin_count': admin_count,
-        'employee_count': total_employees - admin_count,
-        'salary_statistics': salary_stats,
-        'department_distribution': list(department_stats)
+        'total_employees': stats['total'],
+        'active_employees': stats['active'],
+        'inactive_employees': stats['total'] - stats['active'],
+        'admin_count': stats['admin'],
+        'employee_count': stats['total'] - stats['admin'],
+        'salary_statistics': {
+            'avg_salary': stats['avg_salary'],
+            'total_salary_cost': stats['total_salary_cost'],
+            'min_salary': stats['min_salary'],
+            'max_salary': stats['max_salary']
+        },
+        'department_distribution': department_stats
     })
 
 @api_view(['GET'])
@@ -81,12 +92,16 @@ def employee_search(request):
     if not query:
         return Response({'results': []})
     
-    employees = Employee.objects.filter(
-        Q(name__icontains=query) |
-        Q(email__icontains=query) |
-        Q(eid__icontains=query) |
-        Q(contact__icontains=query)
-    )[:10]  # Limit to 10 results
+    employees = search(Employee.objects.all(), 'employee', query)
+    if employees is None:
+        # Query too short for the search index
+        employees = Employee.objects.filter(
+            Q(name__icontains=query) |
+            Q(email__icontains=query) |
+            Q(eid__icontains=query) |
+            Q(contact__icontains=query)
+        )
+    employees = employees[:10]  # Limit to 10 results
     
     serializer = EmployeeListSerializer(employees, many=True)
     return Response({'results': serializer.data})
\ No newline at end of file
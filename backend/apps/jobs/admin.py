@@ -0,0 +1,12 @@
+from django.contrib import admin
+from .models import Job
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'kind', 'status', 'attempts', 'created_by', 'created_at', 'finished_at']
+    list_filter = ['status', 'kind', 'created_at']
+    list_select_related = ['created_by']
+    readonly_fields = [
+        'kind', 'params', 'status', 'attempts', 'max_attempts', 'run_after', 'locked_by', 'locked_at',
+        'result', 'error', 'created_by', 'created_at', 'started_at', 'finished_at'
+    ]
\ No newline at end of file
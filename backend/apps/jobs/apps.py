@@ -0,0 +1,12 @@
+from django.apps import AppConfig
+
+
+class JobsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.jobs'
+
+    def ready(self):
+        from django.utils.module_loading import autodiscover_modules
+
+        # Each app registers its job functions in its tasks module
+        autodiscover_modules('tasks')
@@ -0,0 +1,66 @@
+import signal
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from apps.jobs import queue
+
+# Seconds between looking for abandoned jobs and between pruning old ones
+MAINTENANCE_INTERVAL = 60
+PRUNE_INTERVAL = 3600
+
+
+class Command(BaseCommand):
+    help = 'Run queued background jobs until stopped (SIGTERM or Ctrl-C finishes the current job first)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=None,
+            help='Seconds to wait when the queue is empty (default: JOBS_POLL_INTERVAL)',
+        )
+        parser.add_argument('--once', action='store_true', help='Exit as soon as the queue is empty')
+        parser.add_argument('--max-jobs', type=int, default=None, help='Exit after running this many jobs')
+
+    def handle(self, *args, **options):
+        poll_interval = options['poll_interval'] or getattr(settings, 'JOBS_POLL_INTERVAL', 1)
+        worker = queue.worker_name()
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        self.stdout.write(f'Worker {worker} waiting for jobs')
+        processed = 0
+        last_maintenance = last_prune = 0
+        while not self.stopping:
+            # Long-running processes have to drop broken or expired connections themselves
+            close_old_connections()
+            now = time.monotonic()
+            if now - last_maintenance >= MAINTENANCE_INTERVAL:
+                last_maintenance = now
+                if queue.requeue_abandoned():
+                    self.stdout.write('Requeued or failed jobs abandoned by a stopped worker')
+            if now - last_prune >= PRUNE_INTERVAL:
+                last_prune = now
+                queue.prune()
+
+            job = queue.claim(worker)
+            if job is None:
+                if options['once']:
+                    break
+                time.sleep(poll_interval)
+                continue
+
+            self.stdout.write(f'Running job {job.pk} ({job.kind}), attempt {job.attempts} of {job.max_attempts}')
+            succeeded = queue.run(job)
+            self.stdout.write(f"Job {job.pk} {'succeeded' if succeeded else 'failed'}")
+            processed += 1
+            if options['max_jobs'] and processed >= options['max_jobs']:
+                break
+
+        self.stdout.write(f'Worker {worker} stopped after {processed} job(s)')
+
+    def stop(self, signum, frame):
+        self.stopping = True
\ No newline at end of file
@@ -0,0 +1,43 @@
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
+from rest_framework.utils.encoders import JSONEncoder
+
+class Job(models.Model):
+    """
+    A unit of background work, claimed and run by manage.py run_worker
+    (see apps.jobs.queue)
+    """
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('succeeded', 'Succeeded'),
+        ('failed', 'Failed'),
+    ]
+    
+    kind = models.CharField(max_length=100)  # Name the job function is registered under
+    params = models.JSONField(default=dict)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=100, blank=True)  # host:pid of the worker running it
+    locked_at = models.DateTimeField(null=True, blank=True)
+    # Encoded like API responses, so a stored report reads the same as the synchronous one
+    result = models.JSONField(null=True, blank=True, encoder=JSONEncoder)
+    error = models.TextField(blank=True)
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='jobs')
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            # Workers only look at queued jobs, so the index stays small as finished jobs pile up
+            models.Index(fields=['run_after', 'id'], condition=models.Q(status='queued'), name='job_queued_idx'),
+            models.Index(fields=['status', 'finished_at'], name='job_status_finished_at_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.kind} #{self.pk} ({self.status})"
\ No newline at end of file
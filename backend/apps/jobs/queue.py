@@ -0,0 +1,233 @@
+"""
+Background jobs stored in the database, without a broker.
+
+Code registers a function under a name in its app's ``tasks`` module and
+queues calls to it with enqueue():
+
+    register('sales.report', build_sales_report)
+    job = enqueue('sales.report', {'start_date': '2026-01-01'}, user=request.user)
+
+``manage.py run_worker`` claims queued jobs one at a time and stores the
+function's return value (anything JSON-serializable) as the job's result.
+On PostgreSQL a job is claimed with SELECT ... FOR UPDATE SKIP LOCKED, so
+any number of workers share the queue without waiting on each other. On
+SQLite, which has no row locks but serializes writers, a worker claims a
+job with a conditional UPDATE and moves on to the next candidate if
+another worker got there first.
+
+A job that raises is retried with exponential backoff until it has run
+``max_attempts`` times. While a job runs, a heartbeat thread renews its
+lease (``JOBS_LEASE_TIMEOUT``) a few times per lease period, so a job can
+run longer than the lease; one whose worker died stops being renewed and is
+queued again once the lease runs out. Results are only stored while the
+worker still holds the job, so a worker that lost its lease (e.g. it was
+paused past it and the job was requeued) can't overwrite the new attempt.
+"""
+import logging
+import os
+import random
+import socket
+import threading
+import time
+import traceback
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DatabaseError, connections, router, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from apps.core.metrics import Counter, Histogram
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+JOBS_PROCESSED = Counter('jobs_processed_total', 'Background jobs run by workers, by kind and result', ['kind', 'result'])
+JOB_DURATION = Histogram(
+    'job_duration_seconds', 'Background job run time', ['kind'],
+    buckets=(0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+)
+
+DEFAULT_MAX_ATTEMPTS = 3
+DEFAULT_RETRY_BACKOFF = 10  # Seconds before the first retry; doubles with each attempt
+MAX_RETRY_BACKOFF = 3600
+DEFAULT_LEASE_TIMEOUT = 900
+# A running job's lease is renewed this many times per JOBS_LEASE_TIMEOUT
+HEARTBEATS_PER_LEASE = 3
+# Queued jobs a SQLite worker tries to claim before concluding the others took them all
+CLAIM_CANDIDATES = 10
+
+TASKS = {}
+
+
+def register(name, func):
+    """Make ``func(params)`` runnable as jobs of kind ``name``"""
+    if TASKS.get(name, func) is not func:
+        raise ValueError(f"A job function is already registered as '{name}'")
+    TASKS[name] = func
+    return func
+
+
+def enqueue(kind, params=None, user=None, max_attempts=None, delay=None):
+    """Queue a call to the function registered as ``kind``; returns the Job"""
+    if kind not in TASKS:
+        raise ValueError(f"No job function registered as '{kind}'")
+    return Job.objects.create(
+        kind=kind,
+        params=params or {},
+        created_by=user if user is not None and user.is_authenticated else None,
+        max_attempts=max_attempts or getattr(settings, 'JOBS_MAX_ATTEMPTS', DEFAULT_MAX_ATTEMPTS),
+        run_after=timezone.now() + (delay or timedelta())
+    )
+
+
+def worker_name():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def claim(worker=None):
+    """Claim the next job that is due and mark it running; returns it, or None if there is none"""
+    worker = worker or worker_name()
+    now = timezone.now()
+    due = Job.objects.filter(status='queued', run_after__lte=now).order_by('run_after', 'id')
+    running = {
+        'status': 'running',
+        'locked_by': worker,
+        'locked_at': now,
+        'started_at': now,
+        'attempts': F('attempts') + 1,
+    }
+
+    connection = connections[router.db_for_write(Job)]
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            job = due.select_for_update(skip_locked=True).first()
+            if job is None:
+                return None
+            Job.objects.filter(pk=job.pk).update(**running)
+    else:
+        # The UPDATE only matches while the job is still queued, so exactly one worker wins it
+        for candidate in due.values_list('pk', flat=True)[:CLAIM_CANDIDATES]:
+            if Job.objects.filter(pk=candidate, status='queued').update(**running):
+                break
+        else:
+            return None
+        job = Job(pk=candidate)
+    job.refresh_from_db()
+    return job
+
+
+def retry_delay(attempts):
+    """Seconds to wait before retrying a job that has failed ``attempts`` times, with some jitter"""
+    base = getattr(settings, 'JOBS_RETRY_BACKOFF', DEFAULT_RETRY_BACKOFF)
+    delay = min(base * 2 ** (attempts - 1), MAX_RETRY_BACKOFF)
+    return delay * random.uniform(0.8, 1.2)
+
+
+def lease_timeout():
+    return getattr(settings, 'JOBS_LEASE_TIMEOUT', DEFAULT_LEASE_TIMEOUT)
+
+
+def _held(job):
+    """The job's row, as long as the worker that claimed ``job`` still holds it"""
+    return Job.objects.filter(pk=job.pk, locked_by=job.locked_by, status='running')
+
+
+@contextmanager
+def heartbeat(job):
+    """Renew ``job``'s lease from a background thread until the block exits"""
+    stop = threading.Event()
+
+    def beat():
+        try:
+            while not stop.wait(lease_timeout() / HEARTBEATS_PER_LEASE):
+                try:
+                    if not _held(job).update(locked_at=timezone.now()):
+                        return
+                except DatabaseError as exc:
+                    # e.g. SQLite's write lock held by the job itself; the next beat tries again
+                    logger.warning('Could not renew the lease of job %s: %s', job.pk, exc)
+        finally:
+            connections.close_all()
+
+    thread = threading.Thread(target=beat, name=f'job-{job.pk}-heartbeat', daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def run(job):
+    """Run a claimed job and record its result, or schedule its retry"""
+    func = TASKS.get(job.kind)
+    started = time.perf_counter()
+    try:
+        if func is None:
+            raise LookupError(f"No job function registered as '{job.kind}'")
+        with heartbeat(job):
+            result = func(job.params)
+    except Exception as exc:
+        duration = time.perf_counter() - started
+        retry = func is not None and job.attempts < job.max_attempts
+        if retry:
+            outcome = {'status': 'queued', 'run_after': timezone.now() + timedelta(seconds=retry_delay(job.attempts))}
+        else:
+            outcome = {'status': 'failed', 'finished_at': timezone.now()}
+        JOB_DURATION.observe(duration, kind=job.kind)
+        if not _held(job).update(error=traceback.format_exc(), locked_by='', **outcome):
+            return _lost(job)
+        logger.warning(
+            'Job %s (%s) failed on attempt %d of %d%s: %s',
+            job.pk, job.kind, job.attempts, job.max_attempts, ', will retry' if retry else '', exc
+        )
+        JOBS_PROCESSED.inc(kind=job.kind, result='retried' if retry else 'failed')
+        return False
+
+    duration = time.perf_counter() - started
+    JOB_DURATION.observe(duration, kind=job.kind)
+    finished_at = timezone.now()
+    if not _held(job).update(status='succeeded', result=result, error='', locked_by='', finished_at=finished_at):
+        return _lost(job)
+    job.status = 'succeeded'
+    job.result = result
+    job.error = ''
+    job.locked_by = ''
+    job.finished_at = finished_at
+    logger.info('Job %s (%s) succeeded in %.2fs', job.pk, job.kind, duration)
+    JOBS_PROCESSED.inc(kind=job.kind, result='succeeded')
+    return True
+
+
+def _lost(job):
+    """Drop the outcome of a job this worker no longer holds (requeued or failed by requeue_abandoned())"""
+    logger.warning('Job %s (%s) is no longer held by %s; discarding this run', job.pk, job.kind, job.locked_by)
+    JOBS_PROCESSED.inc(kind=job.kind, result='lost')
+    return False
+
+
+def requeue_abandoned():
+    """
+    Queue jobs again whose worker died mid-run (lease not renewed in time), or
+    fail them if they have used up their attempts. Returns the number of jobs.
+    """
+    lease = lease_timeout()
+    now = timezone.now()
+    abandoned = Job.objects.filter(status='running', locked_at__lt=now - timedelta(seconds=lease))
+    failed = abandoned.filter(attempts__gte=F('max_attempts')).update(
+        status='failed', error='The worker running this job stopped responding.', locked_by='', finished_at=now
+    )
+    requeued = abandoned.update(status='queued', locked_by='', run_after=now)
+    return failed + requeued
+
+
+def prune(older_than=None):
+    """Delete finished jobs older than ``older_than`` (default JOBS_RETENTION_DAYS); returns the number deleted"""
+    older_than = older_than or timedelta(days=getattr(settings, 'JOBS_RETENTION_DAYS', 7))
+    deleted, _ = Job.objects.filter(
+        status__in=['succeeded', 'failed'],
+        finished_at__lt=timezone.now() - older_than
+    ).delete()
+    return deleted
@@ -0,0 +1,10 @@
+from rest_framework import serializers
+from .models import Job
+
+class JobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Job
+        fields = [
+            'id', 'kind', 'params', 'status', 'attempts', 'max_attempts',
+            'result', 'error', 'created_at', 'started_at', 'finished_at'
+        ]
\ No newline at end of file
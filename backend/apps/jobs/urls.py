@@ -0,0 +1,6 @@
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('<int:id>/', views.job_detail, name='job-detail'),
+]
\ No newline at end of file
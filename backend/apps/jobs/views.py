@@ -0,0 +1,33 @@
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.decorators import api_view
+from rest_framework.exceptions import NotFound
+from rest_framework.response import Response
+from .models import Job
+from .queue import enqueue
+from .serializers import JobSerializer
+
+ASYNC_PARAM = 'async'
+
+def wants_async(request):
+    """Whether the client asked for ?async=true instead of waiting for the response"""
+    return request.GET.get(ASYNC_PARAM, '').lower() in ('1', 'true', 'yes')
+
+def enqueue_request(request, kind):
+    """Queue ``kind`` with the request's query parameters and answer 202 with where to poll"""
+    params = {key: value for key, value in request.GET.items() if key != ASYNC_PARAM}
+    job = enqueue(kind, params, user=request.user)
+    return Response({
+        'job_id': job.pk,
+        'status': job.status,
+        'status_url': request.build_absolute_uri(reverse('job-detail', args=[job.pk]))
+    }, status=status.HTTP_202_ACCEPTED)
+
+@api_view(['GET'])
+def job_detail(request, id):
+    """A job's status, with its result once it has succeeded; users only see their own jobs"""
+    job = get_object_or_404(Job, pk=id)
+    if job.created_by_id != request.user.pk and not request.user.is_staff:
+        raise NotFound()
+    return Response(JobSerializer(job).data)
\ No newline at end of file
@@ -1,10 +1,35 @@
 from django.contrib import admin
-from .models import Product
+from .models import Product, InventoryValuation, LowStockEvent, StockMovement
 
 @admin.register(Product)
 class ProductAdmin(admin.ModelAdmin):
-    list_display = ['name', 'category', 'supplier', 'price', 'quantity', 'status', 'created_at']
+    list_display = ['name', 'category', 'supplier', 'price', 'quantity', 'reorder_point', 'status', 'created_at']
     list_filter = ['status', 'category', 'supplier', 'created_at']
     search_fields = ['name', 'category__name', 'supplier__name']
     readonly_fields = ['created_at', 'updated_at']
-    list_editable = ['price', 'quantity', 'status']
\ No newline at end of file
+    list_editable = ['price', 'quantity', 'reorder_point', 'status']
+
+
+@admin.register(InventoryValuation)
+class InventoryValuationAdmin(admin.ModelAdmin):
+    list_display = ['category', 'product_count', 'active_count', 'total_quantity', 'value_cost', 'value_sell', 'updated_at']
+    list_select_related = ['category']
+    readonly_fields = ['category', 'product_count', 'active_count', 'out_of_stock_count', 'total_quantity', 'value_cost', 'value_sell', 'price_total', 'margin_total', 'margin_count', 'updated_at']
+
+
+@admin.register(LowStockEvent)
+class LowStockEventAdmin(admin.ModelAdmin):
+    list_display = ['product', 'kind', 'quantity', 'reorder_point', 'created_at']
+    list_filter = ['kind', 'created_at']
+    list_select_related = ['product']
+    search_fields = ['product__name', 'product__code']
+    readonly_fields = ['product', 'kind', 'quantity', 'reorder_point', 'created_at']
+
+
+@admin.register(StockMovement)
+class StockMovementAdmin(admin.ModelAdmin):
+    list_display = ['product', 'change', 'reason', 'reference', 'created_at']
+    list_filter = ['reason', 'created_at']
+    list_select_related = ['product']
+    search_fields = ['product__name', 'product__code', 'reference']
+    readonly_fields = ['product', 'change', 'reason', 'reference', 'created_at']
\ No newline at end of file
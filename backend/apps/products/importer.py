@@ -0,0 +1,256 @@
+"""
+Streaming product import from CSV or JSON Lines.
+
+Rows are read and validated one at a time and written in chunks with a single
+upsert (INSERT ... ON CONFLICT (code) DO UPDATE) per chunk, so memory stays
+bounded by the chunk size no matter how large the file is. Category and
+supplier names are resolved against lookup tables loaded once up front.
+The report keeps counters plus the failing rows only; successful rows are
+just counted.
+"""
+import codecs
+import csv
+import json
+
+from django.db import transaction
+from rest_framework import serializers
+
+from apps.categories.models import Category
+from apps.core import identifiers
+from apps.core.cache import invalidate
+from apps.search.documents import index_queryset
+from apps.suppliers.models import Supplier
+from .ledger import record_movements
+from .lowstock import record_crossings
+from .models import Product
+from .valuation import PRODUCT_FIELDS, product_state, record_changes
+
+FORMATS = ('csv', 'jsonl')
+DEFAULT_CHUNK_SIZE = 1000
+MAX_REPORTED_ERRORS = 1000
+
+# Columns overwritten when a row's code already exists
+UPDATE_FIELDS = [
+    'name', 'category', 'supplier', 'buy_price', 'sell_price', 'price',
+    'quantity', 'status', 'description', 'updated_at'
+]
+
+
+class ProductImportRowSerializer(serializers.Serializer):
+    """One import row; category and supplier are given by name"""
+    code = serializers.CharField(max_length=50, required=False, allow_blank=True)
+    name = serializers.CharField(max_length=200)
+    category = serializers.CharField(max_length=100)
+    supplier = serializers.CharField(max_length=100, help_text="Supplier ID or name")
+    buy_price = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=0)
+    sell_price = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=0)
+    quantity = serializers.IntegerField(min_value=0, default=0)
+    status = serializers.ChoiceField(choices=Product.STATUS_CHOICES, default='active')
+    description = serializers.CharField(required=False, allow_blank=True, default='')
+
+    def validate(self, data):
+        if data['sell_price'] <= data['buy_price']:
+            raise serializers.ValidationError({
+                'sell_price': 'Sell price must be greater than buy price.'
+            })
+        return data
+
+
+def detect_format(filename):
+    """Guess the import format from a file name; defaults to CSV"""
+    name = (filename or '').lower()
+    if name.endswith(('.jsonl', '.ndjson')):
+        return 'jsonl'
+    return 'csv'
+
+
+def read_rows(lines, fmt='csv'):
+    """
+    Yield (line_number, row) pairs from an iterable of byte or text lines.
+    A line that can't be parsed yields an exception instead of a row.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported import format '{fmt}', expected one of: {', '.join(FORMATS)}")
+
+    lines = _as_text(lines)
+    if fmt == 'csv':
+        reader = csv.DictReader(lines)
+        for row in reader:
+            # Treat empty cells as missing so optional columns fall back to their defaults
+            yield reader.line_num, {key.strip(): value.strip() for key, value in row.items() if key and value not in (None, '')}
+        return
+
+    for line_number, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as exc:
+            yield line_number, ValueError(f'Invalid JSON: {exc}')
+            continue
+        if not isinstance(row, dict):
+            row = ValueError('Each line must be a JSON object.')
+        yield line_number, row
+
+
+def _as_text(lines):
+    decoder = codecs.getincrementaldecoder('utf-8-sig')()
+    for line in lines:
+        yield decoder.decode(line) if isinstance(line, bytes) else line
+
+
+class _Lookups:
+    """Category and supplier names resolved with one query per table"""
+
+    def __init__(self):
+        self.categories = {
+            name.lower(): category_id
+            for category_id, name in Category.objects.values_list('id', 'name')
+        }
+        self.suppliers = {}
+        ambiguous = set()
+        for supplier_id, code, name in Supplier.objects.values_list('id', 'supplier_id', 'name'):
+            self.suppliers[code.lower()] = supplier_id
+            key = name.lower()
+            if key in self.suppliers and self.suppliers[key] != supplier_id:
+                ambiguous.add(key)
+            self.suppliers.setdefault(key, supplier_id)
+        # Supplier names aren't unique; a shared name has to be given by supplier ID
+        for key in ambiguous:
+            self.suppliers.pop(key, None)
+
+    def resolve(self, data):
+        errors = {}
+        category_id = self.categories.get(data['category'].lower())
+        if category_id is None:
+            errors['category'] = [f"Unknown category '{data['category']}'."]
+        supplier_id = self.suppliers.get(data['supplier'].lower())
+        if supplier_id is None:
+            errors['supplier'] = [f"Unknown or ambiguous supplier '{data['supplier']}'."]
+        return category_id, supplier_id, errors
+
+
+class ImportReport:
+    """Counters plus the rows that failed (capped at MAX_REPORTED_ERRORS)"""
+
+    def __init__(self):
+        self.processed = 0
+        self.created = 0
+        self.updated = 0
+        self.failed = 0
+        self.errors = []
+
+    def add_error(self, line_number, errors):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'line': line_number, 'errors': errors})
+
+    def as_dict(self):
+        return {
+            'processed': self.processed,
+            'created': self.created,
+            'updated': self.updated,
+            'failed': self.failed,
+            'errors': self.errors,
+            'errors_truncated': self.failed > len(self.errors),
+        }
+
+
+def import_products(rows, chunk_size=DEFAULT_CHUNK_SIZE, dry_run=False):
+    """
+    Upsert products from (line_number, row) pairs as produced by read_rows().
+    Each chunk is committed on its own; returns an ImportReport.
+    """
+    lookups = _Lookups()
+    # One instance for every row: building a serializer per row costs more than validating it
+    validator = ProductImportRowSerializer()
+    report = ImportReport()
+    chunk = {}
+
+    for line_number, row in rows:
+        report.processed += 1
+        if isinstance(row, Exception):
+            report.add_error(line_number, {'non_field_errors': [str(row)]})
+            continue
+
+        try:
+            data = validator.run_validation(row)
+        except serializers.ValidationError as exc:
+            report.add_error(line_number, exc.detail)
+            continue
+
+        category_id, supplier_id, errors = lookups.resolve(data)
+        if errors:
+            report.add_error(line_number, errors)
+            continue
+
+        product = Product(
+            code=data.get('code') or None,
+            name=data['name'],
+            category_id=category_id,
+            supplier_id=supplier_id,
+            buy_price=data['buy_price'],
+            sell_price=data['sell_price'],
+            price=data['sell_price'],
+            quantity=data['quantity'],
+            status=data['status'],
+            description=data['description']
+        )
+        # A code can only be upserted once per statement, so a repeat starts a new chunk
+        if product.code and product.code in chunk:
+            _write_chunk(chunk, report, dry_run)
+            chunk = {}
+        chunk[product.code or ('new', line_number)] = product
+        if len(chunk) >= chunk_size:
+            _write_chunk(chunk, report, dry_run)
+            chunk = {}
+
+    if chunk:
+        _write_chunk(chunk, report, dry_run)
+    if not dry_run and (report.created or report.updated):
+        invalidate('dashboard')
+    return report
+
+
+def _write_chunk(chunk, report, dry_run):
+    products = list(chunk.values())
+    given_codes = [product.code for product in products if product.code]
+    with transaction.atomic():
+        # Locked so the valuation deltas, ledger entries and low-stock events below see rows nobody else changes meanwhile
+        existing = {
+            row.pop('code'): row
+            for row in Product.objects.select_for_update().filter(code__in=given_codes).values('code', *PRODUCT_FIELDS)
+        }
+        report.updated += len(existing)
+        report.created += len(products) - len(existing)
+        if dry_run:
+            return
+
+        new_products = [product for product in products if not product.code]
+        if new_products:
+            for product, code in zip(new_products, identifiers.allocate('product', len(new_products))):
+                product.code = code
+        identifiers.observe_many('product', given_codes)
+        # The upsert leaves reorder_point alone on existing rows
+        for product in products:
+            if product.code in existing:
+                product.reorder_point = existing[product.code]['reorder_point']
+
+        Product.objects.bulk_create(
+            products,
+            update_conflicts=True,
+            unique_fields=['code'],
+            update_fields=UPDATE_FIELDS
+        )
+        # An upsert doesn't return ids; the ledger needs them for new rows too
+        inserted = [product for product in products if product.code not in existing]
+        ids = dict(Product.objects.filter(code__in=[product.code for product in inserted]).values_list('code', 'id'))
+        for product in products:
+            product.pk = existing[product.code]['id'] if product.code in existing else ids[product.code]
+        # bulk_create skips the search index, valuation, ledger and low-stock signals
+        changes = [(existing.get(product.code), product_state(product)) for product in products]
+        record_changes(changes)
+        record_movements(changes, 'import')
+        record_crossings(changes)
+        index_queryset('product', Product.objects.filter(code__in=[product.code for product in products]))
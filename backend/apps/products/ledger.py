@@ -0,0 +1,129 @@
+"""
+Append-only ledger of stock movements, with periodic snapshots.
+
+Every change to a product's quantity appends a StockMovement in the same
+transaction: sales, saves through the API or admin, imports and the
+starting stock of new products. Movements are never updated, so a
+product's movements add up to its quantity at any point in time. Stock
+from before the ledger existed is recorded as one initial movement per
+product when the table was created.
+
+``manage.py snapshot_stock`` (run it from cron, e.g. nightly) stores every
+product's quantity as of a cutoff, computed from the previous snapshot
+plus the movements since. stock_at() starts from the newest snapshot at
+or before the time asked for and adds only the movements after it, so a
+point-in-time query reads one snapshot and at most one snapshot interval
+of the ledger instead of the whole history.
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Max, Sum
+from django.utils import timezone
+
+from .models import Product, StockMovement, StockSnapshot
+
+# Movements are timestamped before their transaction commits, so a snapshot
+# only covers movements older than this to avoid missing one still in flight
+SNAPSHOT_LAG = timedelta(minutes=5)
+
+
+def record_movements(changes, reason, reference=''):
+    """
+    Append a movement for each (before, after) product state pair whose
+    quantity changed; ``before`` is None for a new product and ``after`` None
+    for a deleted one, whose ledger is kept and brought down to zero.
+    """
+    now = timezone.now()
+    movements = []
+    for before, after in changes:
+        change = (after['quantity'] if after else 0) - (before['quantity'] if before else 0)
+        if change:
+            movements.append(StockMovement(
+                product_id=(after or before)['id'],
+                change=change,
+                reason=reason,
+                reference=reference,
+                created_at=now
+            ))
+    if movements:
+        StockMovement.objects.bulk_create(movements)
+    return movements
+
+
+def latest_snapshot(at=None):
+    """Time of the newest snapshot at or before ``at`` (default: any), or None"""
+    snapshots = StockSnapshot.objects.all()
+    if at is not None:
+        snapshots = snapshots.filter(taken_at__lte=at)
+    return snapshots.aggregate(taken_at=Max('taken_at'))['taken_at']
+
+
+def stock_at(at, product_ids=None):
+    """
+    {product id: quantity} as of ``at``, from the newest snapshot before it
+    plus the movements since. Returns (quantities, snapshot time or None).
+    """
+    movements = StockMovement.objects.filter(created_at__lte=at)
+    snapshots = StockSnapshot.objects.all()
+    if product_ids is not None:
+        movements = movements.filter(product_id__in=product_ids)
+        snapshots = snapshots.filter(product_id__in=product_ids)
+
+    quantities = defaultdict(int)
+    taken_at = latest_snapshot(at)
+    if taken_at is not None:
+        quantities.update(snapshots.filter(taken_at=taken_at).values_list('product_id', 'quantity'))
+        movements = movements.filter(created_at__gt=taken_at)
+
+    for product_id, change in movements.values('product_id').annotate(change=Sum('change')).values_list('product_id', 'change'):
+        quantities[product_id] += change
+    return dict(quantities), taken_at
+
+
+def take_snapshot(cutoff=None):
+    """Store every product's quantity as of ``cutoff`` (default SNAPSHOT_LAG ago); returns (cutoff, rows written)"""
+    cutoff = cutoff or timezone.now() - SNAPSHOT_LAG
+    with transaction.atomic():
+        previous = latest_snapshot()
+        if previous is not None and previous >= cutoff:
+            return cutoff, 0
+        quantities, _ = stock_at(cutoff)
+        StockSnapshot.objects.bulk_create(
+            [StockSnapshot(product_id=product_id, quantity=quantity, taken_at=cutoff) for product_id, quantity in quantities.items()],
+            batch_size=2000
+        )
+    return cutoff, len(quantities)
+
+
+def prune_snapshots(keep):
+    """Delete all but the newest ``keep`` snapshots; the ledger itself is kept whole"""
+    times = list(StockSnapshot.objects.values_list('taken_at', flat=True).distinct().order_by('-taken_at')[keep:keep + 1])
+    if not times:
+        return 0
+    deleted, _ = StockSnapshot.objects.filter(taken_at__lte=times[0]).delete()
+    return deleted
+
+
+def reconcile(check_only=False):
+    """
+    Compare each product's ledger balance with its quantity and append a
+    correction movement where they differ.
+    Returns a list of (product id, quantity, ledger balance) tuples.
+    """
+    balances = dict(StockMovement.objects.values('product_id').annotate(balance=Sum('change')).values_list('product_id', 'balance'))
+    drift = [
+        (product_id, quantity, balances.get(product_id, 0))
+        for product_id, quantity in Product.objects.values_list('id', 'quantity').iterator(chunk_size=2000)
+        if quantity != balances.get(product_id, 0)
+    ]
+    if check_only or not drift:
+        return drift
+
+    now = timezone.now()
+    StockMovement.objects.bulk_create([
+        StockMovement(product_id=product_id, change=quantity - balance, reason='correction', created_at=now)
+        for product_id, quantity, balance in drift
+    ], batch_size=2000)
+    return drift
@@ -0,0 +1,68 @@
+"""
+Low-stock tracking against each product's reorder point.
+
+An active product is low on stock once its quantity is at or below its
+``reorder_point``. The partial index product_low_stock_idx has exactly the
+LOW_STOCK condition, so the low-stock set is maintained by the database as
+stock changes and listing or counting it costs O(k) in the number of low
+products instead of a scan of the catalog.
+
+Every change that moves a product into, within or out of that set also
+appends a LowStockEvent in the same transaction: 'low' or 'out' while it is
+in the set, 'restocked' when its quantity rises above the reorder point and
+'removed' when it is deactivated or deleted. That covers quantity and
+reorder point changes, status changes, new products and deletes, so
+clients polling the events in id order with ``?after=<last id seen>`` can
+keep a copy of the set in step with /low-stock/ without re-reading it.
+"""
+from django.db.models import F, Q
+
+from .models import LowStockEvent, Product
+
+LOW_STOCK = Q(status='active', quantity__lte=F('reorder_point'))
+
+# Events returned per request of the change feed
+DEFAULT_EVENT_LIMIT = 100
+MAX_EVENT_LIMIT = 1000
+
+
+def low_stock():
+    """Active products at or below their reorder point, read through the partial index"""
+    return Product.objects.filter(LOW_STOCK)
+
+
+def stock_level(state):
+    """'out' or 'low' for a product state in the LOW_STOCK set, None for one outside it (or no product)"""
+    if state is None or state['status'] != 'active' or (state['quantity'] or 0) > state['reorder_point']:
+        return None
+    return 'out' if not state['quantity'] else 'low'
+
+
+def record_crossings(changes):
+    """
+    Append an event for each (before, after) product state pair that enters,
+    leaves or moves within the low-stock set; ``before`` is None for a new
+    product and ``after`` None for a deleted one.
+    """
+    events = []
+    for before, after in changes:
+        level = stock_level(after)
+        if level == stock_level(before):
+            continue
+        state = after or before
+        if level is None:
+            level = 'restocked' if after is not None and after['status'] == 'active' else 'removed'
+        events.append(LowStockEvent(
+            product_id=state['id'],
+            kind=level,
+            quantity=state['quantity'] or 0,
+            reorder_point=state['reorder_point']
+        ))
+    if events:
+        LowStockEvent.objects.bulk_create(events)
+    return events
+
+
+def events_after(last_id, limit=DEFAULT_EVENT_LIMIT):
+    """Events with an id greater than ``last_id``, oldest first"""
+    return LowStockEvent.objects.filter(id__gt=last_id).select_related('product').order_by('id')[:limit]
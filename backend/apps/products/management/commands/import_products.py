@@ -0,0 +1,52 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from apps.products.importer import DEFAULT_CHUNK_SIZE, FORMATS, detect_format, read_rows, import_products
+
+
+class Command(BaseCommand):
+    help = 'Create or update products from a CSV or JSON Lines file, matching on product code'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='File to import')
+        parser.add_argument(
+            '--format',
+            choices=FORMATS,
+            help='Input format (default: guessed from the file extension)',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=DEFAULT_CHUNK_SIZE,
+            help='Rows written per upsert statement',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Validate the file without writing anything',
+        )
+
+    def handle(self, *args, **options):
+        fmt = options['format'] or detect_format(options['path'])
+        try:
+            with open(options['path'], 'rb') as stream:
+                report = import_products(
+                    read_rows(stream, fmt),
+                    chunk_size=options['chunk_size'],
+                    dry_run=options['dry_run']
+                )
+        except OSError as exc:
+            raise CommandError(exc)
+
+        for error in report.errors:
+            self.stderr.write(f"line {error['line']}: {json.dumps(error['errors'])}")
+        if report.failed > len(report.errors):
+            self.stderr.write(f'... {report.failed - len(report.errors)} more failed row(s) not shown')
+
+        summary = (
+            f"{report.processed} row(s) processed: {report.created} created, "
+            f"{report.updated} updated, {report.failed} failed"
+        )
+        if options['dry_run']:
+            summary += ' (dry run, nothing written)'
+        self.stdout.write(self.style.WARNING(summary) if report.failed else self.style.SUCCESS(summary))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from apps.products.ledger import prune_snapshots, take_snapshot
+
+
+class Command(BaseCommand):
+    help = "Store every product's stock as of a few minutes ago, for fast point-in-time stock queries"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--keep',
+            type=int,
+            default=None,
+            help='Delete all but the newest KEEP snapshots afterwards (the ledger is always kept)',
+        )
+
+    def handle(self, *args, **options):
+        cutoff, written = take_snapshot()
+        if written:
+            self.stdout.write(self.style.SUCCESS(f'Snapshot of {written} products as of {cutoff.isoformat()}'))
+        else:
+            self.stdout.write('A snapshot at or after the cutoff already exists')
+
+        if options['keep'] is not None:
+            deleted = prune_snapshots(max(options['keep'], 1))
+            self.stdout.write(f'Pruned {deleted} snapshot rows')
\ No newline at end of file
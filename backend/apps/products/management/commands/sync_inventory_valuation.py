@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+from apps.categories.models import Category
+from apps.products.valuation import reconcile
+
+
+class Command(BaseCommand):
+    help = 'Recompute the inventory valuation from the Product table, report any drift and repair it'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Only report categories that differ, without changing anything',
+        )
+
+    def handle(self, *args, **options):
+        drift = reconcile(check_only=options['check'])
+
+        names = dict(Category.objects.filter(id__in=[category_id for category_id, _, _ in drift]).values_list('id', 'name'))
+        for category_id, expected, actual in drift:
+            expected = expected or {}
+            actual = actual or {}
+            differences = ', '.join(
+                f'{field} {actual.get(field) or 0} (expected {expected.get(field) or 0})'
+                for field in sorted(set(expected) | set(actual))
+                if (expected.get(field) or 0) != (actual.get(field) or 0)
+            )
+            self.stdout.write(f"{names.get(category_id, category_id)}: {differences}")
+
+        if not drift:
+            self.stdout.write(self.style.SUCCESS('Inventory valuation is in sync'))
+        elif options['check']:
+            self.stdout.write(self.style.WARNING(f'{len(drift)} categor{"y" if len(drift) == 1 else "ies"} out of sync'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Repaired {len(drift)} categor{"y" if len(drift) == 1 else "ies"}'))
\ No newline at end of file
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from apps.products.ledger import reconcile
+
+
+class Command(BaseCommand):
+    help = "Check every product's stock ledger balance against its quantity and append corrections for any drift"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Only report products that differ, without changing anything',
+        )
+
+    def handle(self, *args, **options):
+        drift = reconcile(check_only=options['check'])
+
+        for product_id, quantity, balance in drift:
+            self.stdout.write(f"Product {product_id}: quantity {quantity}, ledger balance {balance}")
+
+        if not drift:
+            self.stdout.write(self.style.SUCCESS('Stock ledger is in sync'))
+        elif options['check']:
+            self.stdout.write(self.style.WARNING(f'{len(drift)} product(s) out of sync'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Corrected {len(drift)} product(s)'))
\ No newline at end of file
@@ -0,0 +1,22 @@
+from django.db import migrations, models
+from apps.core.operations import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY can't run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('products', '0004_created_at_id_index'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='product',
+            index=models.Index(fields=['status', 'quantity'], name='product_status_quantity_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='product',
+            index=models.Index(condition=models.Q(('quantity__lte', 10), ('status', 'active')), fields=['quantity'], name='product_low_stock_idx'),
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 4.2.7 on 2026-10-18 20:19
+
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+def backfill_valuation(apps, schema_editor):
+    """Build the valuation rows for existing products"""
+    Product = apps.get_model('products', 'Product')
+    InventoryValuation = apps.get_model('products', 'InventoryValuation')
+    
+    totals = defaultdict(lambda: defaultdict(int))
+    products = Product.objects.values_list('category_id', 'status', 'quantity', 'buy_price', 'sell_price', 'price')
+    for category_id, status, quantity, buy_price, sell_price, price in products.iterator(chunk_size=2000):
+        row = totals[category_id]
+        row['product_count'] += 1
+        row['active_count'] += status == 'active'
+        row['out_of_stock_count'] += quantity == 0
+        row['total_quantity'] += quantity
+        row['value_cost'] += buy_price * quantity
+        row['value_sell'] += sell_price * quantity
+        row['price_total'] += price
+        if buy_price > 0:
+            row['margin_total'] += ((sell_price - buy_price) / buy_price * 100).quantize(Decimal('0.0001'))
+            row['margin_count'] += 1
+    
+    InventoryValuation.objects.bulk_create([
+        InventoryValuation(category_id=category_id, **row) for category_id, row in totals.items()
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('categories', '0001_initial'),
+        ('products', '0005_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InventoryValuation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('product_count', models.IntegerField(default=0)),
+                ('active_count', models.IntegerField(default=0)),
+                ('out_of_stock_count', models.IntegerField(default=0)),
+                ('total_quantity', models.BigIntegerField(default=0)),
+                ('value_cost', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('value_sell', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('price_total', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('margin_total', models.DecimalField(decimal_places=4, default=0, max_digits=18)),
+                ('margin_count', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('category', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='valuation', to='categories.category')),
+            ],
+        ),
+        migrations.RunPython(backfill_valuation, migrations.RunPython.noop),
+    ]
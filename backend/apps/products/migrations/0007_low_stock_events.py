@@ -0,0 +1,41 @@
+# Generated by Django 4.2.7 on 2026-10-18 20:23
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0006_inventory_valuation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LowStockEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('low', 'Low stock'), ('out', 'Out of stock'), ('restocked', 'Restocked')], max_length=20)),
+                ('quantity', models.PositiveIntegerField()),
+                ('reorder_point', models.PositiveIntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['id'],
+            },
+        ),
+        migrations.RemoveIndex(
+            model_name='product',
+            name='product_low_stock_idx',
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='reorder_point',
+            field=models.PositiveIntegerField(default=10),
+        ),
+        migrations.AddField(
+            model_name='lowstockevent',
+            name='product',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='low_stock_events', to='products.product'),
+        ),
+    ]
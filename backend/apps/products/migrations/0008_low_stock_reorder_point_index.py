@@ -0,0 +1,18 @@
+from django.db import migrations, models
+from apps.core.operations import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY can't run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('products', '0007_low_stock_events'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='product',
+            index=models.Index(condition=models.Q(('quantity__lte', models.F('reorder_point')), ('status', 'active')), fields=['status', 'quantity'], name='product_low_stock_idx'),
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 4.2.7 on 2026-10-18 20:27
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+def open_ledger(apps, schema_editor):
+    """Start the ledger with each existing product's current stock"""
+    Product = apps.get_model('products', 'Product')
+    StockMovement = apps.get_model('products', 'StockMovement')
+    
+    now = django.utils.timezone.now()
+    products = Product.objects.filter(quantity__gt=0).values_list('id', 'quantity')
+    StockMovement.objects.bulk_create(
+        (StockMovement(product_id=product_id, change=quantity, reason='initial', created_at=now) for product_id, quantity in products.iterator(chunk_size=2000)),
+        batch_size=2000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0008_low_stock_reorder_point_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.IntegerField()),
+                ('taken_at', models.DateTimeField()),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_snapshots', to='products.product')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='StockMovement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('change', models.IntegerField()),
+                ('reason', models.CharField(choices=[('initial', 'Initial stock'), ('sale', 'Sale'), ('adjustment', 'Adjustment'), ('import', 'Import'), ('correction', 'Ledger correction')], max_length=20)),
+                ('reference', models.CharField(blank=True, max_length=100)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_movements', to='products.product')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='stocksnapshot',
+            constraint=models.UniqueConstraint(fields=('taken_at', 'product'), name='stocksnapshot_taken_at_product_uniq'),
+        ),
+        migrations.AddIndex(
+            model_name='stockmovement',
+            index=models.Index(fields=['product', 'created_at'], name='stockmove_product_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stockmovement',
+            index=models.Index(fields=['created_at'], name='stockmove_created_at_idx'),
+        ),
+        migrations.RunPython(open_ledger, migrations.RunPython.noop),
+    ]
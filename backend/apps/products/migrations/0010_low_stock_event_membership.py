@@ -0,0 +1,24 @@
+# Generated by Django 4.2.7 on 2026-10-18 20:55
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0009_stock_ledger'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='lowstockevent',
+            name='kind',
+            field=models.CharField(choices=[('low', 'Low stock'), ('out', 'Out of stock'), ('restocked', 'Restocked'), ('removed', 'Deactivated or deleted')], max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='lowstockevent',
+            name='product',
+            field=models.ForeignKey(db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='low_stock_events', to='products.product'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.7 on 2026-10-18 21:29
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0010_low_stock_event_membership'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='stockmovement',
+            name='product',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='stock_movements', to='products.product'),
+        ),
+        migrations.AlterField(
+            model_name='stockmovement',
+            name='reason',
+            field=models.CharField(choices=[('initial', 'Initial stock'), ('sale', 'Sale'), ('adjustment', 'Adjustment'), ('import', 'Import'), ('correction', 'Ledger correction'), ('deleted', 'Product deleted')], max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='stocksnapshot',
+            name='product',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='stock_snapshots', to='products.product'),
+        ),
+    ]
@@ -1,4 +1,5 @@
-from django.db import models
+from django.db import models, transaction
+from django.utils import timezone
 from apps.categories.models import Category
 from apps.suppliers.models import Supplier
 
@@ -16,6 +17,8 @@ class Product(models.Model):
     sell_price = models.DecimalField(max_digits=10, decimal_places=2, verbose_name="Sell Price")
     price = models.DecimalField(max_digits=10, decimal_places=2, verbose_name="Current Price")  # For backward compatibility
     quantity = models.PositiveIntegerField(default=0)
+    # Stock at or below this is low; see apps.products.lowstock
+    reorder_point = models.PositiveIntegerField(default=10)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='active')
     description = models.TextField(blank=True)
     image = models.ImageField(upload_to='products/', blank=True, null=True)
@@ -24,6 +27,18 @@ class Product(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Keyset pagination walks (created_at, id)
+            models.Index(fields=['created_at', 'id'], name='product_created_at_id_idx'),
+            models.Index(fields=['status', 'quantity'], name='product_status_quantity_idx'),
+            # Small partial index holding just the low stock set; the condition matches lowstock.LOW_STOCK.
+            # Leading with status lets SQLite's planner prefer it over product_status_quantity_idx
+            models.Index(
+                fields=['status', 'quantity'],
+                condition=models.Q(status='active', quantity__lte=models.F('reorder_point')),
+                name='product_low_stock_idx'
+            ),
+        ]
         
     def __str__(self):
         return f"{self.code} - {self.name}"
@@ -63,4 +78,107 @@ class Product(models.Model):
         # Keep price field in sync with sell_price for backward compatibility
         if self.sell_price:
             self.price = self.sell_price
-        super().save(*args, **kwargs)
\ No newline at end of file
+        # The valuation signals read the old row and apply the difference in the same transaction
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+
+class InventoryValuation(models.Model):
+    """
+    Per-category inventory totals, kept up to date by delta whenever a product
+    is saved, sold or deleted (see apps.products.valuation)
+    """
+    category = models.OneToOneField(Category, on_delete=models.CASCADE, related_name='valuation')
+    product_count = models.IntegerField(default=0)
+    active_count = models.IntegerField(default=0)
+    out_of_stock_count = models.IntegerField(default=0)
+    total_quantity = models.BigIntegerField(default=0)
+    value_cost = models.DecimalField(max_digits=16, decimal_places=2, default=0)  # Sum of buy_price * quantity
+    value_sell = models.DecimalField(max_digits=16, decimal_places=2, default=0)  # Sum of sell_price * quantity
+    price_total = models.DecimalField(max_digits=16, decimal_places=2, default=0)  # Sum of price
+    # Sum and count of per-product margins for the average, over products with a buy price
+    margin_total = models.DecimalField(max_digits=18, decimal_places=4, default=0)
+    margin_count = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.category} - {self.product_count} products"
+    
+    @property
+    def potential_profit(self):
+        return self.value_sell - self.value_cost
+
+
+class LowStockEvent(models.Model):
+    """
+    A product entering, moving within or leaving the low-stock set.
+    Read in id order as a change feed (see apps.products.lowstock).
+    """
+    KIND_CHOICES = [
+        ('low', 'Low stock'),
+        ('out', 'Out of stock'),
+        ('restocked', 'Restocked'),
+        ('removed', 'Deactivated or deleted'),
+    ]
+    
+    # Events outlive their product so the feed can report its deletion; null only for the outer join
+    product = models.ForeignKey(
+        Product, on_delete=models.DO_NOTHING, db_constraint=False, null=True, related_name='low_stock_events'
+    )
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    quantity = models.PositiveIntegerField()
+    reorder_point = models.PositiveIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['id']
+    
+    def __str__(self):
+        return f"{self.product_id} {self.kind} at {self.quantity}"
+
+
+class StockMovement(models.Model):
+    """
+    One change to a product's quantity. Rows are only ever appended, so the
+    movements of a product add up to its stock (see apps.products.ledger).
+    """
+    REASON_CHOICES = [
+        ('initial', 'Initial stock'),
+        ('sale', 'Sale'),
+        ('adjustment', 'Adjustment'),
+        ('import', 'Import'),
+        ('correction', 'Ledger correction'),
+        ('deleted', 'Product deleted'),
+    ]
+    
+    # The ledger outlives its product: deleting one appends a final movement down to zero
+    product = models.ForeignKey(Product, on_delete=models.DO_NOTHING, db_constraint=False, related_name='stock_movements')
+    change = models.IntegerField()
+    reason = models.CharField(max_length=20, choices=REASON_CHOICES)
+    reference = models.CharField(max_length=100, blank=True)  # Invoice number for sales
+    created_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        indexes = [
+            # A product's history, and the delta scan after a snapshot
+            models.Index(fields=['product', 'created_at'], name='stockmove_product_created_idx'),
+            models.Index(fields=['created_at'], name='stockmove_created_at_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.product_id} {self.change:+d} ({self.reason})"
+
+
+class StockSnapshot(models.Model):
+    """Every product's quantity as of ``taken_at``, written together by manage.py snapshot_stock"""
+    product = models.ForeignKey(Product, on_delete=models.DO_NOTHING, db_constraint=False, related_name='stock_snapshots')
+    quantity = models.IntegerField()
+    taken_at = models.DateTimeField()
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['taken_at', 'product'], name='stocksnapshot_taken_at_product_uniq'),
+        ]
+    
+    def __str__(self):
+        return f"{self.product_id} {self.quantity} at {self.taken_at}"
\ No newline at end of file
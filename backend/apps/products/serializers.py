@@ -1,9 +1,8 @@
 from rest_framework import serializers
-from .models import Product
+from .models import LowStockEvent, Product, StockMovement
+from apps.core import identifiers
 from apps.categories.serializers import CategoryListSerializer
 from apps.suppliers.serializers import SupplierListSerializer
-import random
-import string
 
 class ProductSerializer(serializers.ModelSerializer):
     category_name = serializers.CharField(source='category.name', read_only=True)
@@ -28,12 +27,8 @@ class ProductSerializer(serializers.ModelSerializer):
         }
     
     def generate_product_code(self):
-        """Generate a unique product code"""
-        while True:
-            # Generate product code in format: PRD + 4 random digits
-            code = 'PRD' + ''.join(random.choices(string.digits, k=4))
-            if not Product.objects.filter(code=code).exists():
-                return code
+        """Generate a unique product code (PRD0001, PRD0002, ...)"""
+        return identifiers.allocate('product')[0]
     
     def validate_code(self, value):
         """Validate product code uniqueness if provided"""
@@ -65,6 +60,8 @@ class ProductSerializer(serializers.ModelSerializer):
         # Generate product code if not provided or empty
         if not validated_data.get('code'):
             validated_data['code'] = self.generate_product_code()
+        else:
+            identifiers.observe('product', validated_data['code'])
         
         return Product.objects.create(**validated_data)
 
@@ -79,7 +76,7 @@ class ProductListSerializer(serializers.ModelSerializer):
         model = Product
         fields = [
             'id', 'code', 'name', 'category_name', 'supplier_name', 
-            'buy_price', 'sell_price', 'price', 'quantity', 'status', 
+            'buy_price', 'sell_price', 'price', 'quantity', 'reorder_point', 'status', 
             'is_in_stock', 'profit_per_unit', 'profit_margin_percentage'
         ]
 
@@ -95,4 +92,18 @@ class ProductDetailSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = Product
-        fields = '__all__'
\ No newline at end of file
+        fields = '__all__'
+
+class LowStockEventSerializer(serializers.ModelSerializer):
+    # Null once the product has been deleted
+    product_code = serializers.CharField(source='product.code', read_only=True, default=None)
+    product_name = serializers.CharField(source='product.name', read_only=True, default=None)
+    
+    class Meta:
+        model = LowStockEvent
+        fields = ['id', 'product', 'product_code', 'product_name', 'kind', 'quantity', 'reorder_point', 'created_at']
+
+class StockMovementSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = StockMovement
+        fields = ['id', 'product', 'change', 'reason', 'reference', 'created_at']
\ No newline at end of file
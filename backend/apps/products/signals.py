@@ -0,0 +1,59 @@
+from django.db import transaction
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from apps.categories.models import Category
+from .ledger import record_movements
+from .lowstock import record_crossings
+from .models import Product
+from .valuation import PRODUCT_FIELDS, product_state, record_change
+
+def _current_state(product):
+    """The product's row as stored, locked until the end of the transaction if there is one"""
+    if product.pk is None:
+        return None
+    products = Product.objects.filter(pk=product.pk)
+    # select_for_update() raises in autocommit mode, e.g. a save() outside transaction.atomic()
+    if transaction.get_connection(products.db).in_atomic_block:
+        products = products.select_for_update()
+    return products.values(*PRODUCT_FIELDS).first()
+
+@receiver(pre_save, sender=Product)
+def read_valuation_before_save(sender, instance, **kwargs):
+    instance._valuation_before = _current_state(instance)
+
+@receiver(post_save, sender=Product)
+def update_valuation_after_save(sender, instance, update_fields=None, **kwargs):
+    """
+    Move the product's contribution from its old values to the saved ones,
+    noting reorder point crossings and the change of stock in the ledger
+    """
+    before = getattr(instance, '_valuation_before', None)
+    after = product_state(instance)
+    if before is not None and update_fields is not None:
+        # Fields left out of update_fields keep their stored values
+        saved = {Product._meta.get_field(name).attname for name in update_fields}
+        after = {field: after[field] if field in saved else before[field] for field in PRODUCT_FIELDS}
+    record_change(before, after)
+    record_crossings([(before, after)])
+    record_movements([(before, after)], 'adjustment' if before is not None else 'initial')
+
+def _deleting_category(origin):
+    model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    return model is Category
+
+@receiver(pre_delete, sender=Product)
+def read_valuation_before_delete(sender, instance, origin=None, **kwargs):
+    instance._valuation_before = None if _deleting_category(origin) else _current_state(instance)
+
+@receiver(post_delete, sender=Product)
+def remove_product_from_valuation(sender, instance, **kwargs):
+    """
+    Subtract deleted products (API, admin or supplier cascades); a deleted category takes its row with it.
+    Products leaving the low-stock set get their 'removed' event and their closing ledger movement either way.
+    """
+    before = getattr(instance, '_valuation_before', None)
+    if before is not None:
+        record_change(before, None)
+    record_crossings([(before or product_state(instance), None)])
+    record_movements([(before or product_state(instance), None)], 'deleted')
\ No newline at end of file
@@ -0,0 +1,54 @@
+"""The stock ledger of deleted products."""
+from decimal import Decimal
+
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from apps.authentication.models import User
+from apps.categories.models import Category
+from apps.products.ledger import stock_at, take_snapshot
+from apps.products.models import Product, StockMovement
+from apps.suppliers.models import Supplier
+
+
+class DeletedProductLedgerTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        cls.category = Category.objects.create(name='Tools')
+        cls.supplier = Supplier.objects.create(supplier_id='SUP0001', name='Acme', contact='555')
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+        self.product = Product.objects.create(
+            code='PRD0001',
+            category=self.category,
+            supplier=self.supplier,
+            name='Hammer',
+            buy_price=Decimal('5.00'),
+            sell_price=Decimal('8.00'),
+            price=Decimal('8.00'),
+            quantity=50
+        )
+
+    def movements(self, product_id):
+        return list(StockMovement.objects.filter(product_id=product_id).order_by('id').values_list('reason', 'change'))
+
+    def test_deleting_a_product_keeps_its_ledger(self):
+        product_id = self.product.pk
+        take_snapshot(cutoff=timezone.now())
+
+        response = self.client.delete(f'/api/products/{product_id}/')
+
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.movements(product_id), [('initial', 50), ('deleted', -50)])
+        self.assertTrue(self.product.stock_snapshots.exists())
+        self.assertEqual(stock_at(timezone.now(), [product_id])[0], {product_id: 0})
+
+    def test_deleting_the_category_keeps_its_products_ledgers(self):
+        product_id = self.product.pk
+
+        self.category.delete()
+
+        self.assertEqual(self.movements(product_id), [('initial', 50), ('deleted', -50)])
@@ -4,6 +4,10 @@ from . import views
 urlpatterns = [
     path('', views.ProductListCreateView.as_view(), name='product-list-create'),
     path('<int:id>/', views.ProductDetailView.as_view(), name='product-detail'),
+    path('<int:id>/movements/', views.StockMovementListView.as_view(), name='product-stock-movements'),
+    path('stock-at/', views.stock_at_view, name='product-stock-at'),
     path('stats/', views.product_stats, name='product-stats'),
     path('low-stock/', views.low_stock_products, name='low-stock-products'),
+    path('low-stock/events/', views.low_stock_events, name='low-stock-events'),
+    path('import/', views.import_products_view, name='product-import'),
 ]
\ No newline at end of file
@@ -0,0 +1,169 @@
+"""
+Maintenance and queries for the InventoryValuation table.
+
+Each category has one row holding the totals of its products: counts,
+quantity, value at cost and at sell price, and the sum of margins for the
+average. Every change to a product applies the difference between its old
+and new contribution in the same transaction, so the dashboard and stats
+endpoints read a few rows instead of scanning the Product table. Global
+totals add up the category rows.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from .models import InventoryValuation, Product
+
+VALUATION_FIELDS = [
+    'product_count', 'active_count', 'out_of_stock_count', 'total_quantity',
+    'value_cost', 'value_sell', 'price_total', 'margin_total', 'margin_count',
+]
+
+# Product fields read before and after a change, for the valuation and the low-stock events
+PRODUCT_FIELDS = ['id', 'category_id', 'status', 'quantity', 'reorder_point', 'buy_price', 'sell_price', 'price']
+
+MARGIN_PLACES = Decimal('0.0001')
+
+
+def product_state(product):
+    """The valuation-relevant fields of a product instance, as a dict"""
+    return {field: getattr(product, field) for field in PRODUCT_FIELDS}
+
+
+def contribution(state):
+    """What one product adds to its category's totals"""
+    quantity = state['quantity'] or 0
+    buy_price = Decimal(state['buy_price'] or 0)
+    sell_price = Decimal(state['sell_price'] or 0)
+    margin = ((sell_price - buy_price) / buy_price * 100).quantize(MARGIN_PLACES) if buy_price > 0 else 0
+    return {
+        'product_count': 1,
+        'active_count': int(state['status'] == 'active'),
+        'out_of_stock_count': int(quantity == 0),
+        'total_quantity': quantity,
+        'value_cost': buy_price * quantity,
+        'value_sell': sell_price * quantity,
+        'price_total': Decimal(state['price'] or 0),
+        'margin_total': margin,
+        'margin_count': int(buy_price > 0),
+    }
+
+
+def apply_to_category(category_id, **deltas):
+    """Add the given deltas to the row for ``category_id``, creating it if needed"""
+    updated = InventoryValuation.objects.filter(category_id=category_id).update(
+        **{field: F(field) + value for field, value in deltas.items()},
+        updated_at=timezone.now()
+    )
+    if updated:
+        return
+    try:
+        # Savepoint so a concurrent insert for the same category doesn't break the outer transaction
+        with transaction.atomic():
+            InventoryValuation.objects.create(category_id=category_id, **deltas)
+    except IntegrityError:
+        InventoryValuation.objects.filter(category_id=category_id).update(
+            **{field: F(field) + value for field, value in deltas.items()},
+            updated_at=timezone.now()
+        )
+
+
+def record_changes(changes):
+    """
+    Apply (before, after) product states to the valuation; either side may be
+    None for a created or deleted product. Changes are summed per category
+    first and categories updated in id order, so concurrent writers lock the
+    rows in the same order.
+    """
+    deltas = defaultdict(lambda: defaultdict(int))
+    for before, after in changes:
+        if before is not None:
+            for field, value in contribution(before).items():
+                deltas[before['category_id']][field] -= value
+        if after is not None:
+            for field, value in contribution(after).items():
+                deltas[after['category_id']][field] += value
+
+    for category_id in sorted(deltas):
+        changed = {field: value for field, value in deltas[category_id].items() if value}
+        if changed:
+            apply_to_category(category_id, **changed)
+
+
+def record_change(before, after):
+    record_changes([(before, after)])
+
+
+def totals_from_products():
+    """Recompute the per-category totals straight from the Product table"""
+    totals = defaultdict(lambda: dict.fromkeys(VALUATION_FIELDS, 0))
+    for state in Product.objects.values(*PRODUCT_FIELDS).iterator(chunk_size=2000):
+        row = totals[state['category_id']]
+        for field, value in contribution(state).items():
+            row[field] += value
+    return dict(totals)
+
+
+def reconcile(check_only=False):
+    """
+    Compare the valuation table against the Product table and fix any drift.
+    Returns a list of (category id, expected, actual) tuples for categories that differed.
+    """
+    expected = totals_from_products()
+    actual = {
+        row.pop('category_id'): row
+        for row in InventoryValuation.objects.values('category_id', *VALUATION_FIELDS)
+    }
+
+    drift = []
+    for category_id in sorted(set(expected) | set(actual)):
+        want = expected.get(category_id)
+        have = actual.get(category_id)
+        # A missing row and an all-zero row are equivalent
+        if any(
+            Decimal((want or {}).get(field) or 0) != Decimal((have or {}).get(field) or 0)
+            for field in VALUATION_FIELDS
+        ):
+            drift.append((category_id, want, have))
+
+    if check_only or not drift:
+        return drift
+
+    with transaction.atomic():
+        for category_id, want, have in drift:
+            if want is None:
+                InventoryValuation.objects.filter(category_id=category_id).delete()
+            else:
+                InventoryValuation.objects.update_or_create(category_id=category_id, defaults=want)
+    return drift
+
+
+def _summarize(row):
+    return {
+        'product_count': row['product_count'] or 0,
+        'active_count': row['active_count'] or 0,
+        'out_of_stock_count': row['out_of_stock_count'] or 0,
+        'total_quantity': row['total_quantity'] or 0,
+        'value_cost': row['value_cost'] or 0,
+        'value_sell': row['value_sell'] or 0,
+        'potential_profit': (row['value_sell'] or 0) - (row['value_cost'] or 0),
+        'price_total': row['price_total'] or 0,
+        'avg_profit_margin': row['margin_total'] / row['margin_count'] if row['margin_count'] else 0,
+    }
+
+
+def inventory_totals():
+    """Totals over every category, in one query over the valuation rows"""
+    return _summarize(InventoryValuation.objects.aggregate(**{field: Sum(field) for field in VALUATION_FIELDS}))
+
+
+def category_totals():
+    """Totals per category that has products, by potential profit descending"""
+    rows = InventoryValuation.objects.filter(product_count__gt=0).values(
+        'category_id', 'category__name', *VALUATION_FIELDS
+    )
+    categories = [dict(_summarize(row), category_id=row['category_id'], category__name=row['category__name']) for row in rows]
+    return sorted(categories, key=lambda row: row['potential_profit'], reverse=True)
@@ -1,19 +1,36 @@
 from rest_framework import generics, filters, status
-from rest_framework.decorators import api_view
+from rest_framework.decorators import api_view, parser_classes
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import MultiPartParser
 from rest_framework.response import Response
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db.models import Sum, Count
-from .models import Product
-from .serializers import ProductSerializer, ProductListSerializer, ProductDetailSerializer
+from datetime import timedelta
+from apps.core.metrics import Counter
+from apps.core.pagination import KeysetPagination, PageNumberOrCursorPagination
+from apps.core.timewindows import day_start
+from apps.search.filters import FullTextSearchFilter
+from .models import Product, StockMovement
+from .serializers import ProductSerializer, ProductListSerializer, ProductDetailSerializer, LowStockEventSerializer, StockMovementSerializer
+from .ledger import stock_at
+from .lowstock import DEFAULT_EVENT_LIMIT, MAX_EVENT_LIMIT, events_after, low_stock
+from .valuation import inventory_totals
+from .importer import FORMATS, detect_format, read_rows, import_products
+
+PRODUCT_IMPORT_ROWS = Counter('product_import_rows_total', 'Rows applied by product imports, by result', ['result'])
 
 class ProductListCreateView(generics.ListCreateAPIView):
     queryset = Product.objects.select_related('category', 'supplier').all()
     serializer_class = ProductSerializer
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, FullTextSearchFilter]
+    search_entity = 'product'
     search_fields = ['name', 'category__name', 'supplier__name']
     filterset_fields = ['status', 'category', 'supplier']
     ordering_fields = ['name', 'price', 'quantity', 'created_at']
-    ordering = ['-created_at']
+    ordering = ['-created_at', '-id']
+    pagination_class = PageNumberOrCursorPagination
 
     def get_serializer_class(self):
         if self.request.method == 'GET':
@@ -25,30 +42,115 @@ class ProductDetailView(generics.RetrieveUpdateDestroyAPIView):
     serializer_class = ProductDetailSerializer
     lookup_field = 'id'
 
+    def perform_update(self, serializer):
+        # The valuation signals hold the product's row lock from reading its old values until the save
+        with transaction.atomic():
+            serializer.save()
+
+class StockMovementListView(generics.ListAPIView):
+    """A product's stock ledger, newest first"""
+    serializer_class = StockMovementSerializer
+    pagination_class = KeysetPagination
+    
+    def get_queryset(self):
+        return StockMovement.objects.filter(product_id=self.kwargs['id'])
+
+@api_view(['GET'])
+def stock_at_view(request):
+    """
+    Stock of every product (or of the ?product= ids given) at ?at=, an ISO
+    datetime or a YYYY-MM-DD date meaning the end of that day
+    """
+    value = request.GET.get('at', '')
+    try:
+        day = parse_date(value)
+        at = day_start(day + timedelta(days=1)) - timedelta(microseconds=1) if day else parse_datetime(value)
+    except ValueError:
+        at = None
+    if at is None:
+        raise ValidationError({'at': 'Use an ISO datetime or the YYYY-MM-DD format.'})
+    if timezone.is_naive(at):
+        at = timezone.make_aware(at)
+    
+    product_ids = request.GET.getlist('product') or None
+    if product_ids is not None and not all(product_id.isdigit() for product_id in product_ids):
+        raise ValidationError({'product': 'Product ids must be integers.'})
+    
+    quantities, snapshot = stock_at(at, product_ids and [int(product_id) for product_id in product_ids])
+    return Response({
+        'at': at,
+        'snapshot': snapshot,
+        'quantities': [
+            {'product': product_id, 'quantity': quantity}
+            for product_id, quantity in sorted(quantities.items())
+        ]
+    })
+
 @api_view(['GET'])
 def product_stats(request):
-    total_products = Product.objects.count()
-    active_products = Product.objects.filter(status='active').count()
-    out_of_stock = Product.objects.filter(quantity=0).count()
-    total_value = Product.objects.aggregate(
-        total=Sum('price')
-    )['total'] or 0
+    # Counts and totals are kept per category as products change
+    stats = inventory_totals()
     
     return Response({
-        'total_products': total_products,
-        'active_products': active_products,
-        'inactive_products': total_products - active_products,
-        'out_of_stock': out_of_stock,
-        'total_inventory_value': total_value
+        'total_products': stats['product_count'],
+        'active_products': stats['active_count'],
+        'inactive_products': stats['product_count'] - stats['active_count'],
+        'out_of_stock': stats['out_of_stock_count'],
+        'total_inventory_value': stats['price_total']
     })
 
 @api_view(['GET'])
 def low_stock_products(request):
-    threshold = int(request.GET.get('threshold', 10))
-    products = Product.objects.filter(
-        quantity__lte=threshold,
-        status='active'
-    ).select_related('category', 'supplier')
+    """Active products at or below their reorder point, or at or below ?threshold= when given"""
+    threshold = request.GET.get('threshold')
+    if threshold is None:
+        products = low_stock()
+    else:
+        # A fixed threshold can't use the low stock index and scans status/quantity instead
+        products = Product.objects.filter(
+            quantity__lte=int(threshold),
+            status='active'
+        )
+    products = products.select_related('category', 'supplier').order_by('quantity', 'id')
     
     serializer = ProductListSerializer(products, many=True)
-    return Response(serializer.data)
\ No newline at end of file
+    return Response(serializer.data)
+
+@api_view(['GET'])
+def low_stock_events(request):
+    """
+    Change feed of products entering or leaving the low-stock list, oldest first.
+    Pass the returned last_id back as ?after= to get only newer events.
+    """
+    try:
+        after = int(request.GET.get('after', 0))
+        limit = min(int(request.GET.get('limit', DEFAULT_EVENT_LIMIT)), MAX_EVENT_LIMIT)
+    except ValueError:
+        raise ValidationError({'after': 'after and limit must be integers.'})
+    
+    events = list(events_after(after, max(limit, 1)))
+    return Response({
+        'results': LowStockEventSerializer(events, many=True).data,
+        'last_id': events[-1].id if events else after
+    })
+
+@api_view(['POST'])
+@parser_classes([MultiPartParser])
+def import_products_view(request):
+    """
+    Upsert products from an uploaded CSV or JSON Lines file (multipart field "file").
+    The format comes from the "format" field or the file extension; ?dry_run=true only validates.
+    """
+    upload = request.FILES.get('file')
+    if upload is None:
+        raise ValidationError({'file': 'Upload a CSV or JSON Lines file.'})
+    fmt = request.data.get('format') or detect_format(upload.name)
+    if fmt not in FORMATS:
+        raise ValidationError({'format': f"Expected one of: {', '.join(FORMATS)}"})
+    dry_run = request.query_params.get('dry_run', '').lower() in ('1', 'true', 'yes')
+
+    report = import_products(read_rows(upload, fmt), dry_run=dry_run)
+    if not dry_run:
+        for result in ('created', 'updated', 'failed'):
+            PRODUCT_IMPORT_ROWS.inc(getattr(report, result), result=result)
+    return Response(report.as_dict(), status=status.HTTP_200_OK)
\ No newline at end of file
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Sale, SaleItem
+from .models import Sale, SaleItem, DailySalesRollup
 
 class SaleItemInline(admin.TabularInline):
     model = SaleItem
@@ -10,6 +10,7 @@ class SaleItemInline(admin.TabularInline):
 class SaleAdmin(admin.ModelAdmin):
     list_display = ['invoice_number', 'customer_name', 'total_amount', 'net_amount', 'created_by', 'created_at']
     list_filter = ['created_at', 'created_by']
+    list_select_related = ['created_by']
     search_fields = ['invoice_number', 'customer_name', 'customer_contact']
     readonly_fields = ['created_at', 'updated_at', 'discount_amount', 'net_amount']
     inlines = [SaleItemInline]
@@ -18,4 +19,11 @@ class SaleAdmin(admin.ModelAdmin):
 class SaleItemAdmin(admin.ModelAdmin):
     list_display = ['sale', 'product', 'quantity', 'unit_price', 'total_price']
     list_filter = ['sale__created_at']
-    readonly_fields = ['total_price']
\ No newline at end of file
+    list_select_related = ['sale', 'product']
+    readonly_fields = ['total_price']
+
+@admin.register(DailySalesRollup)
+class DailySalesRollupAdmin(admin.ModelAdmin):
+    list_display = ['date', 'sales_count', 'net_amount', 'total_cost', 'total_profit', 'updated_at']
+    date_hierarchy = 'date'
+    readonly_fields = ['date', 'sales_count', 'total_amount', 'discount_amount', 'net_amount', 'total_cost', 'total_profit', 'updated_at']
\ No newline at end of file
@@ -3,4 +3,7 @@ from django.apps import AppConfig
 
 class SalesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'apps.sales'
\ No newline at end of file
+    name = 'apps.sales'
+
+    def ready(self):
+        from . import signals  # noqa: F401
\ No newline at end of file
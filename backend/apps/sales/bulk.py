@@ -0,0 +1,183 @@
+"""
+Batch ingestion of sales uploaded by POS terminals.
+
+A batch is validated row by row without touching the database, then applied
+in one transaction: products are locked with a single query, stock is
+checked for the whole batch in memory, sales and their items are inserted
+with bulk_create and each product gets one aggregate stock decrement. Rows
+that fail are reported individually and don't stop the rest of the batch.
+Every row carries an idempotency key, so re-sending a batch after a timeout
+reports the earlier sales as duplicates instead of selling twice.
+"""
+from collections import defaultdict
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from apps.core.cache import invalidate
+from apps.search.documents import index_objects
+from .invoices import allocate_invoice_numbers, unissued_invoice_numbers
+from .metrics import STOCK_CHECK_FAILURES, count_created
+from .models import Sale, SaleItem
+from .rollup import apply_to_day
+from .serializers import DUPLICATE_INVOICE, BulkSaleSerializer
+from .stock import InsufficientStock, lock_products, decrement_stock
+
+MAX_BATCH_SIZE = 5000
+
+
+def _error(index, errors):
+    return {'index': index, 'status': 'error', 'errors': errors}
+
+
+def ingest_sales(rows, user=None):
+    """Create the valid sales in ``rows``; returns one result dict per row, in order"""
+    results = [None] * len(rows)
+    pending = []
+    seen_keys = set()
+    seen_invoices = set()
+
+    for index, row in enumerate(rows):
+        serializer = BulkSaleSerializer(data=row)
+        if not serializer.is_valid():
+            results[index] = _error(index, serializer.errors)
+            continue
+        data = serializer.validated_data
+        if data['idempotency_key'] in seen_keys:
+            results[index] = _error(index, {'idempotency_key': ['Repeated within this batch.']})
+            continue
+        if data.get('invoice_number') and data['invoice_number'] in seen_invoices:
+            results[index] = _error(index, {'invoice_number': ['Repeated within this batch.']})
+            continue
+        seen_keys.add(data['idempotency_key'])
+        if data.get('invoice_number'):
+            seen_invoices.add(data['invoice_number'])
+        pending.append((index, data))
+
+    if not pending:
+        return results
+
+    with transaction.atomic():
+        # Lock first so a concurrent retry of the same batch waits here and then sees our keys
+        products = lock_products(item['product'] for _, data in pending for item in data['items'])
+
+        existing = {
+            key: (sale_id, invoice_number)
+            for key, sale_id, invoice_number in Sale.objects.filter(
+                idempotency_key__in=[data['idempotency_key'] for _, data in pending]
+            ).values_list('idempotency_key', 'id', 'invoice_number')
+        }
+        supplied_invoices = [data['invoice_number'] for _, data in pending if data.get('invoice_number')]
+        taken_invoices = set(Sale.objects.filter(
+            invoice_number__in=supplied_invoices
+        ).values_list('invoice_number', flat=True))
+        unissued_invoices = unissued_invoice_numbers(supplied_invoices)
+
+        # Check stock for the whole batch against the locked rows, in upload order
+        remaining = {product_id: product.quantity for product_id, product in products.items()}
+        accepted = []
+        for index, data in pending:
+            if data['idempotency_key'] in existing:
+                sale_id, invoice_number = existing[data['idempotency_key']]
+                results[index] = {'index': index, 'status': 'duplicate', 'id': sale_id, 'invoice_number': invoice_number}
+                continue
+            if data.get('invoice_number') in taken_invoices:
+                results[index] = _error(index, {'invoice_number': [DUPLICATE_INVOICE]})
+                continue
+            if data.get('invoice_number') in unissued_invoices:
+                results[index] = _error(index, {'invoice_number': ["Invoice number hasn't been reserved."]})
+                continue
+
+            missing = [item['product'] for item in data['items'] if item['product'] not in products]
+            if missing:
+                results[index] = _error(index, {'items': [f"Product {product_id} does not exist." for product_id in missing]})
+                continue
+
+            shortages = [
+                str(InsufficientStock(products[item['product']], item['quantity'], available=remaining[item['product']]))
+                for item in data['items']
+                if remaining[item['product']] < item['quantity']
+            ]
+            if shortages:
+                STOCK_CHECK_FAILURES.inc(source='bulk')
+                results[index] = _error(index, {'items': shortages})
+                continue
+
+            for item in data['items']:
+                remaining[item['product']] -= item['quantity']
+            accepted.append((index, data))
+
+        if not accepted:
+            return results
+
+        # Build everything in memory, then insert sales and items in two bulk statements
+        auto_count = sum(1 for _, data in accepted if not data.get('invoice_number'))
+        auto_numbers = iter(allocate_invoice_numbers(count=auto_count) if auto_count else [])
+        sales = []
+        sale_items = []
+        quantities = defaultdict(int)
+        for index, data in accepted:
+            sale = Sale(
+                idempotency_key=data['idempotency_key'],
+                invoice_number=data.get('invoice_number') or next(auto_numbers),
+                customer_name=data['customer_name'],
+                customer_contact=data['customer_contact'],
+                discount_percentage=data['discount_percentage'],
+                created_by=user
+            )
+            items = []
+            for item_data in data['items']:
+                product = products[item_data['product']]
+                item = SaleItem(
+                    product=product,
+                    quantity=item_data['quantity'],
+                    unit_price=item_data['unit_price'],
+                    unit_cost=product.buy_price
+                )
+                item.compute_totals()
+                items.append(item)
+                quantities[product.id] += item.quantity
+            sale.fill_totals(items)
+            sales.append(sale)
+            sale_items.append(items)
+
+        try:
+            with transaction.atomic():
+                Sale.objects.bulk_create(sales)
+        except IntegrityError:
+            # A concurrent request saved one of our idempotency keys or invoice numbers after we checked
+            raise ValidationError({'detail': 'A sale in this batch was saved concurrently by another request; send the batch again.'})
+        if any(sale.pk is None for sale in sales):
+            # Backends that can't return ids from a bulk insert
+            ids = dict(Sale.objects.filter(
+                idempotency_key__in=[sale.idempotency_key for sale in sales]
+            ).values_list('idempotency_key', 'id'))
+            for sale in sales:
+                sale.pk = ids[sale.idempotency_key]
+
+        for sale, items in zip(sales, sale_items):
+            for item in items:
+                item.sale = sale
+        SaleItem.objects.bulk_create([item for items in sale_items for item in items])
+
+        # One conditional decrement per product for the whole batch
+        decrement_stock(products, quantities)
+
+        # bulk_create skips signals, so fold the batch into the rollup, search index and cache by hand
+        daily = defaultdict(lambda: defaultdict(int))
+        for sale in sales:
+            totals = daily[timezone.localdate(sale.created_at)]
+            totals['sales_count'] += 1
+            for field in ('total_amount', 'discount_amount', 'net_amount', 'total_cost', 'total_profit'):
+                totals[field] += getattr(sale, field)
+        for date, totals in daily.items():
+            apply_to_day(date, **totals)
+        index_objects('sale', [sale.pk for sale in sales])
+        transaction.on_commit(lambda: invalidate('dashboard'))
+        count_created(len(sales), sum(len(items) for items in sale_items), source='bulk')
+
+        for (index, _), sale in zip(accepted, sales):
+            results[index] = {'index': index, 'status': 'created', 'id': sale.pk, 'invoice_number': sale.invoice_number}
+
+    return results
@@ -0,0 +1,74 @@
+"""
+Invoice number allocation.
+
+Numbers come from a per-day (and optionally per-store) sequence, e.g.
+INV20250114-00042 or INV20250114-S01-00007. Allocating inside the sale's
+transaction keeps the series gap-free: the sequence row stays locked until
+the sale commits (a row lock on PostgreSQL, the database write lock on
+SQLite) and a failed sale rolls its number back.
+
+A sale may bring its own number, reserved earlier by an offline terminal;
+it is only accepted once its day's (and store's) sequence has handed it out,
+whenever the terminal gets to sync it.
+"""
+import re
+from datetime import datetime
+
+from django.utils import timezone
+
+from apps.core import sequences
+
+INVOICE_PREFIX = 'INV'
+STORE_CODE_PATTERN = re.compile(r'^[A-Za-z0-9]{1,10}$')
+MAX_RESERVATION = 1000
+INVOICE_NUMBER_PATTERN = re.compile(rf'^{INVOICE_PREFIX}(\d{{8}})(?:-([A-Z0-9]{{1,10}}))?-(\d{{5,}})$')
+
+
+def _sequence_name(day, store):
+    return f"invoice:{store or '-'}:{day:%Y%m%d}"
+
+
+def format_invoice_number(day, number, store=None):
+    store_part = f"-{store.upper()}" if store else ''
+    return f"{INVOICE_PREFIX}{day:%Y%m%d}{store_part}-{number:05d}"
+
+
+def allocate_invoice_numbers(count=1, store=None, day=None):
+    """
+    Reserve ``count`` consecutive invoice numbers for ``day`` (today by default).
+    Call inside the transaction that uses them to keep the series gap-free;
+    reserving ahead of time for offline terminals necessarily leaves unused
+    numbers as gaps.
+    """
+    day = day or timezone.localdate()
+    numbers = sequences.reserve(_sequence_name(day, store and store.upper()), count)
+    return [format_invoice_number(day, number, store) for number in numbers]
+
+
+def parse_invoice_number(value):
+    """Split an invoice number into (day, store or None, number); raises ValueError if it isn't one"""
+    match = INVOICE_NUMBER_PATTERN.match(value)
+    if match:
+        try:
+            return datetime.strptime(match[1], '%Y%m%d').date(), match[2], int(match[3])
+        except ValueError:
+            pass
+    raise ValueError(f"Invalid invoice number, expected e.g. {format_invoice_number(timezone.localdate(), 42)}.")
+
+
+def check_invoice_number(value):
+    """
+    Validate the format of a client-supplied invoice number without querying; raises ValueError.
+    Any day is fine: a terminal may sync numbers it reserved before midnight.
+    """
+    _, _, number = parse_invoice_number(value)
+    if number < 1:
+        raise ValueError("Invalid invoice number.")
+
+
+def unissued_invoice_numbers(values):
+    """The invoice numbers in ``values`` that their sequence hasn't handed out yet, in one query"""
+    parsed = {value: parse_invoice_number(value) for value in values}
+    names = {value: _sequence_name(day, store) for value, (day, store, _) in parsed.items()}
+    issued = sequences.last_values(names.values())
+    return {value for value, (_, _, number) in parsed.items() if number > issued.get(names[value], 0)}
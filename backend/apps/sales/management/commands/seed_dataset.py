@@ -0,0 +1,64 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from apps.sales.seed import DEFAULT_BATCH_SIZE, DEFAULT_DAYS, scaled_counts, seed_dataset
+
+
+class Command(BaseCommand):
+    help = 'Generate a deterministic synthetic dataset for load testing (scale 1 is about 10,000 sales)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scale',
+            type=float,
+            default=1,
+            help='Size multiplier; sales grow linearly, products, suppliers and employees with its square root',
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='Random seed; the same scale and seed generate the same data',
+        )
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=DEFAULT_DAYS,
+            help='Days of sales history ending today',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help='Sales written per transaction',
+        )
+        parser.add_argument(
+            '--skip-search-index',
+            action='store_true',
+            help="Don't index the new rows for search (run rebuild_search_index later)",
+        )
+
+    def handle(self, *args, **options):
+        if options['scale'] <= 0:
+            raise CommandError('--scale must be positive')
+        if options['days'] < 1 or options['batch_size'] < 1:
+            raise CommandError('--days and --batch-size must be at least 1')
+        
+        counts = scaled_counts(options['scale'])
+        self.stdout.write(
+            f"Seeding about {counts['sales']} sales across {counts['products']} products "
+            f"and {counts['employees']} employees (seed {options['seed']})"
+        )
+        started = time.monotonic()
+        created = seed_dataset(
+            scale=options['scale'],
+            seed=options['seed'],
+            days=options['days'],
+            batch_size=options['batch_size'],
+            index_search=not options['skip_search_index'],
+            progress=self.stdout.write,
+        )
+        elapsed = time.monotonic() - started
+        
+        summary = ', '.join(f'{count} {table}' for table, count in created.items())
+        self.stdout.write(self.style.SUCCESS(f'Created {summary} in {elapsed:.1f}s'))
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from apps.sales.rollup import reconcile
+
+
+class Command(BaseCommand):
+    help = 'Backfill the daily sales rollup from the Sale table and repair any drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Only report days that differ, without changing anything',
+        )
+
+    def handle(self, *args, **options):
+        drift = reconcile(check_only=options['check'])
+
+        for date, expected, actual in drift:
+            expected_count = expected['sales_count'] if expected else 0
+            actual_count = actual['sales_count'] if actual else 0
+            self.stdout.write(f"{date}: expected {expected_count} sales, rollup has {actual_count}")
+
+        if not drift:
+            self.stdout.write(self.style.SUCCESS('Daily sales rollup is in sync'))
+        elif options['check']:
+            self.stdout.write(self.style.WARNING(f'{len(drift)} day(s) out of sync'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Repaired {len(drift)} day(s)'))
@@ -0,0 +1,16 @@
+"""Sale metrics exported at /api/metrics/; ``source`` is "api" for single sales and "bulk" for POS batches"""
+from django.db import transaction
+
+from apps.core.metrics import Counter
+
+SALES_CREATED = Counter('sales_created_total', 'Sales committed', ['source'])
+SALE_ITEMS_CREATED = Counter('sale_items_created_total', 'Sale line items committed', ['source'])
+STOCK_CHECK_FAILURES = Counter('sale_stock_check_failures_total', 'Sales rejected for insufficient stock', ['source'])
+
+
+def count_created(sales_count, items_count, source):
+    """Count sales once the surrounding transaction commits, so rolled back sales don't show up"""
+    def record():
+        SALES_CREATED.inc(sales_count, source=source)
+        SALE_ITEMS_CREATED.inc(items_count, source=source)
+    transaction.on_commit(record)
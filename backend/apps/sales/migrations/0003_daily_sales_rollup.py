@@ -0,0 +1,51 @@
+# Generated by Django 4.2.7 on 2026-10-18 18:04
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+
+def backfill_rollup(apps, schema_editor):
+    """Build the rollup rows for existing sales"""
+    Sale = apps.get_model('sales', 'Sale')
+    DailySalesRollup = apps.get_model('sales', 'DailySalesRollup')
+    
+    daily_totals = Sale.objects.annotate(day=TruncDate('created_at')).values('day').annotate(
+        sales_count=Count('id'),
+        total_amount=Sum('total_amount'),
+        discount_amount=Sum('discount_amount'),
+        net_amount=Sum('net_amount'),
+        total_cost=Sum('total_cost'),
+        total_profit=Sum('total_profit')
+    ).order_by('day')
+    
+    DailySalesRollup.objects.bulk_create([
+        DailySalesRollup(date=row.pop('day'), **row) for row in daily_totals
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0002_add_profit_tracking'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailySalesRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(unique=True)),
+                ('sales_count', models.PositiveIntegerField(default=0)),
+                ('total_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('discount_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('net_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('total_cost', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('total_profit', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['-date'],
+            },
+        ),
+        migrations.RunPython(backfill_rollup, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 18:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0003_daily_sales_rollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sale',
+            name='idempotency_key',
+            field=models.CharField(blank=True, max_length=100, null=True, unique=True),
+        ),
+    ]
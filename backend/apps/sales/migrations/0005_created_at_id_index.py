@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-18 18:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0004_sale_idempotency_key'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='sale',
+            index=models.Index(fields=['created_at', 'id'], name='sale_created_at_id_idx'),
+        ),
+    ]
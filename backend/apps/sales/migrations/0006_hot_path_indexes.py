@@ -0,0 +1,18 @@
+from django.db import migrations, models
+from apps.core.operations import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY can't run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('sales', '0005_created_at_id_index'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='sale',
+            index=models.Index(fields=['created_by', 'created_at'], name='sale_created_by_at_idx'),
+        ),
+    ]
@@ -1,3 +1,4 @@
+from decimal import Decimal
 from django.db import models
 from django.contrib.auth import get_user_model
 from apps.products.models import Product
@@ -6,6 +7,7 @@ User = get_user_model()
 
 class Sale(models.Model):
     invoice_number = models.CharField(max_length=50, unique=True)
+    idempotency_key = models.CharField(max_length=100, unique=True, null=True, blank=True)  # Set by POS batch uploads so retries are safe
     customer_name = models.CharField(max_length=100)
     customer_contact = models.CharField(max_length=15)
     total_amount = models.DecimalField(max_digits=10, decimal_places=2)
@@ -20,6 +22,12 @@ class Sale(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Keyset pagination walks (created_at, id)
+            models.Index(fields=['created_at', 'id'], name='sale_created_at_id_idx'),
+            # Per-employee performance over a date range
+            models.Index(fields=['created_by', 'created_at'], name='sale_created_by_at_idx'),
+        ]
         
     def __str__(self):
         return f"Invoice {self.invoice_number} - {self.customer_name}"
@@ -43,6 +51,22 @@ class Sale(models.Model):
         self.total_cost = total_cost
         self.total_profit = total_profit
         self.save()
+    
+    def fill_totals(self, items):
+        """Set amounts, discount and profit from unsaved items (which must have compute_totals() applied)"""
+        total_amount = sum((item.total_price for item in items), Decimal('0'))
+        total_cost = sum((item.total_cost for item in items), Decimal('0'))
+        discount_percentage = Decimal(str(self.discount_percentage))
+        
+        self.total_amount = total_amount
+        self.total_cost = total_cost
+        
+        # Apply discount
+        self.discount_amount = (total_amount * discount_percentage / 100).quantize(Decimal('0.01'))
+        self.net_amount = total_amount - self.discount_amount
+        
+        # Profit is measured after discount
+        self.total_profit = self.net_amount - total_cost
 
 class SaleItem(models.Model):
     sale = models.ForeignKey(Sale, on_delete=models.CASCADE, related_name='items')
@@ -57,11 +81,15 @@ class SaleItem(models.Model):
     class Meta:
         unique_together = ['sale', 'product']
         
-    def save(self, *args, **kwargs):
-        # Calculate totals
+    def compute_totals(self):
+        """Fill in line totals; called by save() and before bulk_create()"""
         self.total_price = self.quantity * self.unit_price
         self.total_cost = self.quantity * self.unit_cost
         self.profit = self.total_price - self.total_cost
+        
+    def save(self, *args, **kwargs):
+        # Calculate totals
+        self.compute_totals()
         super().save(*args, **kwargs)
         
     def __str__(self):
@@ -77,4 +105,21 @@ class SaleItem(models.Model):
         """Profit margin percentage for this sale item"""
         if self.unit_cost > 0:
             return ((self.unit_price - self.unit_cost) / self.unit_cost) * 100
-        return 0
\ No newline at end of file
+        return 0
+
+class DailySalesRollup(models.Model):
+    """Per-day sales totals, maintained in the same transaction as each sale"""
+    date = models.DateField(unique=True)
+    sales_count = models.PositiveIntegerField(default=0)
+    total_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)  # Before discount
+    discount_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    net_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)  # Revenue
+    total_cost = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    total_profit = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['-date']
+        
+    def __str__(self):
+        return f"{self.date} - {self.sales_count} sales"
\ No newline at end of file
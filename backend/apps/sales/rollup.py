@@ -0,0 +1,125 @@
+"""
+Maintenance and queries for the DailySalesRollup table.
+
+Every sale is folded into the row for its local calendar day so that the
+dashboard and stats endpoints aggregate a few hundred rollup rows instead of
+scanning the whole Sale table.
+"""
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from apps.core.timewindows import period_start_date
+
+from .models import DailySalesRollup, Sale
+
+ROLLUP_FIELDS = ['sales_count', 'total_amount', 'discount_amount', 'net_amount', 'total_cost', 'total_profit']
+# Sale fields the rollup is built from; changing one moves the sale's contribution
+SALE_FIELDS = ['created_at', 'total_amount', 'discount_amount', 'net_amount', 'total_cost', 'total_profit']
+
+
+def apply_to_day(date, **deltas):
+    """Add the given deltas to the rollup row for ``date``, creating it if needed"""
+    updated = DailySalesRollup.objects.filter(date=date).update(
+        **{field: F(field) + value for field, value in deltas.items()},
+        updated_at=timezone.now()
+    )
+    if updated:
+        return
+    try:
+        # Savepoint so a concurrent insert for the same day doesn't break the outer transaction
+        with transaction.atomic():
+            DailySalesRollup.objects.create(date=date, **deltas)
+    except IntegrityError:
+        DailySalesRollup.objects.filter(date=date).update(
+            **{field: F(field) + value for field, value in deltas.items()},
+            updated_at=timezone.now()
+        )
+
+
+def record_sale(sale, sign=1):
+    """Fold a sale into its day's rollup row (``sign=-1`` removes it)"""
+    apply_to_day(
+        timezone.localdate(sale.created_at),
+        sales_count=sign,
+        total_amount=sign * sale.total_amount,
+        discount_amount=sign * sale.discount_amount,
+        net_amount=sign * sale.net_amount,
+        total_cost=sign * sale.total_cost,
+        total_profit=sign * sale.total_profit,
+    )
+
+
+def daily_totals_from_sales(queryset=None):
+    """Recompute per-day totals straight from the Sale table"""
+    queryset = Sale.objects.all() if queryset is None else queryset
+    rows = queryset.annotate(day=TruncDate('created_at')).values('day').annotate(
+        sales_count=Count('id'),
+        total_amount=Sum('total_amount'),
+        discount_amount=Sum('discount_amount'),
+        net_amount=Sum('net_amount'),
+        total_cost=Sum('total_cost'),
+        total_profit=Sum('total_profit')
+    ).order_by('day')
+    return {row.pop('day'): row for row in rows}
+
+
+def reconcile(check_only=False):
+    """
+    Compare the rollup table against the Sale table and fix any drift.
+    Returns a list of (date, expected, actual) tuples for days that differed.
+    """
+    expected = daily_totals_from_sales()
+    actual = {
+        row.pop('date'): row
+        for row in DailySalesRollup.objects.values('date', *ROLLUP_FIELDS)
+    }
+
+    drift = []
+    for date in sorted(set(expected) | set(actual)):
+        want = expected.get(date)
+        have = actual.get(date)
+        # A missing row and an all-zero row are equivalent
+        if any(
+            Decimal((want or {}).get(field) or 0) != Decimal((have or {}).get(field) or 0)
+            for field in ROLLUP_FIELDS
+        ):
+            drift.append((date, want, have))
+
+    if check_only or not drift:
+        return drift
+
+    with transaction.atomic():
+        for date, want, have in drift:
+            if want is None:
+                DailySalesRollup.objects.filter(date=date).delete()
+            else:
+                DailySalesRollup.objects.update_or_create(
+                    date=date,
+                    defaults={field: want[field] or 0 for field in ROLLUP_FIELDS}
+                )
+    return drift
+
+
+def period_totals(today=None):
+    """All-time, today, week-to-date and month-to-date totals in a single query"""
+    today = today or timezone.localdate()
+    periods = {
+        'total': Q(),
+        'today': Q(date=today),
+        'week': Q(date__gte=period_start_date('week', today)),
+        'month': Q(date__gte=period_start_date('month', today)),
+    }
+    aggregates = {}
+    for period, condition in periods.items():
+        for field in ROLLUP_FIELDS:
+            aggregates[f'{period}_{field}'] = Sum(field, filter=condition)
+    totals = DailySalesRollup.objects.aggregate(**aggregates)
+    return {
+        period: {field: totals[f'{period}_{field}'] or 0 for field in ROLLUP_FIELDS}
+        for period in periods
+    }
+
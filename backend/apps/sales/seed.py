@@ -0,0 +1,396 @@
+"""
+Deterministic synthetic data for load testing.
+
+``seed_dataset(scale, seed)`` adds categories, suppliers, employees, products
+and a sales history shaped like a real shop: product popularity follows a
+Zipf distribution, daily volume has weekly and yearly seasonality plus a
+year-end peak and slow growth, most sales happen in the afternoon, and a few
+employees ring up most of the sales. The same scale and seed always produce
+the same rows. Identifiers and invoice numbers come from the usual
+sequences, so seeding an existing database only ever adds rows.
+
+Rows are written in batches, with bulk_create for the small tables and a
+plain executemany for sales and their items, and the rollup, inventory
+valuation, stock ledger, search index and dashboard cache are updated by
+hand since neither fires signals.
+"""
+import math
+import random
+import time
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import Decimal
+from itertools import accumulate
+
+from django.contrib.auth import get_user_model
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from apps.categories.models import Category
+from apps.core import identifiers
+from apps.core.cache import invalidate
+from apps.core.timewindows import day_start
+from apps.employees.models import Employee
+from apps.products.models import Product
+from apps.products.ledger import record_movements
+from apps.products.valuation import product_state, record_changes
+from apps.search.documents import index_queryset
+from apps.suppliers.models import Supplier
+from .invoices import allocate_invoice_numbers
+from .models import Sale, SaleItem
+from .rollup import apply_to_day
+
+User = get_user_model()
+
+SALE_FIELDS = [
+    'id', 'invoice_number', 'customer_name', 'customer_contact', 'total_amount', 'discount_percentage',
+    'discount_amount', 'net_amount', 'total_cost', 'total_profit', 'created_by', 'created_at', 'updated_at',
+]
+SALE_ITEM_FIELDS = ['sale', 'product', 'quantity', 'unit_price', 'unit_cost', 'total_price', 'total_cost', 'profit']
+
+# Rows per scale unit; dimension tables grow with the square root of the scale
+SALES_PER_SCALE = 10000
+PRODUCTS_PER_SCALE = 1000
+SUPPLIERS_PER_SCALE = 20
+EMPLOYEES_PER_SCALE = 8
+
+DEFAULT_DAYS = 730
+DEFAULT_BATCH_SIZE = 5000
+
+# Zipf exponent for product popularity
+ZIPF_EXPONENT = 1.1
+
+CATEGORY_NAMES = [
+    'Electronics', 'Computers', 'Phones & Accessories', 'Clothing', 'Shoes', 'Books',
+    'Home & Garden', 'Kitchen', 'Furniture', 'Toys', 'Sports', 'Beauty', 'Health',
+    'Grocery', 'Beverages', 'Stationery', 'Automotive', 'Pet Supplies', 'Jewellery', 'Music',
+]
+ADJECTIVES = [
+    'Classic', 'Premium', 'Compact', 'Deluxe', 'Eco', 'Smart', 'Ultra', 'Pro', 'Mini',
+    'Heavy Duty', 'Portable', 'Wireless', 'Organic', 'Vintage', 'Essential', 'Advanced',
+]
+NOUNS = [
+    'Widget', 'Kettle', 'Headphones', 'Backpack', 'Notebook', 'Lamp', 'Charger', 'Jacket',
+    'Sneakers', 'Blender', 'Speaker', 'Bottle', 'Chair', 'Watch', 'Camera', 'Keyboard',
+    'Mouse', 'Tent', 'Helmet', 'Shampoo', 'Coffee', 'Tea', 'Puzzle', 'Racket', 'Mug',
+]
+SUPPLIER_WORDS = ['Global', 'Prime', 'United', 'Metro', 'Apex', 'Bright', 'Summit', 'Royal', 'Star', 'Green']
+SUPPLIER_SUFFIXES = ['Traders', 'Distributors', 'Wholesale', 'Supplies', 'Imports', 'Industries']
+FIRST_NAMES = [
+    'Aarav', 'Priya', 'Rahul', 'Ananya', 'Vikram', 'Sara', 'John', 'Maria', 'Wei', 'Fatima',
+    'Omar', 'Emma', 'Liam', 'Noah', 'Olivia', 'Arjun', 'Meera', 'Ravi', 'Zara', 'Kabir',
+]
+LAST_NAMES = [
+    'Sharma', 'Khan', 'Patel', 'Singh', 'Smith', 'Garcia', 'Chen', 'Ali', 'Brown', 'Das',
+    'Iyer', 'Reddy', 'Gupta', 'Wilson', 'Lopez', 'Mehta', 'Nair', 'Kumar', 'Joshi', 'Rao',
+]
+
+ITEMS_PER_SALE = ([1, 2, 3, 4, 5, 6, 7, 8], [30, 25, 18, 11, 7, 4, 3, 2])
+QUANTITIES = ([1, 2, 3, 4, 5], [60, 20, 10, 6, 4])
+DISCOUNTS = ([Decimal('0'), Decimal('5'), Decimal('10'), Decimal('15')], [40, 35, 20, 5])
+CENT = Decimal('0.01')
+# Relative sales volume per hour of the day; the shop is open 08:00-22:00
+HOURLY_WEIGHTS = [0, 0, 0, 0, 0, 0, 0, 0, 3, 5, 7, 9, 11, 10, 8, 8, 9, 11, 12, 10, 7, 4, 0, 0]
+
+
+def scaled_counts(scale):
+    """Row counts for ``scale``"""
+    root = math.sqrt(scale)
+    return {
+        'categories': len(CATEGORY_NAMES),
+        'suppliers': max(1, round(SUPPLIERS_PER_SCALE * root)),
+        'employees': max(1, round(EMPLOYEES_PER_SCALE * root)),
+        'products': max(1, round(PRODUCTS_PER_SCALE * root)),
+        'sales': max(1, round(SALES_PER_SCALE * scale)),
+    }
+
+
+def day_weight(day, position, days):
+    """Relative sales volume of ``day``, the ``position``-th of ``days``"""
+    yearly = 1 + 0.25 * math.sin(2 * math.pi * (day.timetuple().tm_yday - 80) / 365.25)
+    weekly = 1.35 if day.weekday() >= 5 else 1.0
+    year_end = 1.6 if (day.month == 11 and day.day >= 20) or day.month == 12 else 1.0
+    growth = 1 + 0.5 * position / max(days - 1, 1)
+    return yearly * weekly * year_end * growth
+
+
+def spread(total, weights):
+    """Split ``total`` into integer parts proportional to ``weights``"""
+    weight_sum = sum(weights)
+    counts = []
+    allotted = 0
+    running = 0.0
+    for weight in weights:
+        running += weight
+        target = round(total * running / weight_sum)
+        counts.append(target - allotted)
+        allotted = target
+    return counts
+
+
+def assign_pks(model, field, objs):
+    """bulk_create only sets primary keys on backends that return them; look the rest up by ``field``"""
+    missing = [obj for obj in objs if obj.pk is None]
+    for start in range(0, len(missing), 1000):
+        chunk = missing[start:start + 1000]
+        ids = dict(model.objects.filter(
+            **{f'{field}__in': [getattr(obj, field) for obj in chunk]}
+        ).values_list(field, 'pk'))
+        for obj in chunk:
+            obj.pk = ids[getattr(obj, field)]
+    return objs
+
+
+def insert_rows(model, fields, rows):
+    """
+    INSERT tuples of database-ready values for ``fields`` with one executemany.
+
+    bulk_create() spends most of its time adapting each decimal value and
+    tops out at a few thousand rows a second, which is too slow for the
+    millions of sales and items a load test needs.
+    """
+    quote_name = connection.ops.quote_name
+    columns = ', '.join(quote_name(model._meta.get_field(field).column) for field in fields)
+    placeholders = ', '.join(['%s'] * len(fields))
+    with connection.cursor() as cursor:
+        cursor.executemany(f'INSERT INTO {quote_name(model._meta.db_table)} ({columns}) VALUES ({placeholders})', rows)
+
+
+class DatasetGenerator:
+    def __init__(self, scale=1, seed=0, days=DEFAULT_DAYS, end_date=None, batch_size=DEFAULT_BATCH_SIZE,
+                 index_search=True, progress=None):
+        self.counts = scaled_counts(scale)
+        self.rng = random.Random(seed)
+        self.days = days
+        self.end_date = end_date or timezone.localdate()
+        self.batch_size = batch_size
+        self.index_search = index_search
+        self.progress = progress or (lambda message: None)
+        self.created = defaultdict(int)
+
+    def _name(self):
+        return f'{self.rng.choice(FIRST_NAMES)} {self.rng.choice(LAST_NAMES)}'
+
+    def _phone(self):
+        return f'9{self.rng.randrange(10 ** 9):09d}'
+
+    def categories(self):
+        Category.objects.bulk_create(
+            [Category(name=name, description=f'{name} products') for name in CATEGORY_NAMES],
+            ignore_conflicts=True
+        )
+        return list(Category.objects.filter(name__in=CATEGORY_NAMES).order_by('name'))
+
+    def suppliers(self):
+        count = self.counts['suppliers']
+        suppliers = [
+            Supplier(
+                supplier_id=supplier_id,
+                name=f'{self.rng.choice(SUPPLIER_WORDS)} {self.rng.choice(SUPPLIER_WORDS)} {self.rng.choice(SUPPLIER_SUFFIXES)}',
+                contact=self._phone(),
+                description='Synthetic supplier'
+            )
+            for supplier_id in identifiers.allocate('supplier', count)
+        ]
+        Supplier.objects.bulk_create(suppliers, batch_size=self.batch_size)
+        self.created['suppliers'] = count
+        return assign_pks(Supplier, 'supplier_id', suppliers)
+
+    def employees(self):
+        """Employee records with a matching login for each; returns both lists"""
+        count = self.counts['employees']
+        employees, users = [], []
+        for eid in identifiers.allocate('employee', count):
+            first_name, last_name = self.rng.choice(FIRST_NAMES), self.rng.choice(LAST_NAMES)
+            joined = self.end_date - timedelta(days=self.rng.randrange(30, 3000))
+            born = date(self.rng.randrange(1965, 2003), self.rng.randrange(1, 13), self.rng.randrange(1, 29))
+            employees.append(Employee(
+                eid=eid,
+                name=f'{first_name} {last_name}',
+                email=f'{eid.lower()}@example.com',
+                gender=self.rng.choice(['male', 'female', 'other']),
+                contact=self._phone(),
+                date_of_birth=born,
+                date_of_joining=joined,
+                password='!',  # Unusable
+                user_type='employee',
+                address=f'{self.rng.randrange(1, 999)} Market Road',
+                salary=Decimal(self.rng.randrange(20000, 90000))
+            ))
+            users.append(User(
+                username=eid.lower(),
+                first_name=first_name,
+                last_name=last_name,
+                email=f'{eid.lower()}@example.com',
+                password='!',  # Unusable
+                user_type='employee',
+                date_of_birth=born,
+                date_of_joining=joined
+            ))
+        Employee.objects.bulk_create(employees, batch_size=self.batch_size)
+        User.objects.bulk_create(users, batch_size=self.batch_size)
+        self.created['employees'] = count
+        return assign_pks(Employee, 'eid', employees), assign_pks(User, 'username', users)
+
+    def products(self, categories, suppliers):
+        count = self.counts['products']
+        products = []
+        for code in identifiers.allocate('product', count):
+            buy_price = Decimal(str(round(min(self.rng.lognormvariate(4, 1.1), 50000), 2))).quantize(CENT)
+            buy_price = max(buy_price, Decimal('1.00'))
+            sell_price = (buy_price * Decimal(str(round(self.rng.uniform(1.1, 1.8), 2)))).quantize(CENT)
+            # Roughly one product in twenty is running low
+            quantity = self.rng.randrange(0, 11) if self.rng.random() < 0.05 else self.rng.randrange(11, 500)
+            products.append(Product(
+                code=code,
+                category=self.rng.choice(categories),
+                supplier=self.rng.choice(suppliers),
+                name=f'{self.rng.choice(ADJECTIVES)} {self.rng.choice(NOUNS)} {self.rng.randrange(100, 999)}',
+                buy_price=buy_price,
+                sell_price=sell_price,
+                price=sell_price,
+                quantity=quantity,
+                status='active' if self.rng.random() < 0.95 else 'inactive'
+            ))
+        Product.objects.bulk_create(products, batch_size=self.batch_size)
+        assign_pks(Product, 'code', products)
+        changes = [(None, product_state(product)) for product in products]
+        record_changes(changes)
+        record_movements(changes, 'initial')
+        self.created['products'] = count
+        return products
+
+    def _sales_for_day(self, day, count, products, product_weights, users, user_weights):
+        """Sale rows for ``day`` in time order (without ids), each paired with its item rows (without sale ids)"""
+        midnight = day_start(day)
+        offsets = sorted(
+            hour * 3600 + self.rng.randrange(3600)
+            for hour in self.rng.choices(range(24), weights=HOURLY_WEIGHTS, k=count)
+        )
+        invoice_numbers = allocate_invoice_numbers(count, day=day)
+        sellers = self.rng.choices(users, cum_weights=user_weights, k=count)
+        sizes = self.rng.choices(*ITEMS_PER_SALE, k=count)
+        discounts = self.rng.choices(*DISCOUNTS, k=count)
+        picks = iter(self.rng.choices(products, cum_weights=product_weights, k=sum(sizes)))
+        quantities = iter(self.rng.choices(*QUANTITIES, k=sum(sizes)))
+        adapt_datetime = connection.ops.adapt_datetimefield_value
+
+        sales = []
+        for offset, invoice_number, seller, size, discount_percentage in zip(offsets, invoice_numbers, sellers, sizes, discounts):
+            # One line per product, as the sale form enforces
+            lines = {}
+            for _ in range(size):
+                product, quantity = next(picks), next(quantities)
+                if product.pk not in lines:
+                    lines[product.pk] = (product, quantity)
+
+            # Same arithmetic as SaleItem.compute_totals() and Sale.fill_totals()
+            items = []
+            total_amount = total_cost = Decimal('0')
+            for product, quantity in lines.values():
+                line_price = quantity * product.sell_price
+                line_cost = quantity * product.buy_price
+                items.append((product.pk, quantity, product.sell_price, product.buy_price,
+                              line_price, line_cost, line_price - line_cost))
+                total_amount += line_price
+                total_cost += line_cost
+            discount_amount = (total_amount * discount_percentage / 100).quantize(CENT)
+            net_amount = total_amount - discount_amount
+
+            totals = {
+                'total_amount': total_amount,
+                'discount_amount': discount_amount,
+                'net_amount': net_amount,
+                'total_cost': total_cost,
+                'total_profit': net_amount - total_cost,
+            }
+            created_at = adapt_datetime(midnight + timedelta(seconds=offset))
+            sale = (
+                invoice_number, self._name(), self._phone(), totals['total_amount'], discount_percentage,
+                totals['discount_amount'], totals['net_amount'], totals['total_cost'], totals['total_profit'],
+                seller.pk, created_at, created_at
+            )
+            sales.append((sale, items, day, totals))
+        return sales
+
+    def _write_sales(self, batch):
+        daily = defaultdict(lambda: defaultdict(int))
+        with transaction.atomic():
+            # Ids are handed out here so the items can point at their sales without
+            # reading them back; seed a database nothing else is writing sales to
+            next_id = (Sale.objects.aggregate(last_id=Max('pk'))['last_id'] or 0) + 1
+            sale_rows, item_rows = [], []
+            for sale_id, (sale, items, day, totals) in enumerate(batch, start=next_id):
+                sale_rows.append((sale_id,) + sale)
+                item_rows.extend((sale_id,) + item for item in items)
+                daily[day]['sales_count'] += 1
+                for field, value in totals.items():
+                    daily[day][field] += value
+            insert_rows(Sale, SALE_FIELDS, sale_rows)
+            insert_rows(SaleItem, SALE_ITEM_FIELDS, item_rows)
+            for day, day_totals in daily.items():
+                apply_to_day(day, **day_totals)
+
+        self.created['sales'] += len(sale_rows)
+        self.created['sale_items'] += len(item_rows)
+
+    def sales(self, products, users):
+        # Popularity rank is independent of insertion order
+        ranked = list(products)
+        self.rng.shuffle(ranked)
+        product_weights = list(accumulate(1 / rank ** ZIPF_EXPONENT for rank in range(1, len(ranked) + 1)))
+        user_weights = list(accumulate(self.rng.lognormvariate(0, 0.6) for _ in users))
+
+        start_date = self.end_date - timedelta(days=self.days - 1)
+        calendar = [start_date + timedelta(days=offset) for offset in range(self.days)]
+        per_day = spread(self.counts['sales'], [day_weight(day, position, self.days) for position, day in enumerate(calendar)])
+
+        batch = []
+        started = time.monotonic()
+        for day, count in zip(calendar, per_day):
+            if not count:
+                continue
+            batch.extend(self._sales_for_day(day, count, ranked, product_weights, users, user_weights))
+            if len(batch) >= self.batch_size:
+                self._write_sales(batch)
+                batch = []
+                elapsed = time.monotonic() - started
+                self.progress(
+                    f"{self.created['sales']} sales / {self.created['sale_items']} items "
+                    f"({self.created['sale_items'] / elapsed:.0f} items/s)"
+                )
+        if batch:
+            self._write_sales(batch)
+
+        # PostgreSQL sequences don't notice explicit ids; on SQLite this is a no-op
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(no_style(), [Sale]):
+                cursor.execute(sql)
+
+    def run(self):
+        categories = self.categories()
+        suppliers = self.suppliers()
+        employees, users = self.employees()
+        products = self.products(categories, suppliers)
+        self.progress(
+            f"{len(categories)} categories, {len(suppliers)} suppliers, "
+            f"{len(users)} employees, {len(products)} products"
+        )
+        first_sale_id = (Sale.objects.order_by('-pk').values_list('pk', flat=True).first() or 0) + 1
+        self.sales(products, users)
+
+        if self.index_search:
+            self.progress('Indexing for search')
+            index_queryset('supplier', Supplier.objects.filter(pk__gte=min(supplier.pk for supplier in suppliers)))
+            index_queryset('employee', Employee.objects.filter(pk__gte=min(employee.pk for employee in employees)))
+            index_queryset('product', Product.objects.filter(pk__gte=min(product.pk for product in products)))
+            index_queryset('sale', Sale.objects.filter(pk__gte=first_sale_id))
+        transaction.on_commit(lambda: invalidate('dashboard'))
+        return dict(self.created)
+
+
+def seed_dataset(scale=1, seed=0, **options):
+    """Generate a dataset; returns the number of rows created per table"""
+    return DatasetGenerator(scale=scale, seed=seed, **options).run()
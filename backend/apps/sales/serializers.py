@@ -1,7 +1,16 @@
 from rest_framework import serializers
+from django.db import IntegrityError, transaction
+from decimal import Decimal
+from apps.core.serializers import SparseFieldsMixin
 from .models import Sale, SaleItem
+from .rollup import record_sale
+from .invoices import MAX_RESERVATION, STORE_CODE_PATTERN, check_invoice_number, unissued_invoice_numbers
+from .metrics import STOCK_CHECK_FAILURES, count_created
+from .stock import InsufficientStock, lock_products, find_shortages, decrement_stock
 from apps.products.serializers import ProductListSerializer
 
+DUPLICATE_INVOICE = "Sale with this invoice number already exists."
+
 class SaleItemSerializer(serializers.ModelSerializer):
     product_name = serializers.CharField(source='product.name', read_only=True)
     profit_per_unit = serializers.ReadOnlyField()
@@ -19,67 +28,93 @@ class SaleSerializer(serializers.ModelSerializer):
     items = SaleItemSerializer(many=True)
     created_by_name = serializers.CharField(source='created_by.username', read_only=True)
     profit_margin_percentage = serializers.ReadOnlyField()
+    invoice_number = serializers.CharField(required=False, allow_blank=True, max_length=50)  # Pre-allocated numbers from offline terminals
     
     class Meta:
         model = Sale
         fields = '__all__'
-        read_only_fields = ['created_by', 'invoice_number', 'total_amount', 'discount_amount', 'net_amount', 'total_cost', 'total_profit']
+        read_only_fields = ['created_by', 'total_amount', 'discount_amount', 'net_amount', 'total_cost', 'total_profit']
+    
+    def validate_invoice_number(self, value):
+        """Accept a pre-allocated invoice number on creation; it can't be changed afterwards"""
+        if self.instance:
+            if value and value != self.instance.invoice_number:
+                raise serializers.ValidationError("Invoice number cannot be changed.")
+            return self.instance.invoice_number
+        if not value:
+            return value
+        try:
+            check_invoice_number(value)
+        except ValueError as exc:
+            raise serializers.ValidationError(str(exc))
+        if unissued_invoice_numbers([value]):
+            raise serializers.ValidationError("Invoice number hasn't been reserved.")
+        if Sale.objects.filter(invoice_number=value).exists():
+            raise serializers.ValidationError(DUPLICATE_INVOICE)
+        return value
+    
+    def validate_items(self, value):
+        if not value:
+            raise serializers.ValidationError("A sale needs at least one item.")
+        product_ids = [item['product'].id for item in value]
+        if len(product_ids) != len(set(product_ids)):
+            raise serializers.ValidationError("Each product can only appear once per sale.")
+        return value
     
+    @transaction.atomic
     def create(self, validated_data):
         items_data = validated_data.pop('items')
+        quantities = {item_data['product'].id: item_data['quantity'] for item_data in items_data}
         
-        # Set default values for calculated fields
-        validated_data['total_amount'] = 0
-        validated_data['discount_amount'] = 0
-        validated_data['net_amount'] = 0
-        validated_data['total_cost'] = 0
-        validated_data['total_profit'] = 0
-        
-        sale = Sale.objects.create(**validated_data)
-        
-        total_amount = 0
-        total_cost = 0
+        # Lock every product in one query (ordered by id) and check all lines together
+        products = lock_products(quantities)
+        shortages = find_shortages(products, quantities)
+        if shortages:
+            STOCK_CHECK_FAILURES.inc(source='api')
+            raise serializers.ValidationError([str(shortage) for shortage in shortages])
         
+        sale = Sale(**validated_data)
+        items = []
         for item_data in items_data:
-            product = item_data['product']
-            
-            # Set unit_cost from product's buy_price
-            item_data['unit_cost'] = product.buy_price
-            
-            item = SaleItem.objects.create(sale=sale, **item_data)
-            total_amount += item.total_price
-            total_cost += item.total_cost
-            
-            # Update product quantity
-            if product.quantity >= item.quantity:
-                product.quantity -= item.quantity
-                if product.quantity <= 0:
-                    product.status = 'inactive'
-                product.save()
-            else:
-                # Delete the sale if stock validation fails
-                sale.delete()
-                raise serializers.ValidationError(f"Insufficient stock for {product.name}. Available: {product.quantity}, Requested: {item.quantity}")
+            product = products[item_data['product'].id]
+            item = SaleItem(
+                product=product,
+                quantity=item_data['quantity'],
+                unit_price=item_data['unit_price'],
+                # Cost comes from the locked row, not the copy loaded during validation
+                unit_cost=product.buy_price
+            )
+            item.compute_totals()
+            items.append(item)
         
-        # Calculate totals
-        sale.total_amount = total_amount
-        sale.total_cost = total_cost
-        sale.total_profit = total_amount - total_cost
+        sale.fill_totals(items)
+        try:
+            with transaction.atomic():
+                sale.save()
+        except IntegrityError:
+            # Another request saved the same invoice number since validation
+            if Sale.objects.filter(invoice_number=sale.invoice_number).exists():
+                raise serializers.ValidationError({'invoice_number': [DUPLICATE_INVOICE]})
+            raise
         
-        # Apply discount
-        discount_amount = (total_amount * sale.discount_percentage) / 100
-        sale.discount_amount = discount_amount
-        sale.net_amount = total_amount - discount_amount
+        for item in items:
+            item.sale = sale
+        SaleItem.objects.bulk_create(items)
         
-        # Adjust profit for discount
-        sale.total_profit = sale.net_amount - total_cost
+        try:
+            decrement_stock(products, quantities, reference=sale.invoice_number)
+        except InsufficientStock as exc:
+            STOCK_CHECK_FAILURES.inc(source='api')
+            raise serializers.ValidationError(str(exc))
         
-        sale.save()
+        # Keep the daily rollup in step with the sale, inside the same transaction
+        record_sale(sale)
+        count_created(1, len(items), source='api')
         return sale
 
-class SaleListSerializer(serializers.ModelSerializer):
+class SaleListSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     created_by_name = serializers.CharField(source='created_by.username', read_only=True)
-    items_count = serializers.IntegerField(source='items.count', read_only=True)
+    items_count = serializers.IntegerField(read_only=True)  # Annotated by the list view
     profit_margin_percentage = serializers.ReadOnlyField()
     
     class Meta:
@@ -88,4 +123,37 @@ class SaleListSerializer(serializers.ModelSerializer):
             'id', 'invoice_number', 'customer_name', 'customer_contact',
             'total_amount', 'discount_amount', 'net_amount', 'total_cost', 'total_profit',
             'profit_margin_percentage', 'items_count', 'created_by_name', 'created_at'
-        ]
\ No newline at end of file
+        ]
+
+class InvoiceReservationSerializer(serializers.Serializer):
+    count = serializers.IntegerField(min_value=1, max_value=MAX_RESERVATION)
+    store = serializers.RegexField(STORE_CODE_PATTERN, required=False, help_text="Store or terminal code, letters and digits only")
+
+class BulkSaleItemSerializer(serializers.Serializer):
+    product = serializers.IntegerField(min_value=1)  # Resolved for the whole batch in one query
+    quantity = serializers.IntegerField(min_value=1)
+    unit_price = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=0)
+
+class BulkSaleSerializer(serializers.Serializer):
+    """One sale from a POS batch upload; validation runs no queries"""
+    idempotency_key = serializers.CharField(max_length=100)
+    invoice_number = serializers.CharField(max_length=50, required=False, allow_blank=True)
+    customer_name = serializers.CharField(max_length=100)
+    customer_contact = serializers.CharField(max_length=15)
+    discount_percentage = serializers.DecimalField(max_digits=5, decimal_places=2, min_value=0, max_value=100, default=Decimal('5.00'))
+    items = BulkSaleItemSerializer(many=True, allow_empty=False)
+    
+    def validate_invoice_number(self, value):
+        # Whether the number has been reserved and is still free is checked for the whole batch at once
+        if value:
+            try:
+                check_invoice_number(value)
+            except ValueError as exc:
+                raise serializers.ValidationError(str(exc))
+        return value
+    
+    def validate_items(self, value):
+        product_ids = [item['product'] for item in value]
+        if len(product_ids) != len(set(product_ids)):
+            raise serializers.ValidationError("Each product can only appear once per sale.")
+        return value
\ No newline at end of file
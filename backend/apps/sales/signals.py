@@ -0,0 +1,38 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from .models import Sale
+from .rollup import SALE_FIELDS, record_sale
+
+@receiver(pre_save, sender=Sale)
+def read_rollup_before_save(sender, instance, **kwargs):
+    """Remember the stored totals of an existing sale, locked until the end of the transaction if there is one"""
+    instance._rollup_before = None
+    if instance.pk is None:
+        return
+    sales = Sale.objects.filter(pk=instance.pk).only(*SALE_FIELDS)
+    if transaction.get_connection(sales.db).in_atomic_block:
+        sales = sales.select_for_update()
+    instance._rollup_before = sales.first()
+
+@receiver(post_save, sender=Sale)
+def update_rollup_after_save(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Move an edited sale (API, admin or calculate_totals()) from its old day
+    and amounts to the saved ones. New sales are folded in by whoever creates them.
+    """
+    before = getattr(instance, '_rollup_before', None)
+    if created or before is None:
+        return
+    # Fields left out of update_fields keep their stored values
+    saved = [field for field in SALE_FIELDS if update_fields is None or field in update_fields]
+    if all(getattr(instance, field) == getattr(before, field) for field in saved):
+        return
+    after = Sale(**{field: getattr(instance if field in saved else before, field) for field in SALE_FIELDS})
+    record_sale(before, sign=-1)
+    record_sale(after)
+
+@receiver(post_delete, sender=Sale)
+def remove_sale_from_rollup(sender, instance, **kwargs):
+    """Subtract deleted sales (API, admin or cascades) from the daily rollup"""
+    record_sale(instance, sign=-1)
\ No newline at end of file
@@ -0,0 +1,84 @@
+"""
+Stock locking and decrement helpers shared by the sale creation paths.
+
+Products are always locked in primary key order so that two checkouts
+touching the same products can never deadlock, and every decrement is a
+conditional UPDATE so stock can't go negative even where SELECT ... FOR
+UPDATE is a no-op (SQLite).
+"""
+from django.db import connections, router
+from django.db.models import Case, F, Value, When
+from django.utils import timezone
+
+from apps.products.models import Product
+from apps.products.ledger import record_movements
+from apps.products.lowstock import record_crossings
+from apps.products.valuation import product_state, record_changes
+
+
+class InsufficientStock(Exception):
+    """Raised when a conditional decrement finds less stock than requested"""
+
+    def __init__(self, product, requested, available=None):
+        self.product = product
+        self.requested = requested
+        self.available = product.quantity if available is None else available
+        super().__init__(
+            f"Insufficient stock for {product.name}. Available: {self.available}, Requested: {requested}"
+        )
+
+
+def lock_products(product_ids):
+    """Lock the given products with one SELECT ... FOR UPDATE, ordered by id"""
+    product_ids = set(product_ids)
+    connection = connections[router.db_for_write(Product)]
+    if not connection.features.has_select_for_update:
+        # SQLite ignores FOR UPDATE and fails a read lock that later upgrades to a write
+        # with "database is locked"; a no-op write takes the write lock up front instead,
+        # so concurrent checkouts queue on the busy timeout
+        Product.objects.filter(id__in=product_ids).update(quantity=F('quantity'))
+    products = Product.objects.select_for_update().filter(id__in=product_ids).order_by('id')
+    return {product.id: product for product in products}
+
+
+def find_shortages(products, quantities):
+    """Check every requested quantity against the locked rows; returns a list of InsufficientStock"""
+    return [
+        InsufficientStock(products[product_id], quantity)
+        for product_id, quantity in sorted(quantities.items())
+        if products[product_id].quantity < quantity
+    ]
+
+
+def decrement_stock(products, quantities, reference=''):
+    """
+    Decrement each product with a single conditional UPDATE.
+    Products that run out are marked inactive, as the per-item save() used to.
+    The inventory valuation is updated by the same amounts, each decrement
+    goes into the stock ledger with ``reference`` (the invoice number of a
+    single sale), and products that cross their reorder point get a
+    low-stock event.
+    """
+    now = timezone.now()
+    changes = []
+    for product_id, quantity in sorted(quantities.items()):
+        updated = Product.objects.filter(id=product_id, quantity__gte=quantity).update(
+            quantity=F('quantity') - quantity,
+            status=Case(When(quantity=quantity, then=Value('inactive')), default=F('status')),
+            updated_at=now
+        )
+        if not updated:
+            raise InsufficientStock(products[product_id], quantity)
+
+        # Mirror the new values on the locked instance for callers that keep using it
+        product = products[product_id]
+        before = product_state(product)
+        product.quantity -= quantity
+        if product.quantity <= 0:
+            product.status = 'inactive'
+        product.updated_at = now
+        changes.append((before, product_state(product)))
+
+    record_changes(changes)
+    record_movements(changes, 'sale', reference)
+    record_crossings(changes)
@@ -0,0 +1,4 @@
+from apps.jobs.queue import register
+from .views import build_sales_report
+
+register('sales.report', build_sales_report)
\ No newline at end of file
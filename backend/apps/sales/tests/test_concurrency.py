@@ -0,0 +1,67 @@
+"""
+Concurrent checkouts against one product.
+
+Each thread posts a sale through the API on its own database connection, so
+the sales race for the product's row lock exactly as separate requests do.
+"""
+import threading
+from decimal import Decimal
+
+from django.db import connection
+from django.db.models import Sum
+from django.test import TransactionTestCase
+from rest_framework.test import APIClient
+
+from apps.authentication.models import User
+from apps.categories.models import Category
+from apps.products.models import Product
+from apps.sales.models import SaleItem
+from apps.suppliers.models import Supplier
+
+
+class ConcurrentSaleTests(TransactionTestCase):
+    stock = 5
+    buyers = 12
+
+    def setUp(self):
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            self.skipTest('Needs a database file (or server) that separate connections can lock')
+        self.user = User.objects.create_user('cashier', 'cashier@example.com', 'password')
+        self.product = Product.objects.create(
+            code='PRD0001',
+            category=Category.objects.create(name='Tools'),
+            supplier=Supplier.objects.create(supplier_id='SUP0001', name='Acme', contact='555'),
+            name='Hammer',
+            buy_price=Decimal('5.00'),
+            sell_price=Decimal('8.00'),
+            price=Decimal('8.00'),
+            quantity=self.stock
+        )
+
+    def sell_one(self, start, statuses):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        try:
+            start.wait()
+            response = client.post('/api/sales/', {
+                'customer_name': 'Walk-in',
+                'customer_contact': '555',
+                'items': [{'product': self.product.pk, 'quantity': 1, 'unit_price': '8.00'}],
+            }, format='json')
+            statuses.append(response.status_code)
+        finally:
+            connection.close()
+
+    def test_parallel_sales_never_oversell(self):
+        start = threading.Barrier(self.buyers)
+        statuses = []
+        threads = [threading.Thread(target=self.sell_one, args=(start, statuses)) for _ in range(self.buyers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.product.refresh_from_db()
+        self.assertEqual(sorted(statuses), [201] * self.stock + [400] * (self.buyers - self.stock))
+        self.assertEqual(self.product.quantity, 0)
+        self.assertEqual(SaleItem.objects.filter(product=self.product).aggregate(sold=Sum('quantity'))['sold'], self.stock)
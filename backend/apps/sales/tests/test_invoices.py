@@ -0,0 +1,72 @@
+"""Client-supplied invoice numbers, e.g. from a terminal that sold offline."""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from apps.authentication.models import User
+from apps.categories.models import Category
+from apps.products.models import Product
+from apps.sales.invoices import allocate_invoice_numbers, format_invoice_number
+from apps.sales.models import Sale
+from apps.suppliers.models import Supplier
+
+
+class SuppliedInvoiceNumberTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('cashier', 'cashier@example.com', 'password')
+        cls.product = Product.objects.create(
+            code='PRD0001',
+            category=Category.objects.create(name='Tools'),
+            supplier=Supplier.objects.create(supplier_id='SUP0001', name='Acme', contact='555'),
+            name='Hammer',
+            buy_price=Decimal('5.00'),
+            sell_price=Decimal('8.00'),
+            price=Decimal('8.00'),
+            quantity=50
+        )
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+        self.yesterday = timezone.localdate() - timedelta(days=1)
+
+    def sale(self, **extra):
+        return {
+            'customer_name': 'Walk-in',
+            'customer_contact': '555',
+            'items': [{'product': self.product.pk, 'quantity': 1, 'unit_price': '8.00'}],
+            **extra,
+        }
+
+    def test_sync_numbers_reserved_the_day_before(self):
+        single, batched = allocate_invoice_numbers(count=2, store='t1', day=self.yesterday)
+
+        response = self.client.post('/api/sales/', self.sale(invoice_number=single), format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(response.data['invoice_number'], single)
+
+        response = self.client.post('/api/sales/bulk/', [self.sale(idempotency_key='offline-1', invoice_number=batched)], format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'][0]['status'], 'created', response.data)
+        self.assertEqual(Sale.objects.filter(invoice_number__in=[single, batched]).count(), 2)
+
+    def test_numbers_not_yet_reserved_are_rejected(self):
+        allocate_invoice_numbers(count=1, store='t1', day=self.yesterday)
+        unissued = format_invoice_number(self.yesterday, 2, 't1')
+
+        response = self.client.post('/api/sales/', self.sale(invoice_number=unissued), format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('invoice_number', response.data)
+
+        response = self.client.post('/api/sales/bulk/', [self.sale(idempotency_key='offline-2', invoice_number=unissued)], format='json')
+        self.assertEqual(response.data['results'][0]['status'], 'error')
+
+    def test_malformed_and_reused_numbers_are_rejected(self):
+        number, = allocate_invoice_numbers()
+        self.assertEqual(self.client.post('/api/sales/', self.sale(invoice_number=number), format='json').status_code, 201)
+        for value in ['free-form', number]:
+            response = self.client.post('/api/sales/', self.sale(invoice_number=value), format='json')
+            self.assertEqual(response.status_code, 400, value)
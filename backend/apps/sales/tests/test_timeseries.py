@@ -0,0 +1,150 @@
+"""/api/dashboard/timeseries/ buckets agree with the sales they summarise."""
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Count, Sum
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient, APITestCase
+
+from apps.authentication.models import User
+from apps.categories.models import Category
+from apps.core.timewindows import filter_range
+from apps.products.models import Product
+from apps.sales.models import Sale, SaleItem
+from apps.sales.timeseries import MAX_BUCKETS
+from apps.suppliers.models import Supplier
+
+# (local time, [(product, quantity)]); 2026-03-02 is a Monday
+SALES = [
+    (datetime(2026, 3, 2, 9, 15), [('hammer', 2)]),
+    (datetime(2026, 3, 2, 9, 40), [('rake', 1)]),
+    (datetime(2026, 3, 2, 14, 5), [('hammer', 1), ('rake', 1)]),
+    (datetime(2026, 3, 4, 10, 0), [('rake', 2)]),
+    (datetime(2026, 3, 10, 11, 0), [('hammer', 3)]),
+    (datetime(2026, 4, 1, 8, 0), [('hammer', 1)]),
+]
+
+
+class SalesTimeseriesTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('manager', 'manager@example.com', 'password', user_type='admin')
+        supplier = Supplier.objects.create(supplier_id='SUP0001', name='Acme', contact='555')
+        products = {
+            'hammer': Product.objects.create(
+                code='PRD0001', category=Category.objects.create(name='Tools'), supplier=supplier, name='Hammer',
+                buy_price=Decimal('5.00'), sell_price=Decimal('8.00'), price=Decimal('8.00'), quantity=100
+            ),
+            'rake': Product.objects.create(
+                code='PRD0002', category=Category.objects.create(name='Garden'), supplier=supplier, name='Rake',
+                buy_price=Decimal('12.00'), sell_price=Decimal('20.00'), price=Decimal('20.00'), quantity=100
+            ),
+        }
+
+        client = APIClient()
+        client.force_authenticate(cls.user)
+        for created_at, items in SALES:
+            response = client.post('/api/sales/', {
+                'customer_name': 'Walk-in',
+                'customer_contact': '555',
+                'discount_percentage': '0',
+                'items': [
+                    {'product': products[name].pk, 'quantity': quantity, 'unit_price': str(products[name].price)}
+                    for name, quantity in items
+                ],
+            }, format='json')
+            assert response.status_code == 201, response.data
+            # Saving the new time moves the sale to that day's rollup row too
+            sale = Sale.objects.get(pk=response.data['id'])
+            sale.created_at = timezone.make_aware(created_at)
+            sale.save(update_fields=['created_at'])
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_authenticate(self.user)
+
+    def get_series(self, **params):
+        response = self.client.get('/api/dashboard/timeseries/', params)
+        self.assertEqual(response.status_code, 200, response.data)
+        return response.data
+
+    def assertMatchesSales(self, series, end, queryset=None, metrics=None):
+        """Every bucket holds the sums of the sales from its start to the next bucket's"""
+        queryset = Sale.objects.all() if queryset is None else queryset
+        created_at = 'sale__created_at' if queryset.model is SaleItem else 'created_at'
+        bounds = [datetime.fromisoformat(point['bucket']) for point in series] + [end]
+        for point, bucket_start, bucket_end in zip(series, bounds, bounds[1:]):
+            expected = filter_range(queryset, created_at, bucket_start, bucket_end).aggregate(**metrics or {
+                'revenue': Sum('net_amount'), 'profit': Sum('total_profit'), 'count': Count('id'),
+            })
+            for metric, value in expected.items():
+                self.assertEqual(point[metric], value if metric == 'count' else float(value or 0), (point['bucket'], metric))
+
+    def local_midnight(self, day):
+        return timezone.make_aware(datetime.combine(day, datetime.min.time()))
+
+    def test_hour_buckets_are_zero_filled(self):
+        with CaptureQueriesContext(connection) as queries:
+            data = self.get_series(granularity='hour', start_date='2026-03-02', end_date='2026-03-02')
+
+        series = data['series']
+        self.assertEqual(len(series), 24)
+        self.assertEqual([(point['revenue'], point['count']) for point in series if point['count']], [(36.0, 2), (28.0, 1)])
+        self.assertEqual((series[0]['revenue'], series[0]['count']), (0.0, 0))
+        self.assertMatchesSales(series, self.local_midnight(date(2026, 3, 3)))
+        # Hourly totals group the sales themselves
+        self.assertFalse(any('sales_dailysalesrollup' in query['sql'] for query in queries.captured_queries))
+
+    def test_rollup_backed_buckets_match_sales(self):
+        expected_lengths = {'day': 61, 'week': 10, 'month': 2}
+        end = self.local_midnight(date(2026, 5, 1))
+        for granularity, length in expected_lengths.items():
+            with self.subTest(granularity=granularity):
+                with CaptureQueriesContext(connection) as queries:
+                    data = self.get_series(granularity=granularity, start_date='2026-03-01', end_date='2026-04-30')
+
+                series = data['series']
+                self.assertEqual(len(series), length)
+                self.assertTrue(any('sales_dailysalesrollup' in query['sql'] for query in queries.captured_queries))
+                # The first week starts before the range; only its days inside the range count
+                first = self.local_midnight(date(2026, 3, 1))
+                self.assertMatchesSales(series, end, Sale.objects.filter(created_at__gte=first))
+                self.assertEqual(sum(point['revenue'] for point in series), 136.0)
+
+        months = self.get_series(granularity='month', start_date='2026-03-01', end_date='2026-04-30')['series']
+        self.assertEqual([(point['bucket'][:10], point['revenue'], point['count']) for point in months], [
+            ('2026-03-01', 128.0, 5), ('2026-04-01', 8.0, 1),
+        ])
+
+    def test_category_breakdown(self):
+        data = self.get_series(granularity='day', start_date='2026-03-02', end_date='2026-03-04', breakdown='category')
+
+        groups = data['groups']
+        self.assertEqual([(group['name'], group['totals']['revenue'], group['totals']['count']) for group in groups], [
+            ('Garden', 80.0, 3), ('Tools', 24.0, 2),
+        ])
+        end = self.local_midnight(date(2026, 3, 5))
+        for group in groups:
+            with self.subTest(category=group['name']):
+                self.assertMatchesSales(group['series'], end, SaleItem.objects.filter(product__category=group['id']), {
+                    'revenue': Sum('total_price'), 'profit': Sum('profit'), 'count': Count('sale', distinct=True),
+                })
+
+        limited = self.get_series(granularity='day', start_date='2026-03-02', end_date='2026-03-04', breakdown='category', limit=1)
+        self.assertEqual([group['name'] for group in limited['groups']], ['Garden'])
+
+    def test_too_many_buckets(self):
+        days = MAX_BUCKETS // 24 + 1
+        response = self.client.get('/api/dashboard/timeseries/', {'granularity': 'hour', 'days': days})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('granularity', response.data)
+
+    def test_invalid_parameters(self):
+        for params in ({'granularity': 'minute'}, {'breakdown': 'colour'}, {'start_date': '2026-03-05', 'end_date': '2026-03-01'}):
+            with self.subTest(params=params):
+                self.assertEqual(self.client.get('/api/dashboard/timeseries/', params).status_code, 400)
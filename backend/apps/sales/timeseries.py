@@ -0,0 +1,195 @@
+"""
+Revenue, cost, profit and sale-count series bucketed by hour, day, week or month.
+
+Each series comes from one grouped query, with the missing buckets filled
+with zeros here. Day, week and month totals read the DailySalesRollup table;
+hourly totals and every breakdown group the sales themselves with Trunc in the
+current timezone.
+
+Breakdowns by category or supplier are summed per sale item, so their revenue
+and profit are before the sale-level discount, as in the dashboard's category
+charts; employee breakdowns use the sale totals.
+"""
+from datetime import timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+from django.db.models import Count, DateField, F, Sum
+from django.db.models.functions import Trunc
+from django.utils import timezone
+
+from apps.core.timewindows import day_start, filter_range
+from .models import DailySalesRollup, Sale, SaleItem
+
+GRANULARITIES = ('hour', 'day', 'week', 'month')
+
+# Longest series a single request may ask for
+MAX_BUCKETS = 1000
+
+METRICS = ('revenue', 'cost', 'profit', 'count')
+
+SALE_METRICS = {
+    'revenue': Sum('net_amount'),
+    'cost': Sum('total_cost'),
+    'profit': Sum('total_profit'),
+    'count': Count('id'),
+}
+
+ITEM_METRICS = {
+    'revenue': Sum('total_price'),
+    'cost': Sum('total_cost'),
+    'profit': Sum('profit'),
+    'count': Count('sale', distinct=True),
+}
+
+# breakdown -> (model, group id field, label fields)
+BREAKDOWNS = {
+    'category': (SaleItem, 'product__category', ['product__category__name']),
+    'supplier': (SaleItem, 'product__supplier', ['product__supplier__name']),
+    'employee': (Sale, 'created_by', ['created_by__username', 'created_by__first_name', 'created_by__last_name']),
+}
+
+
+def _truncate_date(day, granularity):
+    if granularity == 'week':
+        return day - timedelta(days=day.weekday())
+    if granularity == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def _next_date(day, granularity):
+    if granularity == 'week':
+        return day + timedelta(days=7)
+    if granularity == 'month':
+        return (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return day + timedelta(days=1)
+
+
+def bucket_starts(start, end, granularity):
+    """Local start of every ``granularity`` bucket overlapping [start, end)"""
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"Unknown granularity '{granularity}', expected one of: {', '.join(GRANULARITIES)}")
+
+    buckets = []
+    if granularity == 'hour':
+        current = timezone.localtime(start).replace(minute=0, second=0, microsecond=0)
+        while current < end:
+            buckets.append(current)
+            # Step in UTC so DST changes don't repeat or skip an hour
+            current = timezone.localtime(current.astimezone(dt_timezone.utc) + timedelta(hours=1))
+            if len(buckets) > MAX_BUCKETS:
+                break
+    else:
+        day = _truncate_date(timezone.localdate(start), granularity)
+        while day_start(day) < end:
+            buckets.append(day_start(day))
+            day = _next_date(day, granularity)
+            if len(buckets) > MAX_BUCKETS:
+                break
+
+    if len(buckets) > MAX_BUCKETS:
+        raise ValueError(f'Too many {granularity} buckets; at most {MAX_BUCKETS} are allowed')
+    return buckets
+
+
+def _empty_point():
+    return {metric: Decimal(0) if metric != 'count' else 0 for metric in METRICS}
+
+
+def _fill(buckets, rows):
+    """Zero-filled points for ``buckets`` from a {bucket start: metrics} dict"""
+    series = []
+    for bucket in buckets:
+        point = rows.get(bucket) or _empty_point()
+        series.append(dict({'bucket': bucket.isoformat()}, **{
+            metric: point[metric] if metric == 'count' else float(point[metric] or 0)
+            for metric in METRICS
+        }))
+    return series
+
+
+def _totals_rows(start, end, granularity):
+    if granularity == 'hour':
+        rows = filter_range(Sale.objects, 'created_at', start, end).annotate(
+            bucket=Trunc('created_at', 'hour')
+        ).values('bucket').annotate(**SALE_METRICS)
+        return {row['bucket']: row for row in rows}
+
+    # start and end fall on local midnights, so whole rollup days cover the range
+    rollup = DailySalesRollup.objects.filter(
+        date__gte=timezone.localdate(start), date__lt=timezone.localdate(end)
+    )
+    if granularity == 'day':
+        rollup = rollup.annotate(bucket=F('date'))
+    else:
+        rollup = rollup.annotate(bucket=Trunc('date', granularity, output_field=DateField()))
+    rows = rollup.values('bucket').annotate(
+        revenue=Sum('net_amount'),
+        cost=Sum('total_cost'),
+        profit=Sum('total_profit'),
+        count=Sum('sales_count'),
+    )
+    return {day_start(row['bucket']): row for row in rows}
+
+
+def _breakdown_groups(start, end, granularity, breakdown, limit):
+    model, group_field, label_fields = BREAKDOWNS[breakdown]
+    if model is Sale:
+        queryset = filter_range(Sale.objects, 'created_at', start, end)
+        created_at, metrics = 'created_at', SALE_METRICS
+    else:
+        # Filtering items through a Sale subquery lets the planner start from the created_at index
+        queryset = SaleItem.objects.filter(sale__in=filter_range(Sale.objects, 'created_at', start, end).values('id'))
+        created_at, metrics = 'sale__created_at', ITEM_METRICS
+
+    rows = queryset.annotate(
+        bucket=Trunc(created_at, granularity)
+    ).values('bucket', group_field, *label_fields).annotate(**metrics)
+
+    groups = {}
+    for row in rows:
+        group_id = row[group_field]
+        if group_id not in groups:
+            label = ' '.join(filter(None, [row[field] for field in label_fields[1:]])) or row[label_fields[0]]
+            groups[group_id] = {'id': group_id, 'name': label or 'Unassigned', 'totals': _empty_point(), 'rows': {}}
+        group = groups[group_id]
+        bucket = timezone.localtime(row['bucket']) if granularity == 'hour' else day_start(timezone.localdate(row['bucket']))
+        group['rows'][bucket] = row
+        for metric in METRICS:
+            group['totals'][metric] += row[metric] or 0
+
+    ranked = sorted(groups.values(), key=lambda group: group['totals']['revenue'], reverse=True)
+    return ranked[:limit]
+
+
+def sales_timeseries(start, end, granularity='day', breakdown=None, limit=10):
+    """
+    Zero-filled series for [start, end), plus one series for each of the top
+    ``limit`` groups by revenue when ``breakdown`` is category, supplier or employee.
+    """
+    if breakdown is not None and breakdown not in BREAKDOWNS:
+        raise ValueError(f"Unknown breakdown '{breakdown}', expected one of: {', '.join(BREAKDOWNS)}")
+    buckets = bucket_starts(start, end, granularity)
+
+    result = {
+        'granularity': granularity,
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'series': _fill(buckets, _totals_rows(start, end, granularity)),
+        'breakdown': breakdown,
+        'groups': [],
+    }
+    if breakdown:
+        result['groups'] = [
+            {
+                'id': group['id'],
+                'name': group['name'],
+                'totals': {
+                    metric: value if metric == 'count' else float(value)
+                    for metric, value in group['totals'].items()
+                },
+                'series': _fill(buckets, group['rows']),
+            }
+            for group in _breakdown_groups(start, end, granularity, breakdown, limit)
+        ]
+    return result
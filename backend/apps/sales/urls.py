@@ -4,6 +4,8 @@ from . import views
 urlpatterns = [
     path('', views.SaleListCreateView.as_view(), name='sale-list-create'),
     path('<int:id>/', views.SaleDetailView.as_view(), name='sale-detail'),
+    path('bulk/', views.bulk_create_sales, name='sale-bulk-create'),
     path('stats/', views.sales_stats, name='sales-stats'),
     path('report/', views.sales_report, name='sales-report'),
+    path('invoice-numbers/', views.reserve_invoice_numbers, name='reserve-invoice-numbers'),
 ]
\ No newline at end of file
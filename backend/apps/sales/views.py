@@ -1,21 +1,59 @@
 from rest_framework import generics, filters, status
-from rest_framework.decorators import api_view
+from rest_framework.decorators import api_view, parser_classes
+from rest_framework.parsers import JSONParser
 from rest_framework.response import Response
+from rest_framework.exceptions import ValidationError
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db.models import Sum, Count
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Sum, Count, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.http import StreamingHttpResponse
 from django.utils import timezone
 from datetime import datetime, timedelta
+from collections import Counter
+import base64
+import json
+from apps.core.pagination import PageNumberOrCursorPagination
+from apps.core.parsers import NDJSONParser
+from apps.core.serializers import requested_fields
+from apps.core.timewindows import date_range, filter_range
+from apps.jobs.views import enqueue_request, wants_async
+from apps.search.filters import FullTextSearchFilter
 from .models import Sale, SaleItem
-from .serializers import SaleSerializer, SaleListSerializer
+from .serializers import SaleSerializer, SaleListSerializer, InvoiceReservationSerializer
+from .invoices import allocate_invoice_numbers
+from .bulk import MAX_BATCH_SIZE, ingest_sales
+from .rollup import period_totals
 
 class SaleListCreateView(generics.ListCreateAPIView):
-    queryset = Sale.objects.select_related('created_by').prefetch_related('items').all()
+    queryset = Sale.objects.all()
     serializer_class = SaleSerializer
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, FullTextSearchFilter]
+    search_entity = 'sale'
     search_fields = ['invoice_number', 'customer_name', 'customer_contact']
     filterset_fields = ['created_by']
     ordering_fields = ['created_at', 'total_amount', 'net_amount']
-    ordering = ['-created_at']
+    ordering = ['-created_at', '-id']
+    pagination_class = PageNumberOrCursorPagination
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.request.method != 'GET':
+            return queryset
+        
+        # Count items in SQL instead of loading them, and only join what ?fields= asks for.
+        # A correlated subquery is only evaluated for the rows on the page; joining and
+        # grouping the items would aggregate the whole table before the LIMIT applies.
+        fields = requested_fields(self.request)
+        if fields is None or 'items_count' in fields:
+            item_counts = SaleItem.objects.filter(sale=OuterRef('pk')).order_by().values('sale').annotate(
+                count=Count('pk')
+            ).values('count')
+            queryset = queryset.annotate(items_count=Coalesce(Subquery(item_counts), 0))
+        if fields is None or 'created_by_name' in fields:
+            queryset = queryset.select_related('created_by')
+        return queryset
 
     def get_serializer_class(self):
         if self.request.method == 'GET':
@@ -23,70 +61,223 @@ class SaleListCreateView(generics.ListCreateAPIView):
         return SaleSerializer
     
     def perform_create(self, serializer):
-        # Generate invoice number
-        today = timezone.now()
-        invoice_number = f"INV{today.strftime('%Y%m%d%H%M%S')}"
-        serializer.save(
-            created_by=self.request.user,
-            invoice_number=invoice_number
-        )
+        # Allocate the invoice number in the sale's own transaction so failed sales don't leave gaps
+        with transaction.atomic():
+            invoice_number = serializer.validated_data.get('invoice_number') or allocate_invoice_numbers()[0]
+            serializer.save(
+                created_by=self.request.user,
+                invoice_number=invoice_number
+            )
 
 class SaleDetailView(generics.RetrieveUpdateDestroyAPIView):
     queryset = Sale.objects.select_related('created_by').prefetch_related('items__product').all()
     serializer_class = SaleSerializer
     lookup_field = 'id'
 
+    def perform_update(self, serializer):
+        # The rollup signals hold the sale's row lock from reading its old totals until the save
+        with transaction.atomic():
+            serializer.save()
+
+@api_view(['POST'])
+def reserve_invoice_numbers(request):
+    """Pre-allocate a block of invoice numbers, e.g. for a terminal that will sell offline"""
+    serializer = InvoiceReservationSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    
+    invoice_numbers = allocate_invoice_numbers(
+        count=serializer.validated_data['count'],
+        store=serializer.validated_data.get('store')
+    )
+    return Response({'invoice_numbers': invoice_numbers}, status=status.HTTP_201_CREATED)
+
+@api_view(['POST'])
+@parser_classes([JSONParser, NDJSONParser])
+def bulk_create_sales(request):
+    """
+    Ingest a batch of sales from a POS terminal: a JSON array, {"sales": [...]} or NDJSON.
+    Each row needs an idempotency_key; results are reported per row, in order.
+    """
+    rows = request.data
+    if isinstance(rows, dict) and 'sales' in rows:
+        rows = rows['sales']
+    if not isinstance(rows, list):
+        raise ValidationError({'detail': 'Expected a JSON array or NDJSON body of sales.'})
+    if len(rows) > MAX_BATCH_SIZE:
+        raise ValidationError({'detail': f'A batch can contain at most {MAX_BATCH_SIZE} sales.'})
+    
+    results = ingest_sales(rows, user=request.user)
+    counts = Counter(result['status'] for result in results)
+    return Response({
+        'created': counts['created'],
+        'duplicates': counts['duplicate'],
+        'errors': counts['error'],
+        'results': results
+    })
+
 @api_view(['GET'])
 def sales_stats(request):
-    total_sales = Sale.objects.count()
-    today_sales = Sale.objects.filter(created_at__date=timezone.now().date()).count()
-    
-    # Revenue calculations
-    total_revenue = Sale.objects.aggregate(
-        total=Sum('net_amount')
-    )['total'] or 0
-    
-    today_revenue = Sale.objects.filter(
-        created_at__date=timezone.now().date()
-    ).aggregate(
-        total=Sum('net_amount')
-    )['total'] or 0
-    
-    # This month's sales
-    month_start = timezone.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-    month_sales = Sale.objects.filter(created_at__gte=month_start).count()
-    month_revenue = Sale.objects.filter(
-        created_at__gte=month_start
-    ).aggregate(
-        total=Sum('net_amount')
-    )['total'] or 0
+    # All periods come from the daily rollup in a single query
+    totals = period_totals()
     
     return Response({
-        'total_sales': total_sales,
-        'today_sales': today_sales,
-        'month_sales': month_sales,
-        'total_revenue': total_revenue,
-        'today_revenue': today_revenue,
-        'month_revenue': month_revenue
+        'total_sales': totals['total']['sales_count'],
+        'today_sales': totals['today']['sales_count'],
+        'month_sales': totals['month']['sales_count'],
+        'total_revenue': totals['total']['net_amount'],
+        'today_revenue': totals['today']['net_amount'],
+        'month_revenue': totals['month']['net_amount']
     })
 
-@api_view(['GET'])
-def sales_report(request):
-    # Get date range from query params
-    start_date = request.GET.get('start_date')
-    end_date = request.GET.get('end_date')
+# Rows fetched per round trip when walking a report with a server-side cursor
+REPORT_CHUNK_SIZE = 500
+REPORT_MAX_PAGE_SIZE = 500
+
+def report_row(sale):
+    """Flatten a sale (with prefetched items) into a report row"""
+    return {
+        'id': sale.id,
+        'invoice_number': sale.invoice_number,
+        'customer_name': sale.customer_name,
+        'customer_contact': sale.customer_contact,
+        'created_by': sale.created_by.get_full_name() if sale.created_by else 'Unknown',
+        'created_at': sale.created_at.isoformat(),
+        'total_amount': float(sale.total_amount),
+        'discount_percentage': float(sale.discount_percentage),
+        'discount_amount': float(sale.discount_amount),
+        'net_amount': float(sale.net_amount),
+        'total_cost': float(sale.total_cost),
+        'total_profit': float(sale.total_profit),
+        'profit_margin': float(sale.profit_margin_percentage),
+        'items': [
+            {
+                'product_name': item.product.name,
+                'product_code': item.product.code,
+                'category': item.product.category.name if item.product.category else 'N/A',
+                'supplier': item.product.supplier.name if item.product.supplier else 'N/A',
+                'quantity': item.quantity,
+                'unit_price': float(item.unit_price),
+                'unit_cost': float(item.unit_cost),
+                'total_price': float(item.total_price),
+                'total_cost': float(item.total_cost),
+                'profit': float(item.profit),
+                'profit_margin': float(item.profit_margin_percentage)
+            }
+            for item in sale.items.all()
+        ]
+    }
+
+def encode_report_cursor(sale):
+    """Opaque keyset cursor pointing just past ``sale`` in (-created_at, -id) order"""
+    raw = f"{sale.created_at.isoformat()}|{sale.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_report_cursor(cursor):
+    try:
+        created_at, sale_id = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        return datetime.fromisoformat(created_at), int(sale_id)
+    except (ValueError, UnicodeDecodeError):
+        raise ValidationError({'cursor': 'Invalid cursor.'})
+
+def stream_report_rows(queryset, stream_format):
+    """Yield report rows as NDJSON lines or as one JSON array, chunk by chunk"""
+    rows = queryset.order_by('-created_at', '-id').iterator(chunk_size=REPORT_CHUNK_SIZE)
+    if stream_format == 'ndjson':
+        for sale in rows:
+            yield json.dumps(report_row(sale), cls=DjangoJSONEncoder) + '\n'
+        return
     
+    yield '['
+    separator = ''
+    for sale in rows:
+        yield separator + json.dumps(report_row(sale), cls=DjangoJSONEncoder)
+        separator = ','
+    yield ']'
+
+def report_summary(queryset):
+    """Summary statistics for a report, in one aggregate query"""
+    totals = queryset.aggregate(
+        total_sales=Count('id'),
+        total_revenue=Sum('net_amount'),
+        total_discount=Sum('discount_amount'),
+        total_before_discount=Sum('total_amount'),
+        total_profit=Sum('total_profit'),
+        total_cost=Sum('total_cost')
+    )
+    total_sales = totals['total_sales']
+    total_revenue = totals['total_revenue'] or 0
+    total_discount = totals['total_discount'] or 0
+    total_before_discount = totals['total_before_discount'] or 0
+    total_profit = totals['total_profit'] or 0
+    total_cost = totals['total_cost'] or 0
+    
+    return {
+        'total_sales': total_sales,
+        'total_revenue': float(total_revenue),
+        'total_discount': float(total_discount),
+        'total_before_discount': float(total_before_discount),
+        'total_profit': float(total_profit),
+        'total_cost': float(total_cost),
+        'profit_margin': float((total_profit / total_cost) * 100) if total_cost > 0 else 0,
+        'average_sale_value': float(total_revenue / total_sales) if total_sales > 0 else 0,
+        'average_discount_percentage': float((total_discount / total_before_discount) * 100) if total_before_discount > 0 else 0
+    }
+
+def parse_report_params(params):
+    """Validated sales report options from its query parameters"""
+    options = {'start_date': None, 'end_date': None, 'page_size': None, 'cursor': None}
+    for param in ('start_date', 'end_date'):
+        value = params.get(param)
+        if value:
+            try:
+                options[param] = datetime.strptime(value, '%Y-%m-%d').date()
+            except ValueError:
+                raise ValidationError({param: 'Use the YYYY-MM-DD format.'})
+    
+    page_size = params.get('page_size')
+    if page_size:
+        if not page_size.isdigit():
+            raise ValidationError({'page_size': 'Must be a positive integer.'})
+        options['page_size'] = max(1, min(int(page_size), REPORT_MAX_PAGE_SIZE))
+        cursor = params.get('cursor')
+        if cursor:
+            options['cursor'] = decode_report_cursor(cursor)
+    return options
+
+def report_queryset(options):
     queryset = Sale.objects.select_related('created_by').prefetch_related(
         'items__product__category', 'items__product__supplier'
     ).all()
+    # Compare created_at against local midnights rather than casting it to a date
+    return filter_range(queryset, 'created_at', *date_range(options['start_date'], options['end_date']))
+
+@api_view(['GET'])
+def sales_report(request):
+    """
+    Sales report for an optional date range.
     
-    if start_date:
-        start_date = datetime.strptime(start_date, '%Y-%m-%d').date()
-        queryset = queryset.filter(created_at__date__gte=start_date)
+    ?stream=ndjson|json streams only the detailed rows through a server-side cursor.
+    ?page_size=N (with ?cursor=... from the previous page) returns one keyset page of
+    detailed rows alongside the aggregates; otherwise every row is returned.
+    ?async=true runs the report as a background job and answers 202 with the job to poll.
+    """
+    options = parse_report_params(request.GET)
     
-    if end_date:
-        end_date = datetime.strptime(end_date, '%Y-%m-%d').date()
-        queryset = queryset.filter(created_at__date__lte=end_date)
+    stream_format = request.GET.get('stream')
+    if stream_format:
+        if stream_format not in ('json', 'ndjson'):
+            raise ValidationError({'stream': 'Use "json" or "ndjson".'})
+        content_type = 'application/x-ndjson' if stream_format == 'ndjson' else 'application/json'
+        return StreamingHttpResponse(stream_report_rows(report_queryset(options), stream_format), content_type=content_type)
+    
+    if wants_async(request):
+        return enqueue_request(request, 'sales.report')
+    return Response(build_sales_report(request.GET))
+
+def build_sales_report(params):
+    """The sales report for the given query parameters; also run as the 'sales.report' job"""
+    options = parse_report_params(params)
+    queryset = report_queryset(options)
     
     # Daily aggregated data
     daily_data = queryset.values('created_at__date').annotate(
@@ -96,54 +287,25 @@ def sales_report(request):
         daily_total_before_discount=Sum('total_amount')
     ).order_by('created_at__date')
     
-    # Detailed sales data
-    detailed_sales = []
-    for sale in queryset.order_by('-created_at'):
-        sale_data = {
-            'id': sale.id,
-            'invoice_number': sale.invoice_number,
-            'customer_name': sale.customer_name,
-            'customer_contact': sale.customer_contact,
-            'created_by': sale.created_by.get_full_name() if sale.created_by else 'Unknown',
-            'created_at': sale.created_at.isoformat(),
-            'total_amount': float(sale.total_amount),
-            'discount_percentage': float(sale.discount_percentage),
-            'discount_amount': float(sale.discount_amount),
-            'net_amount': float(sale.net_amount),
-            'total_cost': float(sale.total_cost),
-            'total_profit': float(sale.total_profit),
-            'profit_margin': float(sale.profit_margin_percentage),
-            'items': []
-        }
-        
-        for item in sale.items.all():
-            item_data = {
-                'product_name': item.product.name,
-                'product_code': item.product.code,
-                'category': item.product.category.name if item.product.category else 'N/A',
-                'supplier': item.product.supplier.name if item.product.supplier else 'N/A',
-                'quantity': item.quantity,
-                'unit_price': float(item.unit_price),
-                'unit_cost': float(item.unit_cost),
-                'total_price': float(item.total_price),
-                'total_cost': float(item.total_cost),
-                'profit': float(item.profit),
-                'profit_margin': float(item.profit_margin_percentage)
-            }
-            sale_data['items'].append(item_data)
-        
-        detailed_sales.append(sale_data)
-    
-    # Summary statistics
-    total_sales = queryset.count()
-    total_revenue = queryset.aggregate(Sum('net_amount'))['net_amount__sum'] or 0
-    total_discount = queryset.aggregate(Sum('discount_amount'))['discount_amount__sum'] or 0
-    total_before_discount = queryset.aggregate(Sum('total_amount'))['total_amount__sum'] or 0
-    total_profit = queryset.aggregate(Sum('total_profit'))['total_profit__sum'] or 0
-    total_cost = queryset.aggregate(Sum('total_cost'))['total_cost__sum'] or 0
+    # Detailed sales data, either one keyset page or everything
+    detailed_queryset = queryset.order_by('-created_at', '-id')
+    next_cursor = None
+    page_size = options['page_size']
+    if page_size:
+        if options['cursor']:
+            created_at, sale_id = options['cursor']
+            detailed_queryset = detailed_queryset.filter(
+                Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=sale_id)
+            )
+        page = list(detailed_queryset[:page_size + 1])
+        if len(page) > page_size:
+            page = page[:page_size]
+            next_cursor = encode_report_cursor(page[-1])
+        detailed_sales = [report_row(sale) for sale in page]
+    else:
+        detailed_sales = [report_row(sale) for sale in detailed_queryset.iterator(chunk_size=REPORT_CHUNK_SIZE)]
     
     # Product performance with profit
-    from django.db.models import F
     product_performance = SaleItem.objects.filter(
         sale__in=queryset
     ).values(
@@ -179,21 +341,12 @@ def sales_report(request):
         total_cost=Sum('total_cost')
     ).order_by('-total_revenue')
     
-    return Response({
+    return {
         'daily_data': list(daily_data),
         'detailed_sales': detailed_sales,
-        'summary': {
-            'total_sales': total_sales,
-            'total_revenue': float(total_revenue),
-            'total_discount': float(total_discount),
-            'total_before_discount': float(total_before_discount),
-            'total_profit': float(total_profit),
-            'total_cost': float(total_cost),
-            'profit_margin': float((total_profit / total_cost) * 100) if total_cost > 0 else 0,
-            'average_sale_value': float(total_revenue / total_sales) if total_sales > 0 else 0,
-            'average_discount_percentage': float((total_discount / total_before_discount) * 100) if total_before_discount > 0 else 0
-        },
+        'next_cursor': next_cursor,
+        'summary': report_summary(queryset),
         'product_performance': list(product_performance),
         'category_performance': list(category_performance),
         'employee_performance': list(employee_performance)
-    })
\ No newline at end of file
+    }
\ No newline at end of file
@@ -0,0 +1,104 @@
+"""
+Vendor-specific full-text queries over SearchDocument.
+
+SQLite uses an FTS5 table with the trigram tokenizer (substring matches,
+ranked by bm25); PostgreSQL uses a tsvector column with prefix matching plus
+a trigram index for substring matches, ranked by ts_rank and similarity.
+Both are created in migration 0002. Lower rank is better on both.
+"""
+import re
+
+from django.db import connections
+from django.db.models.expressions import RawSQL
+
+DOCUMENT_TABLE = 'search_searchdocument'
+FTS_TABLE = 'search_searchdocument_fts'
+
+# The trigram tokenizer can't match terms shorter than this
+MIN_TRIGRAM_TERM = 3
+
+
+def _terms(text):
+    return re.findall(r'\w+', text)
+
+
+def _like_pattern(text):
+    return '%' + text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+
+
+def _fts_query(text):
+    """(FTS5 MATCH expression, LIKE patterns for the terms too short for the index), or None"""
+    terms = _terms(text)
+    long_terms = [term for term in terms if len(term) >= MIN_TRIGRAM_TERM]
+    if not long_terms:
+        return None
+    # \w+ terms can't contain quotes, so quoting each one is enough to escape FTS5 syntax
+    match = ' '.join(f'"{term}"' for term in long_terms)
+    return match, [_like_pattern(term) for term in terms if len(term) < MIN_TRIGRAM_TERM]
+
+
+def match_sql(connection, entity, text, object_id_column=None):
+    """
+    SQL selecting (object_id, rank) for the ``entity`` documents matching ``text``,
+    optionally restricted to the row whose id is ``object_id_column``.
+    Returns None when this database or query can't use the index.
+    """
+    terms = _terms(text)
+
+    if connection.vendor == 'sqlite':
+        fts_query = _fts_query(text)
+        if fts_query is None:
+            return None
+        match, patterns = fts_query
+        # Short terms are checked against the documents the index already matched
+        extra = ''.join(" AND d.body LIKE %s ESCAPE '\\'" for _ in patterns)
+        sql = (
+            f'SELECT d.object_id, bm25({FTS_TABLE}) AS rank '
+            # CROSS JOIN keeps the FTS table as the outer loop; otherwise SQLite may
+            # scan every document and run the MATCH once per row
+            f'FROM {FTS_TABLE} CROSS JOIN {DOCUMENT_TABLE} d ON d.id = {FTS_TABLE}.rowid '
+            f'WHERE {FTS_TABLE} MATCH %s AND d.entity = %s{extra}'
+        )
+        if object_id_column:
+            # bm25() rescans every match of each term, so a per-row MATCH would make ranking
+            # quadratic; the materialized CTE runs it once and SQLite indexes it by object_id
+            sql = f'WITH matches AS MATERIALIZED ({sql}) SELECT object_id, rank FROM matches WHERE object_id = {object_id_column}'
+        return sql, [match, entity] + patterns
+
+    if connection.vendor == 'postgresql':
+        if not terms:
+            return None
+        extra = f' AND d.object_id = {object_id_column}' if object_id_column else ''
+        tsquery = ' & '.join(f'{term}:*' for term in terms)
+        sql = (
+            "SELECT d.object_id, -(ts_rank(d.search_vector, to_tsquery('simple', %s)) + similarity(d.body, %s)) AS rank "
+            f"FROM {DOCUMENT_TABLE} d "
+            "WHERE d.entity = %s AND (d.search_vector @@ to_tsquery('simple', %s) OR d.body ILIKE %s)" + extra
+        )
+        return sql, [tsquery, text, entity, tsquery, _like_pattern(text)]
+
+    return None
+
+
+def search(queryset, entity, text, order_by_rank=True):
+    """
+    Filter ``queryset`` to rows whose ``entity`` document matches ``text``,
+    best matches first unless ``order_by_rank`` is False.
+    Returns None when the search index can't serve the query.
+    """
+    connection = connections[queryset.db]
+    match = match_sql(connection, entity, text)
+    if match is None:
+        return None
+
+    sql, params = match
+    if not order_by_rank:
+        return queryset.filter(pk__in=RawSQL(f'SELECT object_id FROM ({sql}) matches', params))
+
+    opts = queryset.model._meta
+    object_id_column = f'{connection.ops.quote_name(opts.db_table)}.{connection.ops.quote_name(opts.pk.column)}'
+
+    rank_sql, rank_params = match_sql(connection, entity, text, object_id_column=object_id_column)
+    return queryset.filter(pk__in=RawSQL(f'SELECT object_id FROM ({sql}) matches', params)).annotate(
+        search_rank=RawSQL(f'SELECT rank FROM ({rank_sql}) ranked', rank_params)
+    ).order_by('search_rank', '-pk')
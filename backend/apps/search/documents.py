@@ -0,0 +1,78 @@
+"""
+Building and maintaining search documents.
+
+Each indexed row gets one SearchDocument whose body is the text of the
+fields listed in SEARCH_ENTITIES, including related names (a product's
+category and supplier), so searching never has to join or LIKE-scan the
+source tables.
+"""
+from django.apps import apps
+
+from .models import SearchDocument
+
+SEARCH_ENTITIES = {
+    'product': {'model': 'products.Product', 'fields': ['code', 'name', 'category__name', 'supplier__name']},
+    'sale': {'model': 'sales.Sale', 'fields': ['invoice_number', 'customer_name', 'customer_contact']},
+    'supplier': {'model': 'suppliers.Supplier', 'fields': ['supplier_id', 'name', 'contact']},
+    'employee': {'model': 'employees.Employee', 'fields': ['eid', 'name', 'email', 'contact']},
+}
+
+# Models whose text is copied into other entities' documents: label -> [(entity, foreign key)]
+DEPENDENT_ENTITIES = {
+    'categories.Category': [('product', 'category')],
+    'suppliers.Supplier': [('product', 'supplier')],
+}
+
+BATCH_SIZE = 1000
+
+
+def get_model(entity):
+    return apps.get_model(SEARCH_ENTITIES[entity]['model'])
+
+
+def build_body(values):
+    return ' '.join(str(value) for value in values if value not in (None, ''))
+
+
+def index_queryset(entity, queryset=None, batch_size=BATCH_SIZE):
+    """(Re)index every row of ``queryset`` in primary key batches; returns the number indexed"""
+    if queryset is None:
+        queryset = get_model(entity).objects.all()
+    fields = SEARCH_ENTITIES[entity]['fields']
+    queryset = queryset.order_by('pk').values_list('pk', *fields)
+
+    indexed = 0
+    last_pk = None
+    while True:
+        batch = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+        rows = list(batch[:batch_size])
+        if not rows:
+            return indexed
+        SearchDocument.objects.bulk_create(
+            [SearchDocument(entity=entity, object_id=row[0], body=build_body(row[1:])) for row in rows],
+            update_conflicts=True,
+            unique_fields=['entity', 'object_id'],
+            update_fields=['body', 'updated_at']
+        )
+        indexed += len(rows)
+        last_pk = rows[-1][0]
+
+
+def index_objects(entity, ids):
+    """Index the given primary keys of ``entity``"""
+    ids = list(ids)
+    if ids:
+        index_queryset(entity, get_model(entity).objects.filter(pk__in=ids))
+
+
+def remove_objects(entity, ids):
+    SearchDocument.objects.filter(entity=entity, object_id__in=list(ids)).delete()
+
+
+def rebuild(entities=None):
+    """Drop and rebuild the documents of the given entities (all by default); returns counts"""
+    counts = {}
+    for entity in entities or SEARCH_ENTITIES:
+        SearchDocument.objects.filter(entity=entity).delete()
+        counts[entity] = index_queryset(entity)
+    return counts
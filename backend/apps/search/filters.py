@@ -0,0 +1,26 @@
+from rest_framework import filters
+from rest_framework.settings import api_settings
+
+from .backends import search
+
+
+class FullTextSearchFilter(filters.SearchFilter):
+    """
+    ?search= served from the search index for views that set ``search_entity``.
+
+    Results are ranked by relevance unless the client asks for an ?ordering=,
+    so list this backend after OrderingFilter. Queries the index can't serve
+    (other databases, only very short terms) fall back to ``search_fields``.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        entity = getattr(view, 'search_entity', None)
+        text = request.query_params.get(self.search_param, '').replace('\x00', '').strip()
+        if not entity or not text:
+            return super().filter_queryset(request, queryset, view)
+
+        order_by_rank = api_settings.ORDERING_PARAM not in request.query_params
+        results = search(queryset, entity, text, order_by_rank=order_by_rank)
+        if results is None:
+            return super().filter_queryset(request, queryset, view)
+        return results
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+from apps.search.documents import SEARCH_ENTITIES, rebuild
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search documents from the source tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'entities',
+            nargs='*',
+            help=f"Entities to rebuild: {', '.join(sorted(SEARCH_ENTITIES))} (default: all)",
+        )
+
+    def handle(self, *args, **options):
+        unknown = set(options['entities']) - set(SEARCH_ENTITIES)
+        if unknown:
+            raise CommandError(f"Unknown entities: {', '.join(sorted(unknown))}")
+        
+        counts = rebuild(options['entities'] or None)
+        for entity, count in counts.items():
+            self.stdout.write(f'{entity}: {count} document(s)')
+        self.stdout.write(self.style.SUCCESS('Search index rebuilt'))
@@ -0,0 +1,91 @@
+from django.db import migrations
+
+SQLITE_FORWARD = [
+    """CREATE VIRTUAL TABLE search_searchdocument_fts USING fts5(
+        body, content='search_searchdocument', content_rowid='id', tokenize='trigram'
+    )""",
+    """CREATE TRIGGER search_searchdocument_ai AFTER INSERT ON search_searchdocument BEGIN
+        INSERT INTO search_searchdocument_fts(rowid, body) VALUES (new.id, new.body);
+    END""",
+    """CREATE TRIGGER search_searchdocument_ad AFTER DELETE ON search_searchdocument BEGIN
+        INSERT INTO search_searchdocument_fts(search_searchdocument_fts, rowid, body) VALUES ('delete', old.id, old.body);
+    END""",
+    """CREATE TRIGGER search_searchdocument_au AFTER UPDATE ON search_searchdocument BEGIN
+        INSERT INTO search_searchdocument_fts(search_searchdocument_fts, rowid, body) VALUES ('delete', old.id, old.body);
+        INSERT INTO search_searchdocument_fts(rowid, body) VALUES (new.id, new.body);
+    END""",
+]
+
+SQLITE_BACKWARD = [
+    'DROP TRIGGER IF EXISTS search_searchdocument_au',
+    'DROP TRIGGER IF EXISTS search_searchdocument_ad',
+    'DROP TRIGGER IF EXISTS search_searchdocument_ai',
+    'DROP TABLE IF EXISTS search_searchdocument_fts',
+]
+
+# pg_trgm needs to be available (it ships with PostgreSQL's contrib package)
+POSTGRES_FORWARD = [
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    """ALTER TABLE search_searchdocument ADD COLUMN search_vector tsvector
+        GENERATED ALWAYS AS (to_tsvector('simple', body)) STORED""",
+    'CREATE INDEX search_document_vector_idx ON search_searchdocument USING GIN (search_vector)',
+    'CREATE INDEX search_document_body_trgm_idx ON search_searchdocument USING GIN (body gin_trgm_ops)',
+]
+
+POSTGRES_BACKWARD = [
+    'DROP INDEX IF EXISTS search_document_body_trgm_idx',
+    'DROP INDEX IF EXISTS search_document_vector_idx',
+    'ALTER TABLE search_searchdocument DROP COLUMN IF EXISTS search_vector',
+]
+
+# Snapshot of apps.search.documents.SEARCH_ENTITIES at the time of this migration
+ENTITIES = {
+    'product': ('products', 'Product', ['code', 'name', 'category__name', 'supplier__name']),
+    'sale': ('sales', 'Sale', ['invoice_number', 'customer_name', 'customer_contact']),
+    'supplier': ('suppliers', 'Supplier', ['supplier_id', 'name', 'contact']),
+    'employee': ('employees', 'Employee', ['eid', 'name', 'email', 'contact']),
+}
+
+
+def _run(schema_editor, statements):
+    for statement in statements.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(statement)
+
+
+def create_fulltext_index(apps, schema_editor):
+    _run(schema_editor, {'sqlite': SQLITE_FORWARD, 'postgresql': POSTGRES_FORWARD})
+
+
+def drop_fulltext_index(apps, schema_editor):
+    _run(schema_editor, {'sqlite': SQLITE_BACKWARD, 'postgresql': POSTGRES_BACKWARD})
+
+
+def backfill_documents(apps, schema_editor):
+    """Index the rows that already exist"""
+    SearchDocument = apps.get_model('search', 'SearchDocument')
+    for entity, (app_label, model_name, fields) in ENTITIES.items():
+        model = apps.get_model(app_label, model_name)
+        documents = []
+        for row in model.objects.order_by('pk').values_list('pk', *fields).iterator():
+            body = ' '.join(str(value) for value in row[1:] if value not in (None, ''))
+            documents.append(SearchDocument(entity=entity, object_id=row[0], body=body))
+            if len(documents) >= 1000:
+                SearchDocument.objects.bulk_create(documents)
+                documents = []
+        SearchDocument.objects.bulk_create(documents)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('search', '0001_initial'),
+        ('products', '0004_created_at_id_index'),
+        ('sales', '0005_created_at_id_index'),
+        ('suppliers', '0002_rename_invoice_to_supplier_id'),
+        ('employees', '0002_created_at_id_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fulltext_index, drop_fulltext_index),
+        migrations.RunPython(backfill_documents, migrations.RunPython.noop),
+    ]
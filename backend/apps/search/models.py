@@ -0,0 +1,17 @@
+from django.db import models
+
+class SearchDocument(models.Model):
+    """
+    Denormalized search text for one product, sale, supplier or employee.
+    The full-text index over `body` is created per database vendor in migration 0002.
+    """
+    entity = models.CharField(max_length=20)
+    object_id = models.BigIntegerField()
+    body = models.TextField()
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        unique_together = ['entity', 'object_id']
+        
+    def __str__(self):
+        return f"{self.entity} #{self.object_id}"
\ No newline at end of file
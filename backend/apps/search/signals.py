@@ -0,0 +1,35 @@
+from django.apps import apps
+from django.db.models.signals import post_save, post_delete
+from .documents import SEARCH_ENTITIES, DEPENDENT_ENTITIES, index_objects, index_queryset, remove_objects, get_model
+
+# Keep search documents in step with the rows they describe. bulk_create and
+# queryset.update() skip these signals; callers using them index explicitly.
+
+
+def _connect(model, entity):
+    def document_saved(sender, instance, **kwargs):
+        index_objects(entity, [instance.pk])
+
+    def document_deleted(sender, instance, **kwargs):
+        remove_objects(entity, [instance.pk])
+
+    post_save.connect(document_saved, sender=model, weak=False, dispatch_uid=f'search-save-{entity}')
+    post_delete.connect(document_deleted, sender=model, weak=False, dispatch_uid=f'search-delete-{entity}')
+
+
+def _connect_dependents(model, dependents):
+    def related_saved(sender, instance, created, **kwargs):
+        # A new category or supplier can't appear in any document yet
+        if created:
+            return
+        for entity, field in dependents:
+            index_queryset(entity, get_model(entity).objects.filter(**{field: instance}))
+
+    post_save.connect(related_saved, sender=model, weak=False, dispatch_uid=f'search-related-{model._meta.label}')
+
+
+for entity, config in SEARCH_ENTITIES.items():
+    _connect(apps.get_model(config['model']), entity)
+
+for label, dependents in DEPENDENT_ENTITIES.items():
+    _connect_dependents(apps.get_model(label), dependents)
@@ -1,7 +1,6 @@
 from rest_framework import serializers
 from .models import Supplier
-import random
-import string
+from apps.core import identifiers
 
 class SupplierSerializer(serializers.ModelSerializer):
     supplier_id = serializers.CharField(required=False, allow_blank=True)
@@ -15,12 +14,8 @@ class SupplierSerializer(serializers.ModelSerializer):
         }
     
     def generate_supplier_id(self):
-        """Generate a unique supplier ID"""
-        while True:
-            # Generate supplier ID in format: SUP + 4 random digits
-            supplier_id = 'SUP' + ''.join(random.choices(string.digits, k=4))
-            if not Supplier.objects.filter(supplier_id=supplier_id).exists():
-                return supplier_id
+        """Generate a unique supplier ID (SUP0001, SUP0002, ...)"""
+        return identifiers.allocate('supplier')[0]
     
     def validate_supplier_id(self, value):
         """Validate supplier ID uniqueness if provided"""
@@ -39,6 +34,8 @@ class SupplierSerializer(serializers.ModelSerializer):
         # Generate supplier ID if not provided or empty
         if not validated_data.get('supplier_id'):
             validated_data['supplier_id'] = self.generate_supplier_id()
+        else:
+            identifiers.observe('supplier', validated_data['supplier_id'])
         
         return Supplier.objects.create(**validated_data)
 
@@ -2,14 +2,18 @@ from rest_framework import generics, filters, status
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
+from django.db.models import Q
+from apps.core.stats import collect_stats
+from apps.search.filters import FullTextSearchFilter
 from .models import Supplier
 from .serializers import SupplierSerializer, SupplierListSerializer
 
 class SupplierListCreateView(generics.ListCreateAPIView):
     queryset = Supplier.objects.all()
     serializer_class = SupplierSerializer
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
-    search_fields = ['name', 'invoice', 'contact']
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, FullTextSearchFilter]
+    search_entity = 'supplier'
+    search_fields = ['name', 'supplier_id', 'contact']
     filterset_fields = ['is_active']
     ordering_fields = ['name', 'created_at']
     ordering = ['-created_at']
@@ -26,11 +30,10 @@ class SupplierDetailView(generics.RetrieveUpdateDestroyAPIView):
 
 @api_view(['GET'])
 def supplier_stats(request):
-    total_suppliers = Supplier.objects.count()
-    active_suppliers = Supplier.objects.filter(is_active=True).count()
+    stats = collect_stats(Supplier.objects.all(), counters={'active': Q(is_active=True)})
     
     return Response({
-        'total_suppliers': total_suppliers,
-        'active_suppliers': active_suppliers,
-        'inactive_suppliers': total_suppliers - active_suppliers
+        'total_suppliers': stats['total'],
+        'active_suppliers': stats['active'],
+        'inactive_suppliers': stats['total'] - stats['active']
     })
\ No newline at end of file
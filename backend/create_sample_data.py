@@ -40,15 +40,15 @@ def create_sample_data():
     
     # Create suppliers
     suppliers = [
-        {'invoice': 'SUP001', 'name': 'Tech Supplies Inc', 'contact': '+1-555-0101', 'description': 'Electronics and tech equipment supplier'},
-        {'invoice': 'SUP002', 'name': 'Fashion World', 'contact': '+1-555-0102', 'description': 'Clothing and fashion items supplier'},
-        {'invoice': 'SUP003', 'name': 'Book Distributors', 'contact': '+1-555-0103', 'description': 'Books and educational materials supplier'},
-        {'invoice': 'SUP004', 'name': 'Home Depot', 'contact': '+1-555-0104', 'description': 'Home improvement and garden supplies'},
+        {'supplier_id': 'SUP0001', 'name': 'Tech Supplies Inc', 'contact': '+1-555-0101', 'description': 'Electronics and tech equipment supplier'},
+        {'supplier_id': 'SUP0002', 'name': 'Fashion World', 'contact': '+1-555-0102', 'description': 'Clothing and fashion items supplier'},
+        {'supplier_id': 'SUP0003', 'name': 'Book Distributors', 'contact': '+1-555-0103', 'description': 'Books and educational materials supplier'},
+        {'supplier_id': 'SUP0004', 'name': 'Home Depot', 'contact': '+1-555-0104', 'description': 'Home improvement and garden supplies'},
     ]
     
     for sup_data in suppliers:
         supplier, created = Supplier.objects.get_or_create(
-            invoice=sup_data['invoice'],
+            supplier_id=sup_data['supplier_id'],
             defaults={
                 'name': sup_data['name'],
                 'contact': sup_data['contact'],
@@ -87,24 +87,27 @@ def create_sample_data():
     
     # Create products
     products_data = [
-        {'name': 'Laptop', 'category': 'Electronics', 'supplier_invoice': 'SUP001', 'price': 999.99, 'quantity': 50},
-        {'name': 'Smartphone', 'category': 'Electronics', 'supplier_invoice': 'SUP001', 'price': 699.99, 'quantity': 100},
-        {'name': 'T-Shirt', 'category': 'Clothing', 'supplier_invoice': 'SUP002', 'price': 19.99, 'quantity': 200},
-        {'name': 'Jeans', 'category': 'Clothing', 'supplier_invoice': 'SUP002', 'price': 49.99, 'quantity': 150},
-        {'name': 'Python Programming Book', 'category': 'Books', 'supplier_invoice': 'SUP003', 'price': 39.99, 'quantity': 75},
-        {'name': 'Garden Tools Set', 'category': 'Home & Garden', 'supplier_invoice': 'SUP004', 'price': 89.99, 'quantity': 30},
+        {'code': 'PRD0001', 'name': 'Laptop', 'category': 'Electronics', 'supplier_id': 'SUP0001', 'buy_price': 799.99, 'price': 999.99, 'quantity': 50},
+        {'code': 'PRD0002', 'name': 'Smartphone', 'category': 'Electronics', 'supplier_id': 'SUP0001', 'buy_price': 549.99, 'price': 699.99, 'quantity': 100},
+        {'code': 'PRD0003', 'name': 'T-Shirt', 'category': 'Clothing', 'supplier_id': 'SUP0002', 'buy_price': 9.99, 'price': 19.99, 'quantity': 200},
+        {'code': 'PRD0004', 'name': 'Jeans', 'category': 'Clothing', 'supplier_id': 'SUP0002', 'buy_price': 29.99, 'price': 49.99, 'quantity': 150},
+        {'code': 'PRD0005', 'name': 'Python Programming Book', 'category': 'Books', 'supplier_id': 'SUP0003', 'buy_price': 24.99, 'price': 39.99, 'quantity': 75},
+        {'code': 'PRD0006', 'name': 'Garden Tools Set', 'category': 'Home & Garden', 'supplier_id': 'SUP0004', 'buy_price': 59.99, 'price': 89.99, 'quantity': 30},
     ]
     
     for prod_data in products_data:
         try:
             category = Category.objects.get(name=prod_data['category'])
-            supplier = Supplier.objects.get(invoice=prod_data['supplier_invoice'])
+            supplier = Supplier.objects.get(supplier_id=prod_data['supplier_id'])
             
             product, created = Product.objects.get_or_create(
-                name=prod_data['name'],
+                code=prod_data['code'],
                 defaults={
+                    'name': prod_data['name'],
                     'category': category,
                     'supplier': supplier,
+                    'buy_price': prod_data['buy_price'],
+                    'sell_price': prod_data['price'],
                     'price': prod_data['price'],
                     'quantity': prod_data['quantity'],
                     'description': f"High quality {prod_data['name'].lower()}",
@@ -117,7 +120,7 @@ def create_sample_data():
             print(f"Skipping product {prod_data['name']}: {e}")
     
     # Create some sample sales
-    admin_user = User.objects.get(username='Ahmadraza301')
+    admin_user = User.objects.filter(is_superuser=True).first()
     
     # Sample sale 1
     sale1, created = Sale.objects.get_or_create(
@@ -1,6 +1,10 @@
 from django.contrib import admin
 from django.contrib.admin import AdminSite
+from django.http import FileResponse, Http404
+from django.template.response import TemplateResponse
+from django.urls import path, reverse
 from django.utils.translation import gettext_lazy as _
+from apps.core import profiling
 
 class InventoryAdminSite(AdminSite):
     site_title = _('IMS Admin Panel')
@@ -20,8 +24,64 @@ class InventoryAdminSite(AdminSite):
         # Sort the models alphabetically within each app.
         for app in app_list:
             app['models'].sort(key=lambda x: x['name'])
-            
+        
+        if request.user.is_staff and app_label is None:
+            profiles_url = reverse(f'{self.name}:profile-list')
+            app_list.append({
+                'name': _('Diagnostics'),
+                'app_label': 'diagnostics',
+                'app_url': profiles_url,
+                'has_module_perms': True,
+                'models': [{
+                    'name': _('Request profiles'),
+                    'object_name': 'RequestProfile',
+                    'admin_url': profiles_url,
+                    'add_url': None,
+                    'view_only': True,
+                }],
+            })
         return app_list
+    
+    def get_urls(self):
+        urls = [
+            path('profiles/', self.admin_view(self.profile_list_view), name='profile-list'),
+            path('profiles/<str:profile_id>/', self.admin_view(self.profile_detail_view), name='profile-detail'),
+            path('profiles/<str:profile_id>/<str:kind>/', self.admin_view(self.profile_download_view), name='profile-download'),
+        ]
+        return urls + super().get_urls()
+    
+    def profile_list_view(self, request):
+        """Profiles recorded with ?profile=1, newest first"""
+        context = dict(
+            self.each_context(request),
+            title=_('Request profiles'),
+            profiles=profiling.list_profiles(),
+        )
+        return TemplateResponse(request, 'admin/profiles/profile_list.html', context)
+    
+    def profile_detail_view(self, request, profile_id):
+        profile = profiling.get_profile(profile_id)
+        if profile is None:
+            raise Http404('Profile not found')
+        sort = request.GET.get('sort')
+        if sort not in profiling.SORT_OPTIONS:
+            sort = profiling.SORT_OPTIONS[0]
+        context = dict(
+            self.each_context(request),
+            title=f"{profile['method']} {profile['path']}",
+            profile=profile,
+            sort=sort,
+            sort_options=profiling.SORT_OPTIONS,
+            stats=profiling.format_stats(profile_id, sort=sort),
+            stacks=profiling.top_stacks(profile_id),
+        )
+        return TemplateResponse(request, 'admin/profiles/profile_detail.html', context)
+    
+    def profile_download_view(self, request, profile_id, kind):
+        path = profiling.profile_path(profile_id, kind)
+        if path is None or kind not in profiling.KINDS:
+            raise Http404('Profile not found')
+        return FileResponse(open(path, 'rb'), as_attachment=True, filename=path.name, content_type=profiling.KINDS[kind])
 
 # Create custom admin site
 admin_site = InventoryAdminSite(name='inventory_admin')
@@ -1,4 +1,6 @@
+import hashlib
 import os
+import tempfile
 from pathlib import Path
 from decouple import config
 from datetime import timedelta
@@ -31,6 +33,7 @@ THIRD_PARTY_APPS = [
 ]
 
 LOCAL_APPS = [
+    'apps.core',
     'apps.authentication',
     'apps.employees',
     'apps.suppliers',
@@ -38,11 +41,14 @@ LOCAL_APPS = [
     'apps.products',
     'apps.sales',
     'apps.dashboard',
+    'apps.search',
+    'apps.jobs',
 ]
 
 INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
 
 MIDDLEWARE = [
+    'apps.core.instrumentation.RequestInstrumentationMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
@@ -52,6 +58,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'apps.core.profiling.ProfilingMiddleware',
 ]
 
 ROOT_URLCONF = 'inventory_system.urls'
@@ -94,6 +101,8 @@ else:
         'default': {
             'ENGINE': 'django.db.backends.sqlite3',
             'NAME': BASE_DIR / 'db.sqlite3',
+            # A file rather than in-memory, so the concurrency tests' connections lock each other as in production
+            'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
         }
     }
 
@@ -174,6 +183,59 @@ SECURE_BROWSER_XSS_FILTER = True
 SECURE_CONTENT_TYPE_NOSNIFF = True
 X_FRAME_OPTIONS = 'DENY'
 
+# Cache
+# Local memory by default; point CACHE_BACKEND/CACHE_LOCATION at the file-based or Redis backend to share it between workers
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='inventory-system'),
+    }
+}
+
+# Seconds each cached API response stays fresh (writes to sales/products invalidate them sooner)
+RESPONSE_CACHE_TTLS = {
+    'dashboard-stats': config('CACHE_TTL_DASHBOARD_STATS', default=30, cast=int),
+    'recent-activities': config('CACHE_TTL_RECENT_ACTIVITIES', default=15, cast=int),
+    'inventory-summary': config('CACHE_TTL_INVENTORY_SUMMARY', default=60, cast=int),
+    'profit-analytics': config('CACHE_TTL_PROFIT_ANALYTICS', default=120, cast=int),
+}
+
+# Request instrumentation
+# Server-Timing headers expose query counts and timings to clients; switch them off to only log
+INSTRUMENTATION_SERVER_TIMING = config('INSTRUMENTATION_SERVER_TIMING', default=True, cast=bool)
+# Requests that run the same SQL this many times are flagged as N+1 patterns
+INSTRUMENTATION_N_PLUS_ONE_THRESHOLD = config('INSTRUMENTATION_N_PLUS_ONE_THRESHOLD', default=5, cast=int)
+
+# Metrics (/api/metrics/)
+# Every worker writes its counters to METRICS_DIR so any worker can report the totals of all of them.
+# The default is shared by all processes of this deployment (keyed on its path) and outside the source
+# tree; set it empty for per-process metrics
+METRICS_DIR = config('METRICS_DIR', default=os.path.join(
+    tempfile.gettempdir(), f"inventory-metrics-{hashlib.sha1(str(BASE_DIR).encode()).hexdigest()[:12]}"
+))
+METRICS_FLUSH_INTERVAL = config('METRICS_FLUSH_INTERVAL', default=5, cast=float)
+# Bearer token the scraper sends; without one the endpoint is only served with DEBUG on
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+
+# On-demand profiling (?profile=1 as a staff user), browsable under /admin/profiles/
+PROFILE_DIR = config('PROFILE_DIR', default=str(BASE_DIR / 'logs' / 'profiles'))
+PROFILE_KEEP = config('PROFILE_KEEP', default=50, cast=int)
+
+# Slow-query log: queries slower than this are written with their plan to SLOW_QUERY_LOG (rotated);
+# summarize it with manage.py slow_query_report. 0 turns it off
+SLOW_QUERY_THRESHOLD_MS = config('SLOW_QUERY_THRESHOLD_MS', default=200, cast=float)
+SLOW_QUERY_LOG = config('SLOW_QUERY_LOG', default=str(BASE_DIR / 'logs' / 'slow_queries.log'))
+
+# Background jobs (manage.py run_worker)
+JOBS_POLL_INTERVAL = config('JOBS_POLL_INTERVAL', default=1, cast=float)
+JOBS_MAX_ATTEMPTS = config('JOBS_MAX_ATTEMPTS', default=3, cast=int)
+# Seconds before the first retry of a failed job; doubles with each attempt
+JOBS_RETRY_BACKOFF = config('JOBS_RETRY_BACKOFF', default=10, cast=float)
+# Workers renew a running job's lease several times per period; a job not renewed for this many seconds
+# is assumed to have lost its worker and is queued again
+JOBS_LEASE_TIMEOUT = config('JOBS_LEASE_TIMEOUT', default=900, cast=int)
+JOBS_RETENTION_DAYS = config('JOBS_RETENTION_DAYS', default=7, cast=int)
+
 # Logging
 LOGGING = {
     'version': 1,
@@ -184,6 +246,13 @@ LOGGING = {
             'class': 'logging.FileHandler',
             'filename': BASE_DIR / 'logs' / 'django.log',
         },
+        'slow_queries': {
+            'level': 'WARNING',
+            'class': 'logging.handlers.RotatingFileHandler',
+            'filename': SLOW_QUERY_LOG,
+            'maxBytes': 10 * 1024 * 1024,
+            'backupCount': 5,
+        },
     },
     'loggers': {
         'django': {
@@ -191,5 +260,20 @@ LOGGING = {
             'level': 'INFO',
             'propagate': True,
         },
+        'apps.core.slowqueries': {
+            'handlers': ['slow_queries'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+        'apps.core.instrumentation': {
+            'handlers': ['file'],
+            'level': config('INSTRUMENTATION_LOG_LEVEL', default='INFO'),
+            'propagate': False,
+        },
+        'apps.jobs': {
+            'handlers': ['file'],
+            'level': 'INFO',
+            'propagate': False,
+        },
     },
 }
\ No newline at end of file
@@ -3,6 +3,7 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 from django.shortcuts import redirect
+from apps.core.views import metrics_view
 from .admin import admin_site
 
 def redirect_to_frontend(request):
@@ -19,6 +20,8 @@ urlpatterns = [
     path('api/products/', include('apps.products.urls')),
     path('api/sales/', include('apps.sales.urls')),
     path('api/dashboard/', include('apps.dashboard.urls')),
+    path('api/jobs/', include('apps.jobs.urls')),
+    path('api/metrics/', metrics_view, name='metrics'),
 ]
 
 if settings.DEBUG:
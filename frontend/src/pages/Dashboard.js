@@ -148,6 +148,7 @@ const ActivityItem = ({ activity, index }) => (
 const Dashboard = () => {
   const [stats, setStats] = useState(null);
   const [activities, setActivities] = useState([]);
+  const [salesTrend, setSalesTrend] = useState([]);
   const [loading, setLoading] = useState(true);
 
   useEffect(() => {
@@ -156,13 +157,23 @@ const Dashboard = () => {
 
   const fetchDashboardData = async () => {
     try {
-      const [statsResponse, activitiesResponse] = await Promise.all([
+      const [statsResponse, activitiesResponse, trendResponse] = await Promise.all([
         axios.get('/api/dashboard/stats/'),
         axios.get('/api/dashboard/activities/'),
+        axios.get('/api/dashboard/timeseries/', {
+          params: { granularity: 'day', days: 7 }
+        }),
       ]);
 
       setStats(statsResponse.data);
       setActivities(activitiesResponse.data);
+      setSalesTrend(trendResponse.data.series.map((point) => ({
+        date: point.bucket.slice(0, 10),
+        sales: point.count,
+        revenue: point.revenue,
+        profit: point.profit,
+        cost: point.cost,
+      })));
     } catch (error) {
       toast.error('Failed to fetch dashboard data');
       console.error('Dashboard error:', error);
@@ -363,7 +374,7 @@ const Dashboard = () => {
                 Sales Trend (Last 7 Days)
               </Typography>
               <ResponsiveContainer width="100%" height={350}>
-                <AreaChart data={stats.charts.recent_sales}>
+                <AreaChart data={salesTrend}>
                   <defs>
                     <linearGradient id="colorRevenue" x1="0" y1="0" x2="0" y2="1">
                       <stop offset="5%" stopColor="#1976d2" stopOpacity={0.8}/>
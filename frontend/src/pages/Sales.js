@@ -55,7 +55,9 @@ const Sales = () => {
   const fetchData = async () => {
     try {
       const [salesRes, productsRes] = await Promise.all([
-        axios.get('/api/sales/'),
+        axios.get('/api/sales/', {
+          params: { fields: 'id,invoice_number,customer_name,customer_contact,total_amount,net_amount,items_count,created_at' },
+        }),
         axios.get('/api/products/'),
       ]);
       